@@ -1,8 +1,14 @@
-import yfinance as yf
 import ta
 import pandas as pd
 from datetime import date, timedelta, datetime
-from IPython.display import clear_output
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import backtest_engine as be
+import indicator_cache as ic
+import grid_search as gs
+import price_store as ps
 
 pd.set_option("display.max_columns", None)
 pd.set_option("display.max_rows", None)
@@ -17,41 +23,85 @@ def get_stock_backtest_data(ticker, start, end):
     start_date_buffer = datetime.strptime(start_date, date_fmt) - timedelta(days=365)
     start_date_buffer = start_date_buffer.strftime(date_fmt)
 
-    df = yf.download(ticker, start=start_date_buffer, end=end_date)
+    df = ps.get_history(ticker, start_date_buffer, end_date)
+    df.attrs["ticker"] = ticker
 
     return df
 
-df = get_stock_backtest_data(ticker, start_date, end_date)
-df["CLOSE_PREV"] = df.Close.shift(1)
+# The cells below only run as a script: the grid search workers import this module for
+# the strategy functions and must not repeat the downloads and sweeps
+if __name__ == "__main__":
+    df = get_stock_backtest_data(ticker, start_date, end_date)
+    df["CLOSE_PREV"] = df.Close.shift(1)
 
-k_band = ta.volatility.KeltnerChannel(df.High, df.Low, df.Close, 10)
+    k_band = ta.volatility.KeltnerChannel(df.High, df.Low, df.Close, 10)
 
-df["K_BAND_UB"] = k_band.keltner_channel_hband().round(4)
-df["K_BAND_LB"] = k_band.keltner_channel_lband().round(4)
+    df["K_BAND_UB"] = k_band.keltner_channel_hband().round(4)
+    df["K_BAND_LB"] = k_band.keltner_channel_lband().round(4)
 
-df[["K_BAND_UB", "K_BAND_LB"]].dropna().head()
+    df[["K_BAND_UB", "K_BAND_LB"]].dropna().head()
 
-df["LONG"] = (df.Close <= df.K_BAND_LB) & (df.CLOSE_PREV > df.K_BAND_LB)
-df["EXIT_LONG"] = (df.Close >= df.K_BAND_UB) & (df.CLOSE_PREV < df.K_BAND_UB)
+    df["LONG"] = (df.Close <= df.K_BAND_LB) & (df.CLOSE_PREV > df.K_BAND_LB)
+    df["EXIT_LONG"] = (df.Close >= df.K_BAND_UB) & (df.CLOSE_PREV < df.K_BAND_UB)
 
-df["SHORT"] = (df.Close >= df.K_BAND_UB) & (df.CLOSE_PREV < df.K_BAND_UB)
-df["EXIT_SHORT"] = (df.Close <= df.K_BAND_LB) & (df.CLOSE_PREV > df.K_BAND_LB)
+    df["SHORT"] = (df.Close >= df.K_BAND_UB) & (df.CLOSE_PREV < df.K_BAND_UB)
+    df["EXIT_SHORT"] = (df.Close <= df.K_BAND_LB) & (df.CLOSE_PREV > df.K_BAND_LB)
 
-df.LONG = df.LONG.shift(1)
-df.EXIT_LONG = df.EXIT_LONG.shift(1)
-df.SHORT = df.SHORT.shift(1)
-df.EXIT_SHORT = df.EXIT_SHORT.shift(1)
+    df.LONG = df.LONG.shift(1)
+    df.EXIT_LONG = df.EXIT_LONG.shift(1)
+    df.SHORT = df.SHORT.shift(1)
+    df.EXIT_SHORT = df.EXIT_SHORT.shift(1)
 
-print(df[["LONG", "EXIT_LONG", "SHORT", "EXIT_SHORT"]].dropna().head())
+    print(df[["LONG", "EXIT_LONG", "SHORT", "EXIT_SHORT"]].dropna().head())
+
+# Indicators behind the strategies, memoized in ic.cache on (ticker, date range, indicator,
+# params) so each one is computed once per sweep and shared between strategies and
+# parameter sets that need the same values (e.g. the Stochastic K/D of a given k, d).
+
+def keltner_channel(df, n):
+    k_band = ta.volatility.KeltnerChannel(df.High, df.Low, df.Close, n)
+    return k_band.keltner_channel_hband().round(4), k_band.keltner_channel_lband().round(4)
+
+def bollinger_band_indicators(df, n, n_rng):
+    boll = ta.volatility.BollingerBands(df.Close, n, n_rng)
+    return boll.bollinger_lband_indicator(), boll.bollinger_hband_indicator()
+
+def moving_average(df, n, ma_type):
+    if ma_type == "sma":
+        return ta.trend.SMAIndicator(df.Close, n).sma_indicator().round(4)
+    elif ma_type == "ema":
+        return ta.trend.EMAIndicator(df.Close, n).ema_indicator().round(4)
+
+def macd_diff(df, n_slow, n_fast, n_sign):
+    return ta.trend.MACD(df.Close, n_slow, n_fast, n_sign).macd_diff().round(4)
+
+def rsi(df, n):
+    return ta.momentum.RSIIndicator(df.Close, n).rsi().round(4)
+
+def williams_r(df, n):
+    return ta.momentum.WilliamsRIndicator(df.High, df.Low, df.Close, n).williams_r().round(4)
+
+def stochastic(df, k, d):
+    sto = ta.momentum.StochasticOscillator(df.High, df.Low, df.Close, k, d)
+    return sto.stoch().round(4), sto.stoch_signal().round(4)
+
+def stochastic_dd(df, k, d, dd):
+    _, stoch_d = ic.cache.indicator(df, "stochastic", stochastic, k=k, d=d)
+    return ta.trend.SMAIndicator(stoch_d, dd).sma_indicator().round(4)
+
+def ichimoku_conversion_line(df, n_conv):
+    # the conversion line only depends on n_conv and the base line only on n_base,
+    # so they are cached separately and shared across the whole Ichimoku grid
+    return ta.trend.IchimokuIndicator(df.High, df.Low, window1=n_conv).ichimoku_conversion_line().round(4)
+
+def ichimoku_base_line(df, n_base):
+    return ta.trend.IchimokuIndicator(df.High, df.Low, window2=n_base).ichimoku_base_line().round(4)
 
 def strategy_KeltnerChannel_origin(df, **kwargs):
     n = kwargs.get("n", 10)
     data = df.copy()
 
-    k_band = ta.volatility.KeltnerChannel(data.High, data.Low, data.Close, n)
-
-    data["K_BAND_UB"] = k_band.keltner_channel_hband().round(4)
-    data["K_BAND_LB"] = k_band.keltner_channel_lband().round(4)
+    data["K_BAND_UB"], data["K_BAND_LB"] = ic.cache.indicator(df, "keltner_channel", keltner_channel, n=n)
 
     data["CLOSE_PREV"] = data.Close.shift(1)
 
@@ -72,17 +122,17 @@ def strategy_KeltnerChannel_origin(df, **kwargs):
 
     return data
 
-df = strategy_KeltnerChannel_origin(df, n=10)
+if __name__ == "__main__":
+    df = strategy_KeltnerChannel_origin(df, n=10)
 
 def strategy_BollingerBands(df, **kwargs):
     n = kwargs.get("n", 10)
     n_rng = kwargs.get("n_rng", 2)
     data = df.copy()
 
-    boll = ta.volatility.BollingerBands(data.Close, n, n_rng)
-
-    data["BOLL_LBAND_INDI"] = boll.bollinger_lband_indicator()
-    data["BOLL_UBAND_INDI"] = boll.bollinger_hband_indicator()
+    data["BOLL_LBAND_INDI"], data["BOLL_UBAND_INDI"] = ic.cache.indicator(
+        df, "bollinger_band_indicators", bollinger_band_indicators, n=n, n_rng=n_rng
+    )
 
     data["CLOSE_PREV"] = data.Close.shift(1)
 
@@ -108,12 +158,7 @@ def strategy_MA(df, **kwargs):
     ma_type = ma_type.strip().lower()
     data = df.copy()
 
-    if ma_type == "sma":
-        sma = ta.trend.SMAIndicator(data.Close, n)
-        data["MA"] = sma.sma_indicator().round(4)
-    elif ma_type == "ema":
-        ema = ta.trend.EMAIndicator(data.Close, n)
-        data["MA"] = ema.ema_indicator().round(4)
+    data["MA"] = ic.cache.indicator(df, "moving_average", moving_average, n=n, ma_type=ma_type)
 
     data["CLOSE_PREV"] = data.Close.shift(1)
 
@@ -139,9 +184,9 @@ def strategy_MACD(df, **kwargs):
     n_sign = kwargs.get("n_sign", 9)
     data = df.copy()
 
-    macd = ta.trend.MACD(data.Close, n_slow, n_fast, n_sign)
-
-    data["MACD_DIFF"] = macd.macd_diff().round(4)
+    data["MACD_DIFF"] = ic.cache.indicator(
+        df, "macd_diff", macd_diff, n_slow=n_slow, n_fast=n_fast, n_sign=n_sign
+    )
     data["MACD_DIFF_PREV"] = data.MACD_DIFF.shift(1)
 
     data["LONG"] = (data.MACD_DIFF > 0) & (data.MACD_DIFF_PREV <= 0)
@@ -164,9 +209,7 @@ def strategy_RSI(df, **kwargs):
     n = kwargs.get("n", 14)
     data = df.copy()
 
-    rsi = ta.momentum.RSIIndicator(data.Close, n)
-
-    data["RSI"] = rsi.rsi().round(4)
+    data["RSI"] = ic.cache.indicator(df, "rsi", rsi, n=n)
     data["RSI_PREV"] = data.RSI.shift(1)
 
     data["LONG"] = (data.RSI > 30) & (data.RSI_PREV <= 30)
@@ -189,9 +232,7 @@ def strategy_WR(df, **kwargs):
     n = kwargs.get("n", 14)
     data = df.copy()
 
-    wr = ta.momentum.WilliamsRIndicator(data.High, data.Low, data.Close, n)
-
-    data["WR"] = wr.wr().round(4)
+    data["WR"] = ic.cache.indicator(df, "williams_r", williams_r, n=n)
     data["WR_PREV"] = data.WR.shift(1)
 
     data["LONG"] = (data.WR > -80) & (data.WR_PREV <= -80)
@@ -215,10 +256,7 @@ def strategy_Stochastic_fast(df, **kwargs):
     d = kwargs.get("d", 5)
     data = df.copy()
 
-    sto = ta.momentum.StochasticOscillator(data.High, data.Low, data.Close, k, d)
-
-    data["K"] = sto.stoch().round(4)
-    data["D"] = sto.stoch_signal().round(4)
+    data["K"], data["D"] = ic.cache.indicator(df, "stochastic", stochastic, k=k, d=d)
     data["DIFF"] = data["K"] - data["D"]
     data["DIFF_PREV"] = data.DIFF.shift(1)
 
@@ -244,13 +282,8 @@ def strategy_Stochastic_slow(df, **kwargs):
     dd = kwargs.get("dd", 3)
     data = df.copy()
 
-    sto = ta.momentum.StochasticOscillator(data.High, data.Low, data.Close, k, d)
-
-    data["K"] = sto.stoch().round(4)
-    data["D"] = sto.stoch_signal().round(4)
-
-    ma = ta.trend.SMAIndicator(data.D, dd)
-    data["DD"] = ma.sma_indicator().round(4)
+    data["K"], data["D"] = ic.cache.indicator(df, "stochastic", stochastic, k=k, d=d)
+    data["DD"] = ic.cache.indicator(df, "stochastic_dd", stochastic_dd, k=k, d=d, dd=dd)
 
     data["DIFF"] = data["D"] - data["DD"]
     data["DIFF_PREV"] = data.DIFF.shift(1)
@@ -274,13 +307,10 @@ def strategy_Stochastic_slow(df, **kwargs):
 def strategy_Ichmoku(df, **kwargs):
     n_conv = kwargs.get("n_conv", 9)
     n_base = kwargs.get("n_base", 26)
-    n_span_b = kwargs.get("n_span_b", 26)
     data = df.copy()
 
-    ichmoku = ta.trend.IchimokuIndicator(data.High, data.Low, n_conv, n_base, n_span_b)
-
-    data["BASE"] = ichmoku.ichimoku_base_line().round(4)
-    data["CONV"] = ichmoku.ichimoku_conversion_line().round(4)
+    data["BASE"] = ic.cache.indicator(df, "ichimoku_base_line", ichimoku_base_line, n_base=n_base)
+    data["CONV"] = ic.cache.indicator(df, "ichimoku_conversion_line", ichimoku_conversion_line, n_conv=n_conv)
 
     data["DIFF"] = data["CONV"] - data["BASE"]
     data["DIFF_PREV"] = data.DIFF.shift(1)
@@ -299,11 +329,12 @@ def strategy_Ichmoku(df, **kwargs):
     return data
 
 # df = get_stock_backtest_data(ticker, start_date, end_date)
-# strategy_Ichmoku(df, n_conv=9, n_base=26, n_span_b=26)
+# strategy_Ichmoku(df, n_conv=9, n_base=26)
 
-bt_df = df[(df.index >= start_date) & (df.index <= end_date)]
+if __name__ == "__main__":
+    bt_df = df[(df.index >= start_date) & (df.index <= end_date)]
 
-def prepare_stock_ta_backtest_data(
+def _prepare_stock_ta_backtest_data(
     df, start_date, end_date, strategy, **strategy_params
 ):
     df_strategy = strategy(df, **strategy_params)
@@ -312,348 +343,171 @@ def prepare_stock_ta_backtest_data(
     ]
     return bt_df
 
-bt_df = prepare_stock_ta_backtest_data(
-    df, start_date, end_date, strategy_KeltnerChannel_origin, n=10
-)
-
-bt_df.head()
-
-balance = 1000000
-pnl = 0
-position = 0
-
-last_signal = "hold"
-last_price = 0
-c = 0
-
-trade_date_start = []
-trade_date_end = []
-trade_days = []
-trade_side = []
-trade_pnl = []
-trade_ret = []
-
-cum_value = []
-
-for index, row in bt_df.iterrows():
-    # check and close any positions
-    if row.EXIT_LONG and last_signal == "long":
-        trade_date_end.append(row.name)
-        trade_days.append(c)
-
-        pnl = (row.Open - last_price) * position
-        trade_pnl.append(pnl)
-        trade_ret.append((row.Open / last_price - 1) * 100)
-
-        balance = balance + row.Open * position
-
-        position = 0
-        last_signal = "hold"
-
-        c = 0
-
-    elif row.EXIT_SHORT and last_signal == "short":
-        trade_date_end.append(row.name)
-        trade_days.append(c)
-
-        pnl = (row.Open - last_price) * position
-        trade_pnl.append(pnl)
-        trade_ret.append((last_price / row.Open - 1) * 100)
-
-        balance = balance + pnl
-
-        position = 0
-        last_signal = "hold"
-
-        c = 0
-
-    # check signal and enter any possible position
-    if row.LONG and last_signal != "long":
-        last_signal = "long"
-        last_price = row.Open
-        trade_date_start.append(row.name)
-        trade_side.append("long")
-
-        position = int(balance / row.Open)
-        cost = position * row.Open
-        balance = balance - cost
-
-        c = 0
-
-    elif row.SHORT and last_signal != "short":
-        last_signal = "short"
-        last_price = row.Open
-        trade_date_start.append(row.name)
-        trade_side.append("short")
-
-        position = int(balance / row.Open) * -1
-
-        c = 0
-
-    # compute market value and count days for any possible poisition
-    if last_signal == "hold":
-        market_value = balance
-    elif last_signal == "long":
-        c = c + 1
-        market_value = position * row.Close + balance
-    else:
-        c = c + 1
-        market_value = (row.Close - last_price) * position + balance
-
-    cum_value.append(market_value)
-
-cum_ret_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["CUM_RET"])
-cum_ret_df["CUM_RET"] = (cum_ret_df.CUM_RET / 1000000 - 1) * 100
-cum_ret_df["BUY_HOLD"] = (bt_df.Close / bt_df.Open.iloc[0] - 1) * 100
-cum_ret_df["ZERO"] = 0
-cum_ret_df.plot(figsize=(15, 5))
-
-print(cum_ret_df.iloc[[-1]].round(2))
-
-size = min(len(trade_date_start), len(trade_date_end))
-
-tarde_dict = {
-    "START": trade_date_start[:size],
-    "END": trade_date_end[:size],
-    "SIDE": trade_side[:size],
-    "DAYS": trade_days[:size],
-    "PNL": trade_pnl[:size],
-    "RET": trade_ret[:size],
-}
-
-trade_df = pd.DataFrame(tarde_dict)
-print(trade_df.head())
-
-num_trades = trade_df.groupby("SIDE").count()[["START"]]
-num_trades_win = trade_df[trade_df.PNL > 0].groupby("SIDE").count()[["START"]]
-
-avg_days = trade_df.groupby("SIDE").mean()[["DAYS"]]
-
-avg_ret = trade_df.groupby("SIDE").mean()[["RET"]]
-avg_ret_win = trade_df[trade_df.PNL > 0].groupby("SIDE").mean()[["RET"]]
-avg_ret_loss = trade_df[trade_df.PNL < 0].groupby("SIDE").mean()[["RET"]]
-
-std_ret = trade_df.groupby("SIDE").std()[["RET"]]
-
-detail_df = pd.concat(
-    [num_trades, num_trades_win, avg_days, avg_ret, avg_ret_win, avg_ret_loss, std_ret],
-    axis=1,
-    sort=False,
-)
-
-detail_df.columns = [
-    "NUM_TRADES",
-    "NUM_TRADES_WIN",
-    "AVG_DAYS",
-    "AVG_RET",
-    "AVG_RET_WIN",
-    "AVG_RET_LOSS",
-    "STD_RET",
-]
-print(detail_df.round(2))
-
-# Stop Loss
-
-balance = 1000000
-pnl = 0
-position = 0
-
-stop_loss_lvl = -2
-
-last_signal = "hold"
-last_price = 0
-c = 0
-
-trade_date_start = []
-trade_date_end = []
-trade_days = []
-trade_side = []
-trade_pnl = []
-trade_ret = []
-
-cum_value = []
-
-for index, row in bt_df.iterrows():
-    # check and close any positions
-    if row.EXIT_LONG and last_signal == "long":
-        trade_date_end.append(row.name)
-        trade_days.append(c)
-
-        pnl = (row.Open - last_price) * position
-        trade_pnl.append(pnl)
-        trade_ret.append((row.Open / last_price - 1) * 100)
-
-        balance = balance + row.Open * position
-
-        position = 0
-        last_signal = "hold"
-
-        c = 0
-
-    elif row.EXIT_SHORT and last_signal == "short":
-        trade_date_end.append(row.name)
-        trade_days.append(c)
-
-        pnl = (row.Open - last_price) * position
-        trade_pnl.append(pnl)
-        trade_ret.append((last_price / row.Open - 1) * 100)
-
-        balance = balance + pnl
-
-        position = 0
-        last_signal = "hold"
-
-        c = 0
-
-    # check signal and enter any possible position
-    if row.LONG and last_signal != "long":
-        last_signal = "long"
-        last_price = row.Open
-        trade_date_start.append(row.name)
-        trade_side.append("long")
+def prepare_stock_ta_backtest_data(
+    df, start_date, end_date, strategy, **strategy_params
+):
+    # the signals only depend on the strategy params, so they are computed once and
+    # reused for every stop-loss level
+    key = (
+        ic.frame_key(df),
+        strategy.__name__,
+        str(start_date),
+        str(end_date),
+        tuple(sorted(strategy_params.items())),
+    )
+    return ic.cache.get(
+        key, _prepare_stock_ta_backtest_data, df, start_date, end_date, strategy, **strategy_params
+    )
 
-        position = int(balance / row.Open)
-        cost = position * row.Open
-        balance = balance - cost
+if __name__ == "__main__":
+    bt_df = prepare_stock_ta_backtest_data(
+        df, start_date, end_date, strategy_KeltnerChannel_origin, n=10
+    )
 
-        c = 0
+    bt_df.head()
 
-    elif row.SHORT and last_signal != "short":
-        last_signal = "short"
-        last_price = row.Open
-        trade_date_start.append(row.name)
-        trade_side.append("short")
+    balance = 1000000
+    pnl = 0
+    position = 0
 
-        position = int(balance / row.Open) * -1
+    last_signal = "hold"
+    last_price = 0
+    c = 0
 
-        c = 0
+    trade_date_start = []
+    trade_date_end = []
+    trade_days = []
+    trade_side = []
+    trade_pnl = []
+    trade_ret = []
 
-    # check stop loss
-    if (
-        last_signal == "long"
-        and c > 0
-        and (row.Low / last_price - 1) * 100 <= stop_loss_lvl
-    ):
-        c = c + 1
+    cum_value = []
 
-        trade_date_end.append(row.name)
-        trade_days.append(c)
+    for index, row in bt_df.iterrows():
+        # check and close any positions
+        if row.EXIT_LONG and last_signal == "long":
+            trade_date_end.append(row.name)
+            trade_days.append(c)
 
-        stop_loss_price = last_price + round(last_price * (stop_loss_lvl / 100), 4)
+            pnl = (row.Open - last_price) * position
+            trade_pnl.append(pnl)
+            trade_ret.append((row.Open / last_price - 1) * 100)
 
-        pnl = (stop_loss_price - last_price) * position
-        trade_pnl.append(pnl)
-        trade_ret.append((stop_loss_price / last_price - 1) * 100)
+            balance = balance + row.Open * position
 
-        balance = balance + stop_loss_price * position
+            position = 0
+            last_signal = "hold"
 
-        position = 0
-        last_signal = "hold"
+            c = 0
 
-        c = 0
+        elif row.EXIT_SHORT and last_signal == "short":
+            trade_date_end.append(row.name)
+            trade_days.append(c)
 
-    elif (
-        last_signal == "short"
-        and c > 0
-        and (last_price / row.High - 1) * 100 <= stop_loss_lvl
-    ):
-        c = c + 1
+            pnl = (row.Open - last_price) * position
+            trade_pnl.append(pnl)
+            trade_ret.append((last_price / row.Open - 1) * 100)
 
-        trade_date_end.append(row.name)
-        trade_days.append(c)
+            balance = balance + pnl
 
-        stop_loss_price = last_price - round(last_price * (stop_loss_lvl / 100), 4)
+            position = 0
+            last_signal = "hold"
 
-        pnl = (stop_loss_price - last_price) * position
-        trade_pnl.append(pnl)
-        trade_ret.append((last_price / stop_loss_price - 1) * 100)
+            c = 0
 
-        balance = balance + pnl
+        # check signal and enter any possible position
+        if row.LONG and last_signal != "long":
+            last_signal = "long"
+            last_price = row.Open
+            trade_date_start.append(row.name)
+            trade_side.append("long")
 
-        position = 0
-        last_signal = "hold"
+            position = int(balance / row.Open)
+            cost = position * row.Open
+            balance = balance - cost
 
-        c = 0
+            c = 0
 
-    # compute market value and count days for any possible poisition
-    if last_signal == "hold":
-        market_value = balance
-    elif last_signal == "long":
-        c = c + 1
-        market_value = position * row.Close + balance
-    else:
-        c = c + 1
-        market_value = (row.Close - last_price) * position + balance
+        elif row.SHORT and last_signal != "short":
+            last_signal = "short"
+            last_price = row.Open
+            trade_date_start.append(row.name)
+            trade_side.append("short")
 
-    cum_value.append(market_value)
+            position = int(balance / row.Open) * -1
 
-cum_ret_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["CUM_RET"])
-cum_ret_df["CUM_RET"] = (cum_ret_df.CUM_RET / 1000000 - 1) * 100
-cum_ret_df["BUY_HOLD"] = (bt_df.Close / bt_df.Open.iloc[0] - 1) * 100
-cum_ret_df["ZERO"] = 0
-cum_ret_df.plot(figsize=(15, 5))
+            c = 0
 
-print(cum_ret_df.iloc[[-1]].round(2))
+        # compute market value and count days for any possible poisition
+        if last_signal == "hold":
+            market_value = balance
+        elif last_signal == "long":
+            c = c + 1
+            market_value = position * row.Close + balance
+        else:
+            c = c + 1
+            market_value = (row.Close - last_price) * position + balance
 
-size = min(len(trade_date_start), len(trade_date_end))
+        cum_value.append(market_value)
 
-tarde_dict = {
-    "START": trade_date_start[:size],
-    "END": trade_date_end[:size],
-    "SIDE": trade_side[:size],
-    "DAYS": trade_days[:size],
-    "PNL": trade_pnl[:size],
-    "RET": trade_ret[:size],
-}
+    cum_ret_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["CUM_RET"])
+    cum_ret_df["CUM_RET"] = (cum_ret_df.CUM_RET / 1000000 - 1) * 100
+    cum_ret_df["BUY_HOLD"] = (bt_df.Close / bt_df.Open.iloc[0] - 1) * 100
+    cum_ret_df["ZERO"] = 0
+    cum_ret_df.plot(figsize=(15, 5))
 
-trade_df = pd.DataFrame(tarde_dict)
-print(trade_df.head())
+    print(cum_ret_df.iloc[[-1]].round(2))
 
-num_trades = trade_df.groupby("SIDE").count()[["START"]]
-num_trades_win = trade_df[trade_df.PNL > 0].groupby("SIDE").count()[["START"]]
+    size = min(len(trade_date_start), len(trade_date_end))
 
-avg_days = trade_df.groupby("SIDE").mean()[["DAYS"]]
+    tarde_dict = {
+        "START": trade_date_start[:size],
+        "END": trade_date_end[:size],
+        "SIDE": trade_side[:size],
+        "DAYS": trade_days[:size],
+        "PNL": trade_pnl[:size],
+        "RET": trade_ret[:size],
+    }
 
-avg_ret = trade_df.groupby("SIDE").mean()[["RET"]]
-avg_ret_win = trade_df[trade_df.PNL > 0].groupby("SIDE").mean()[["RET"]]
-avg_ret_loss = trade_df[trade_df.PNL < 0].groupby("SIDE").mean()[["RET"]]
+    trade_df = pd.DataFrame(tarde_dict)
+    print(trade_df.head())
 
-std_ret = trade_df.groupby("SIDE").std()[["RET"]]
+    num_trades = trade_df.groupby("SIDE").count()[["START"]]
+    num_trades_win = trade_df[trade_df.PNL > 0].groupby("SIDE").count()[["START"]]
 
-detail_df = pd.concat(
-    [num_trades, num_trades_win, avg_days, avg_ret, avg_ret_win, avg_ret_loss, std_ret],
-    axis=1,
-    sort=False,
-)
+    avg_days = trade_df.groupby("SIDE").mean()[["DAYS"]]
 
-detail_df.columns = [
-    "NUM_TRADES",
-    "NUM_TRADES_WIN",
-    "AVG_DAYS",
-    "AVG_RET",
-    "AVG_RET_WIN",
-    "AVG_RET_LOSS",
-    "STD_RET",
-]
-print(detail_df.round(2))
+    avg_ret = trade_df.groupby("SIDE").mean()[["RET"]]
+    avg_ret_win = trade_df[trade_df.PNL > 0].groupby("SIDE").mean()[["RET"]]
+    avg_ret_loss = trade_df[trade_df.PNL < 0].groupby("SIDE").mean()[["RET"]]
 
-mv_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["MV"])
-print(mv_df.head())
+    std_ret = trade_df.groupby("SIDE").std()[["RET"]]
 
-days = len(mv_df)
+    detail_df = pd.concat(
+        [num_trades, num_trades_win, avg_days, avg_ret, avg_ret_win, avg_ret_loss, std_ret],
+        axis=1,
+        sort=False,
+    )
 
-roll_max = mv_df.MV.rolling(window=days, min_periods=1).max()
-drawdown_val = mv_df.MV - roll_max
-drawdown_pct = (mv_df.MV / roll_max - 1) * 100
+    detail_df.columns = [
+        "NUM_TRADES",
+        "NUM_TRADES_WIN",
+        "AVG_DAYS",
+        "AVG_RET",
+        "AVG_RET_WIN",
+        "AVG_RET_LOSS",
+        "STD_RET",
+    ]
+    print(detail_df.round(2))
 
-print("Max Drawdown Value:", round(drawdown_val.min(), 0))
-print("Max Drawdown %:", round(drawdown_pct.min(), 2))
+    # Stop Loss
 
-def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
     balance = 1000000
     pnl = 0
     position = 0
 
+    stop_loss_lvl = -2
+
     last_signal = "hold"
     last_price = 0
     c = 0
@@ -722,55 +576,52 @@ def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
 
             c = 0
 
-        if stop_loss_lvl:
-            # check stop loss
-            if (
-                last_signal == "long"
-                and (row.Low / last_price - 1) * 100 <= stop_loss_lvl
-            ):
-                c = c + 1
+        # check stop loss
+        if (
+            last_signal == "long"
+            and c > 0
+            and (row.Low / last_price - 1) * 100 <= stop_loss_lvl
+        ):
+            c = c + 1
 
-                trade_date_end.append(row.name)
-                trade_days.append(c)
+            trade_date_end.append(row.name)
+            trade_days.append(c)
 
-                stop_loss_price = last_price + round(
-                    last_price * (stop_loss_lvl / 100), 4
-                )
+            stop_loss_price = last_price + round(last_price * (stop_loss_lvl / 100), 4)
 
-                pnl = (stop_loss_price - last_price) * position
-                trade_pnl.append(pnl)
-                trade_ret.append((stop_loss_price / last_price - 1) * 100)
+            pnl = (stop_loss_price - last_price) * position
+            trade_pnl.append(pnl)
+            trade_ret.append((stop_loss_price / last_price - 1) * 100)
 
-                balance = balance + stop_loss_price * position
+            balance = balance + stop_loss_price * position
 
-                position = 0
-                last_signal = "hold"
+            position = 0
+            last_signal = "hold"
 
-                c = 0
+            c = 0
 
-            elif (
-                last_signal == "short"
-                and (last_price / row.Low - 1) * 100 <= stop_loss_lvl
-            ):
-                c = c + 1
+        elif (
+            last_signal == "short"
+            and c > 0
+            and (last_price / row.High - 1) * 100 <= stop_loss_lvl
+        ):
+            c = c + 1
 
-                trade_date_end.append(row.name)
-                trade_days.append(c)
+            trade_date_end.append(row.name)
+            trade_days.append(c)
 
-                stop_loss_price = last_price - round(
-                    last_price * (stop_loss_lvl / 100), 4
-                )
+            stop_loss_price = last_price - round(last_price * (stop_loss_lvl / 100), 4)
 
-                pnl = (stop_loss_price - last_price) * position
-                trade_pnl.append(pnl)
-                trade_ret.append((last_price / stop_loss_price - 1) * 100)
+            pnl = (stop_loss_price - last_price) * position
+            trade_pnl.append(pnl)
+            trade_ret.append((last_price / stop_loss_price - 1) * 100)
 
-                balance = balance + pnl
+            balance = balance + pnl
 
-                position = 0
-                last_signal = "hold"
+            position = 0
+            last_signal = "hold"
 
-                c = 0
+            c = 0
 
         # compute market value and count days for any possible poisition
         if last_signal == "hold":
@@ -784,14 +635,14 @@ def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
 
         cum_value.append(market_value)
 
-    # generate analysis
-    # performance over time
     cum_ret_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["CUM_RET"])
     cum_ret_df["CUM_RET"] = (cum_ret_df.CUM_RET / 1000000 - 1) * 100
     cum_ret_df["BUY_HOLD"] = (bt_df.Close / bt_df.Open.iloc[0] - 1) * 100
     cum_ret_df["ZERO"] = 0
+    cum_ret_df.plot(figsize=(15, 5))
+
+    print(cum_ret_df.iloc[[-1]].round(2))
 
-    # trade stats
     size = min(len(trade_date_start), len(trade_date_end))
 
     tarde_dict = {
@@ -804,6 +655,7 @@ def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
     }
 
     trade_df = pd.DataFrame(tarde_dict)
+    print(trade_df.head())
 
     num_trades = trade_df.groupby("SIDE").count()[["START"]]
     num_trades_win = trade_df[trade_df.PNL > 0].groupby("SIDE").count()[["START"]]
@@ -817,15 +669,7 @@ def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
     std_ret = trade_df.groupby("SIDE").std()[["RET"]]
 
     detail_df = pd.concat(
-        [
-            num_trades,
-            num_trades_win,
-            avg_days,
-            avg_ret,
-            avg_ret_win,
-            avg_ret_loss,
-            std_ret,
-        ],
+        [num_trades, num_trades_win, avg_days, avg_ret, avg_ret_win, avg_ret_loss, std_ret],
         axis=1,
         sort=False,
     )
@@ -839,11 +683,10 @@ def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
         "AVG_RET_LOSS",
         "STD_RET",
     ]
+    print(detail_df.round(2))
 
-    detail_df.round(2)
-
-    # max drawdown
     mv_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["MV"])
+    print(mv_df.head())
 
     days = len(mv_df)
 
@@ -851,229 +694,200 @@ def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
     drawdown_val = mv_df.MV - roll_max
     drawdown_pct = (mv_df.MV / roll_max - 1) * 100
 
-    # return all stats
-    return {
-        "cum_ret_df": cum_ret_df,
-        "max_drawdown": {
-            "value": round(drawdown_val.min(), 0),
-            "pct": round(drawdown_pct.min(), 2),
-        },
-        "trade_stats": detail_df,
-    }
+    print("Max Drawdown Value:", round(drawdown_val.min(), 0))
+    print("Max Drawdown %:", round(drawdown_pct.min(), 2))
 
-result = run_stock_ta_backtest(bt_df)
+def run_stock_ta_backtest(bt_df, stop_loss_lvl=None):
+    # positions, stop-loss exits and the trade ledger are computed on arrays by
+    # backtest_engine; results are identical to the original iterrows loop
+    return be.run_backtest(bt_df, stop_loss_lvl=stop_loss_lvl)
+
+if __name__ == "__main__":
+    result = run_stock_ta_backtest(bt_df)
 
-result["cum_ret_df"].plot(figsize=(15, 5))
+    result["cum_ret_df"].plot(figsize=(15, 5))
 
-print("Max Drawdown:", result["max_drawdown"]["pct"], "%")
+    print("Max Drawdown:", result["max_drawdown"]["pct"], "%")
 
-result["trade_stats"]
+    result["trade_stats"]
 
-ticker = ticker
-start_date = start_date
-end_date = end_date
+    ticker = ticker
+    start_date = start_date
+    end_date = end_date
 
-df = get_stock_backtest_data(ticker, start_date, end_date)
+    df = get_stock_backtest_data(ticker, start_date, end_date)
 
-bt_df = prepare_stock_ta_backtest_data(
-    df, start_date, end_date, strategy_KeltnerChannel_origin, n=10
-)
+    bt_df = prepare_stock_ta_backtest_data(
+        df, start_date, end_date, strategy_KeltnerChannel_origin, n=10
+    )
 
-result = run_stock_ta_backtest(bt_df)
+    result = run_stock_ta_backtest(bt_df)
 
-result["cum_ret_df"].plot(figsize=(15, 5))
-print("Max Drawdown:", result["max_drawdown"]["pct"], "%")
-result["trade_stats"]
+    result["cum_ret_df"].plot(figsize=(15, 5))
+    print("Max Drawdown:", result["max_drawdown"]["pct"], "%")
+    result["trade_stats"]
 
-ticker = ticker
-start_date = start_date
-end_date = end_date
+    ticker = ticker
+    start_date = start_date
+    end_date = end_date
 
-df = get_stock_backtest_data(ticker, start_date, end_date)
+    df = get_stock_backtest_data(ticker, start_date, end_date)
 
-n_list = [i for i in range(10, 30, 5)]
-stop_loss_lvl = [-i for i in range(2, 5, 1)]
-stop_loss_lvl.append(None)
+    n_list = [i for i in range(10, 30, 5)]
+    stop_loss_lvl = [-i for i in range(2, 5, 1)]
+    stop_loss_lvl.append(None)
 
-result_dict = {"n": [], "l": [], "return": [], "max_drawdown": []}
+    result_dict = {"n": [], "l": [], "return": [], "max_drawdown": []}
 
-for n in n_list:
-    for l in stop_loss_lvl:
+    for n in n_list:
         bt_df = prepare_stock_ta_backtest_data(
             df, start_date, end_date, strategy_KeltnerChannel_origin, n=n
         )
 
-        result = run_stock_ta_backtest(bt_df, stop_loss_lvl=l)
+        for l in stop_loss_lvl:
+            result = be.backtest_summary(bt_df, stop_loss_lvl=l)
 
-        result_dict["n"].append(n)
-        result_dict["l"].append(l)
-        result_dict["return"].append(result["cum_ret_df"].iloc[-1, 0])
-        result_dict["max_drawdown"].append(result["max_drawdown"]["pct"])
+            result_dict["n"].append(n)
+            result_dict["l"].append(l)
+            result_dict["return"].append(result["return"])
+            result_dict["max_drawdown"].append(result["max_drawdown"])
 
-df = pd.DataFrame(result_dict)
-print(df.sort_values("return", ascending=False))
+    df = pd.DataFrame(result_dict)
+    print(df.sort_values("return", ascending=False))
 
-from itertools import product
+    from itertools import product
 
-a = [5, 10]
-b = [1, 3]
-c = [2, 4]
+    a = [5, 10]
+    b = [1, 3]
+    c = [2, 4]
 
-list(product(a, b, c))
-param_list = [a, b, c]
+    list(product(a, b, c))
+    param_list = [a, b, c]
 
-list(product(*param_list))
+    list(product(*param_list))
 
-def test_func(**kwargs):
-    a = kwargs.get("a", 10)
-    b = kwargs.get("b", 2)
-    c = kwargs.get("c", 2)
+    def test_func(**kwargs):
+        a = kwargs.get("a", 10)
+        b = kwargs.get("b", 2)
+        c = kwargs.get("c", 2)
 
-    print(a, b, c)
+        print(a, b, c)
 
-test_func(a=1, b=2, c=3)
+    test_func(a=1, b=2, c=3)
 
-param_dict = {"a": 1, "b": 2, "c": 3}
+    param_dict = {"a": 1, "b": 2, "c": 3}
 
-test_func(**param_dict)
+    test_func(**param_dict)
 
-param_name = ["a", "b", "c"]
-param = [1, 2, 3]
+    param_name = ["a", "b", "c"]
+    param = [1, 2, 3]
 
-dict(zip(param_name, param))
-dict(zip(["a", "b", "c"], [1, 2, 3]))
+    dict(zip(param_name, param))
+    dict(zip(["a", "b", "c"], [1, 2, 3]))
 
-a = [5, 10]
-b = [1, 3]
-c = [2, 4]
+    a = [5, 10]
+    b = [1, 3]
+    c = [2, 4]
 
-param_list = [a, b, c]
-param_name = ["a", "b", "c"]
-param_dict_list = [dict(zip(param_name, param)) for param in list(product(*param_list))]
-param_dict_list
+    param_list = [a, b, c]
+    param_name = ["a", "b", "c"]
+    param_dict_list = [dict(zip(param_name, param)) for param in list(product(*param_list))]
+    param_dict_list
 
-strategies = [
-    {
-        "func": strategy_KeltnerChannel_origin,
-        "param": {"n": [i for i in range(10, 35, 5)]},
-    },
-    {
-        "func": strategy_BollingerBands,
-        "param": {"n": [i for i in range(10, 35, 5)], "n_rng": [1, 2]},
-    },
-    {
-        "func": strategy_MA,
-        "param": {"n": [i for i in range(10, 110, 10)], "ma_type": ["sma", "ema"]},
-    },
-    {
-        "func": strategy_MACD,
-        "param": {
-            "n_slow": [i for i in range(10, 16)],
-            "n_fast": [i for i in range(20, 26)],
-            "n_sign": [i for i in range(5, 11)],
+    strategies = [
+        {
+            "func": strategy_KeltnerChannel_origin,
+            "param": {"n": [i for i in range(10, 35, 5)]},
         },
-    },
-    {"func": strategy_RSI, "param": {"n": [i for i in range(5, 21)]}},
-    {"func": strategy_WR, "param": {"n": [i for i in range(5, 21)]}},
-    {
-        "func": strategy_Stochastic_fast,
-        "param": {"k": [i for i in range(15, 26)], "d": [i for i in range(5, 11)]},
-    },
-    {
-        "func": strategy_Stochastic_slow,
-        "param": {
-            "k": [i for i in range(15, 26)],
-            "d": [i for i in range(5, 11)],
-            "dd": [i for i in range(1, 6)],
+        {
+            "func": strategy_BollingerBands,
+            "param": {"n": [i for i in range(10, 35, 5)], "n_rng": [1, 2]},
         },
-    },
-    {
-        "func": strategy_Ichmoku,
-        "param": {
-            "n_conv": [i for i in range(5, 16)],
-            "n_base": [i for i in range(20, 36)],
-            "n_span_b": [26],
+        {
+            "func": strategy_MA,
+            "param": {"n": [i for i in range(10, 110, 10)], "ma_type": ["sma", "ema"]},
+        },
+        {
+            "func": strategy_MACD,
+            "param": {
+                "n_slow": [i for i in range(10, 16)],
+                "n_fast": [i for i in range(20, 26)],
+                "n_sign": [i for i in range(5, 11)],
+            },
+        },
+        {"func": strategy_RSI, "param": {"n": [i for i in range(5, 21)]}},
+        {"func": strategy_WR, "param": {"n": [i for i in range(5, 21)]}},
+        {
+            "func": strategy_Stochastic_fast,
+            "param": {"k": [i for i in range(15, 26)], "d": [i for i in range(5, 11)]},
+        },
+        {
+            "func": strategy_Stochastic_slow,
+            "param": {
+                "k": [i for i in range(15, 26)],
+                "d": [i for i in range(5, 11)],
+                "dd": [i for i in range(1, 6)],
+            },
+        },
+        {
+            "func": strategy_Ichmoku,
+            "param": {
+                "n_conv": [i for i in range(5, 16)],
+                "n_base": [i for i in range(20, 36)],
+            },
         },
-    },
-]
-
-for s in strategies:
-    func = s["func"]
-    param = s["param"]
-
-    param_name = []
-    param_list = []
-
-    for k in param:
-        param_name.append(k)
-        param_list.append(param[k])
-
-    param_dict_list = [
-        dict(zip(param_name, param)) for param in list(product(*param_list))
     ]
 
-    print(len(param_dict_list))
-
-ticker = ticker
-start_date = start_date
-end_date = end_date
+    for s in strategies:
+        func = s["func"]
+        param = s["param"]
 
-df = get_stock_backtest_data(ticker, start_date, end_date)
+        param_name = []
+        param_list = []
 
-stop_loss_lvl = [-i for i in range(2, 6, 1)]
-stop_loss_lvl.append(None)
+        for k in param:
+            param_name.append(k)
+            param_list.append(param[k])
 
-result_dict = {
-    "strategy": [],
-    "param": [],
-    "stoploss": [],
-    "return": [],
-    "max_drawdown": [],
-}
+        param_dict_list = [
+            dict(zip(param_name, param)) for param in list(product(*param_list))
+        ]
 
-for s in strategies:
-    func = s["func"]
-    param = s["param"]
+        print(len(param_dict_list))
 
-    strategy_name = str(func).split(" ")[1]
+    ticker = ticker
+    start_date = start_date
+    end_date = end_date
 
-    param_name = []
-    param_list = []
+    df = get_stock_backtest_data(ticker, start_date, end_date)
 
-    for k in param:
-        param_name.append(k)
-        param_list.append(param[k])
+    stop_loss_lvl = [-i for i in range(2, 6, 1)]
+    stop_loss_lvl.append(None)
 
-    param_dict_list = [
-        dict(zip(param_name, param)) for param in list(product(*param_list))
+    # runs every (strategy, param_dict) on all CPU cores, appending each result to the
+    # checkpoint file as it completes; re-running the cell resumes an interrupted sweep
+    df = gs.run_grid_search(
+        df,
+        strategies,
+        start_date,
+        end_date,
+        stop_loss_lvl,
+        checkpoint=f"{ticker}_{start_date}_{end_date}_backtest.csv",
+    )
+    print(df.sort_values("return", ascending=True).head(50))
+    print(df.sort_values("return", ascending=False).head(50))
+    # Batch mode: the same grid over a whole universe, one pass per parameter set on
+    # (date x ticker) panels instead of one process per ticker
+    import batch_backtest as bb
+    import tickers as ti
+
+    universe = ti.tickers_from_csv("s&p500_tickers.csv")
+    start_date_buffer = (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=365)).strftime("%Y-%m-%d")
+    panel = bb.load_panel(universe, start_date_buffer, end_date)
+
+    batch_strategies = [
+        {"func": getattr(bb, s["func"].__name__), "param": s["param"]} for s in strategies
     ]
-    total_param_dict = len(param_dict_list)
-
-    c = 0
-
-    for param_dict in param_dict_list:
-        clear_output()
-        c = c + 1
-        print(
-            "Running backtest for {} - ({}/{})".format(
-                strategy_name, c, total_param_dict
-            )
-        )
-
-        for l in stop_loss_lvl:
-            bt_df = prepare_stock_ta_backtest_data(
-                df, start_date, end_date, func, **param_dict
-            )
-
-            result = run_stock_ta_backtest(bt_df, stop_loss_lvl=l)
-
-            result_dict["strategy"].append(strategy_name)
-            result_dict["param"].append(str(param_dict))
-            result_dict["stoploss"].append(l)
-            result_dict["return"].append(result["cum_ret_df"].iloc[-1, 0])
-            result_dict["max_drawdown"].append(result["max_drawdown"]["pct"])
-
-df = pd.DataFrame(result_dict)
-df.to_csv(f"{ticker}_{start_date}_{end_date}_backtest.csv")
-print(df.sort_values("return", ascending=True).head(50))
-print(df.sort_values("return", ascending=False).head(50))
\ No newline at end of file
+    batch_df = bb.run_batch_backtest(panel, batch_strategies, start_date, end_date, stop_loss_lvl)
+    batch_df.to_csv(f"sp500_{start_date}_{end_date}_batch_backtest.csv", index=False)
+    print(batch_df.head(50))
@@ -1,9 +1,14 @@
+import os
+import sys
 import numpy as np
-import numpy_financial as npf
 import pandas as pd
 import matplotlib.pyplot as plt
 from pylab import rcParams
 
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import dividend_discount as dd
+
 # Set the plot size
 rcParams["figure.figsize"] = [15, 10]
 
@@ -71,11 +76,7 @@ value_df["dividends"] = payout_ratio * value_df["earnings"]
 value_df["year"] = [i for i in range(2021, 2031)]
 value_df.set_index("year", inplace=True)
 
-pv_dividends = 0
-pv_list = []
-for i in range(value_df.shape[0]):
-    pv_dividends += value_df["dividends"].iloc[i] / (1 + discount_rate) ** i
-    pv_list.append(value_df["dividends"].iloc[i] / (1 + discount_rate) ** i)
+pv_list = value_df["dividends"] / (1 + discount_rate) ** np.arange(value_df.shape[0])
 
 terminal_value = (
     value_df["dividends"].iloc[-1]
@@ -83,7 +84,7 @@ terminal_value = (
     / (discount_rate - terminal_growth)
 )
 
-valuations.append(pv_dividends + terminal_value / (1 + discount_rate) ** 10)
+valuations.append(dd.ddm_value(value_df["dividends"].to_numpy(), discount_rate, terminal_growth))
 
 value_df["all_payouts"] = value_df["dividends"]
 value_df.loc[2030, "all_payouts"] += terminal_value
@@ -111,7 +112,7 @@ plt.tight_layout()
 plt.show()
 
 # Calculate IRR - a.k.a. the discount rate implied by base case cashflows
-npf.irr(np.append(np.array(-3348), np.array(value_df["all_payouts"])))
+print(dd.irr(np.append(np.array(-3348), np.array(value_df["all_payouts"]))))
 ax = value_df[["all_payouts", "Present Values"]].plot(kind="bar", figsize=(9, 6))
 ax.set_ylabel("S&P 500 Expected Future Payouts")
 plt.tight_layout()
@@ -129,17 +130,7 @@ bad_df["dividends"] = payout_ratio * bad_df["earnings"]
 bad_df["year"] = [i for i in range(2021, 2031)]
 bad_df.set_index("year", inplace=True)
 
-pv_dividends = 0
-for i in range(bad_df.shape[0]):
-    pv_dividends += bad_df["dividends"].iloc[i] / (1 + discount_rate) ** i
-
-terminal_value = (
-    bad_df["dividends"].iloc[-1]
-    * (1 + terminal_growth)
-    / (discount_rate - terminal_growth)
-)
-
-valuations.append(pv_dividends + terminal_value / (1 + discount_rate) ** 10)
+valuations.append(dd.ddm_value(bad_df["dividends"].to_numpy(), discount_rate, terminal_growth))
 
 # Double dip
 eps_growth_2020 = (11.88 + 17.76 + 25 + 25) / (34.95 + 35.08 + 33.99 + 35.72) - 1
@@ -153,17 +144,7 @@ worst_df["dividends"] = payout_ratio * worst_df["earnings"]
 worst_df["year"] = [i for i in range(2021, 2031)]
 worst_df.set_index("year", inplace=True)
 
-pv_dividends = 0
-for i in range(worst_df.shape[0]):
-    pv_dividends += worst_df["dividends"].iloc[i] / (1 + discount_rate) ** i
-
-terminal_value = (
-    worst_df["dividends"].iloc[-1]
-    * (1 + terminal_growth)
-    / (discount_rate - terminal_growth)
-)
-
-valuations.append(pv_dividends + terminal_value / (1 + discount_rate) ** 10)
+valuations.append(dd.ddm_value(worst_df["dividends"].to_numpy(), discount_rate, terminal_growth))
 
 earnings_scenarios = pd.DataFrame()
 earnings_scenarios["actual"] = pd.concat(
@@ -212,32 +193,6 @@ ax = pd.DataFrame(
 ax.get_xaxis().set_visible(False)
 plt.show()
 
-# Value Function
-def get_value(tg, dr, eps_growth, eps_next):
-    terminal_growth = tg
-    discount_rate = dr
-    payout_ratio = 0.50
-
-    value_df = pd.DataFrame()
-    value_df["earnings"] = (np.array(eps_growth) + 1).cumprod() * eps_next
-    value_df["dividends"] = payout_ratio * value_df["earnings"]
-    value_df["year"] = [i for i in range(2021, 2031)]
-    value_df.set_index("year", inplace=True)
-
-    pv_dividends = 0
-    pv_list = []
-    for i in range(value_df.shape[0]):
-        pv_dividends += value_df["dividends"].iloc[i] / (1 + discount_rate) ** i
-        pv_list.append(value_df["dividends"].iloc[i] / (1 + discount_rate) ** i)
-
-    terminal_value = (
-        value_df["dividends"].iloc[-1]
-        * (1 + terminal_growth)
-        / (discount_rate - terminal_growth)
-    )
-
-    return pv_dividends + terminal_value / (1 + discount_rate) ** 10
-
 # Valuation range
 eps_growths = []
 eps_nexts = []
@@ -279,12 +234,8 @@ eps_nexts.append(eps_next)
 
 dr_range = np.arange(0.065, 0.09, 0.005)
 
-all_valuations = []
-for index, eps_growth in enumerate(eps_growths):
-    dr_valuations = []
-    for dr in dr_range:
-        dr_valuations.append(round(get_value(0.04, dr, eps_growth, eps_nexts[index])))
-    all_valuations.append(dr_valuations)
+# All scenarios and discount rates valued at once: (scenario x discount rate x terminal growth)
+all_valuations = np.round(dd.ddm_grid(eps_growths, eps_nexts, dr_range, [0.04])[:, :, 0])
 
 ax = pd.DataFrame(
     all_valuations,
@@ -304,4 +255,30 @@ print(
         index=["Double Dip", "Slower Recovery", "V-shaped"],
         columns=[round(i, 3) for i in dr_range],
     )
-)
\ No newline at end of file
+)
+
+# Dense sensitivity surfaces of the V-shaped case: fair value and the return implied by the
+# current price over a 100 x 100 (discount rate x terminal growth) grid, in one broadcasted pass
+dense_dr = np.linspace(0.06, 0.10, 100)
+dense_tg = np.linspace(0.01, 0.05, 100)
+v_dividends = dd.dividend_paths(eps_nexts[-1], eps_growths[-1])
+surface = dd.ddm_grid([eps_growths[-1]], [eps_nexts[-1]], dense_dr, dense_tg)[0]
+flows = dd.payouts(v_dividends, dense_dr[:, None], dense_tg[None, :])
+implied_return = dd.irr(np.concatenate([np.full(flows.shape[:-1] + (1,), -3446.0), flows], axis=-1))
+# the terminal value needs a discount rate above the terminal growth
+undefined = dense_dr[:, None] <= dense_tg[None, :]
+surface[undefined] = np.nan
+implied_return[undefined] = np.nan
+
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+contour = ax1.contourf(dense_tg, dense_dr, surface, levels=np.linspace(1000, 8000, 29), extend="both")
+ax1.contour(dense_tg, dense_dr, surface, levels=[3446], colors="red")
+fig.colorbar(contour, ax=ax1, label="S&P 500 Fair Price")
+ax1.set_xlabel("Terminal Growth")
+ax1.set_ylabel("Discount Rate")
+contour = ax2.contourf(dense_tg, dense_dr, implied_return, levels=20)
+fig.colorbar(contour, ax=ax2, label="Implied Return at 3446")
+ax2.set_xlabel("Terminal Growth")
+ax2.set_ylabel("Discount Rate")
+plt.tight_layout()
+plt.show()
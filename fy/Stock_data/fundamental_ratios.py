@@ -1,9 +1,14 @@
-import FundamentalAnalysis as fa
+import os
+import sys
 import pandas as pd
 from pandas_datareader import data as pdr
 import yfinance as yf
 from config import financial_model_prep
 
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import fundamentals as fd
+
 # Set the Yahoo Finance API key
 yf.pdr_override()
 api_key = financial_model_prep()
@@ -12,17 +17,22 @@ api_key = financial_model_prep()
 ticker_list = ['TMUSR', 'AAPL', 'MSFT', 'AMZN', 'FB', 'GOOGL', 'GOOG', 'INTC', 'NVDA', 'ADBE',
                'PYPL', 'CSCO', 'NFLX', 'PEP', 'TSLA']
 
-# Download financial indicators data and output as Excel files for each stock
+# Fetch the key metrics and financial ratios of all stocks concurrently, cached locally for a week
+store = fd.FundamentalsStore(source=fd.FundamentalsSource(api_key=api_key))
+key_metrics = store.statements(ticker_list, 'key_metrics')
+financial_ratios = store.statements(ticker_list, 'ratios')
+
+# Output the financial indicators data as Excel files for each stock (one column per year)
 for ticker in ticker_list:
-    # Get key metrics
-    key_metrics_annually = fa.key_metrics(ticker, api_key, period="annual")
+    if ticker not in key_metrics or ticker not in financial_ratios:
+        continue
     # Save key metrics data to an Excel file
+    key_metrics_annually = key_metrics[ticker].T
     with pd.ExcelWriter(f'{ticker}_key_metrics.xlsx') as writer:
         key_metrics_annually.to_excel(writer, ticker)
 
-    # Get financial ratios
-    financial_ratios_annually = fa.financial_ratios(ticker, api_key, period="annual")
     # Save financial ratios data to an Excel file
+    financial_ratios_annually = financial_ratios[ticker].T
     with pd.ExcelWriter(f'{ticker}_financial_ratios.xlsx') as writer:
         financial_ratios_annually.to_excel(writer, ticker)
 
@@ -7,6 +7,18 @@ import re
 import pandas as pd
 import csv
 import datetime
+import os
+import sys
+
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import bar_stream as bs
+
+# Stream settings: completed bars and ticks are stored under STORE_DIR, the raw messages are
+# recorded to RECORD_PATH (None to disable) and REPLAY_PATH replays a recording instead of connecting
+STORE_DIR = "tradingview_store"
+RECORD_PATH = "tradingview_stream.txt"
+REPLAY_PATH = None
 
 # Define function to filter relevant data from websocket messages
 def filter_raw_message(text):
@@ -72,45 +84,77 @@ def generate_csv(a):
         for xi in x:
             xi= re.split('\[|:|,|\]', xi)
             ind= int(xi[1])
-            ts= datetime.fromtimestamp(float(xi[4])).strftime("%Y/%m/%d, %H:%M:%S")
+            ts= datetime.datetime.fromtimestamp(float(xi[4])).strftime("%Y/%m/%d, %H:%M:%S")
             employee_writer.writerow([ind, ts, float(xi[5]), float(xi[6]), float(xi[7]), float(xi[8]), float(xi[9])])
 
-# Initialize the headers needed for the websocket connection
-headers = json.dumps({
-    'Origin': 'https://data.tradingview.com'
-})
-    
-# Then create a connection to the websocket
-ws = create_connection(
-    'wss://data.tradingview.com/socket.io/websocket',headers=headers)
-
-# Generate random session and chart session IDs
-session= generateSession()
-print("session generated {}".format(session))
-
-chart_session= generateChartSession()
-print("chart_session generated {}".format(chart_session))
-
-# Send various messages to establish the websocket connection and start streaming data
-sendMessage(ws, "set_auth_token", ["unauthorized_user_token"])
-sendMessage(ws, "chart_create_session", [chart_session, ""])
-sendMessage(ws, "quote_create_session", [session])
-sendMessage(ws,"quote_set_fields", [session,"ch","chp","current_session","description","local_description","language","exchange","fractional","is_tradable","lp","lp_time","minmov","minmove2","original_name","pricescale","pro_name","short_name","type","update_mode","volume","currency_code","rchp","rtc"])
-sendMessage(ws, "quote_add_symbols",[session, "NASDAQ:AAPL", {"flags":['force_permission']}])
-sendMessage(ws, "quote_fast_symbols", [session,"NASDAQ:AAPL"])
-sendMessage(ws, "resolve_symbol", [chart_session,"symbol_1","={\"symbol\":\"NASDAQ:AAPL\",\"adjustment\":\"splits\",\"session\":\"extended\"}"])
-sendMessage(ws, "create_series", [chart_session, "s1", "s1", "symbol_1", "1", 5000])
-
-# Printing all the results
-data = ""
-while True:
+# Define function to save the 1 minute bars of the store to CSV file (stores written before
+# bars were keyed by time may hold the same bar more than once: the last one is kept)
+def store_to_csv(store, path='data_file.csv'):
+    bars = store.read("bars_60")
+    if len(bars):
+        bars = bars.drop_duplicates("time", keep="last").sort_values("time")
+    with open(path, mode='w', newline='') as data_file:
+        writer = csv.writer(data_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(['index', 'date', 'open', 'high', 'low', 'close', 'volume'])
+        for ind, bar in enumerate(bars.itertuples(index=False)):
+            ts= datetime.datetime.fromtimestamp(bar.time).strftime("%Y/%m/%d, %H:%M:%S")
+            writer.writerow([ind, ts, bar.open, bar.high, bar.low, bar.close, bar.volume])
+
+# Bars are aggregated into 1 and 5 minute bars as the messages arrive and appended to the store in batches;
+# the history sent on every connection is only stored once and the bar still forming at exit is not stored
+store = bs.ColumnStore(STORE_DIR)
+pipeline = bs.StreamPipeline(store, intervals=(60, 300))
+
+if REPLAY_PATH is not None:
+    bs.replay(REPLAY_PATH, pipeline)
+else:
+    # Initialize the headers needed for the websocket connection
+    headers = json.dumps({
+        'Origin': 'https://data.tradingview.com'
+    })
+
+    # Then create a connection to the websocket
+    ws = create_connection(
+        'wss://data.tradingview.com/socket.io/websocket',headers=headers)
+
+    # Generate random session and chart session IDs
+    session= generateSession()
+    print("session generated {}".format(session))
+
+    chart_session= generateChartSession()
+    print("chart_session generated {}".format(chart_session))
+
+    # Send various messages to establish the websocket connection and start streaming data
+    sendMessage(ws, "set_auth_token", ["unauthorized_user_token"])
+    sendMessage(ws, "chart_create_session", [chart_session, ""])
+    sendMessage(ws, "quote_create_session", [session])
+    sendMessage(ws,"quote_set_fields", [session,"ch","chp","current_session","description","local_description","language","exchange","fractional","is_tradable","lp","lp_time","minmov","minmove2","original_name","pricescale","pro_name","short_name","type","update_mode","volume","currency_code","rchp","rtc"])
+    sendMessage(ws, "quote_add_symbols",[session, "NASDAQ:AAPL", {"flags":['force_permission']}])
+    sendMessage(ws, "quote_fast_symbols", [session,"NASDAQ:AAPL"])
+    sendMessage(ws, "resolve_symbol", [chart_session,"symbol_1","={\"symbol\":\"NASDAQ:AAPL\",\"adjustment\":\"splits\",\"session\":\"extended\"}"])
+    sendMessage(ws, "create_series", [chart_session, "s1", "s1", "symbol_1", "1", 5000])
+
+    # Process the messages as they arrive, echoing the heartbeats to keep the connection open
+    record = open(RECORD_PATH, "a") if RECORD_PATH else None
     try:
-        result = ws.recv()
-        data=data+result+"\n"
-        print(result)
-    except Exception as e:
-        print(e)
-        break
+        while True:
+            try:
+                result = ws.recv()
+            except Exception as e:
+                print(e)
+                break
+            if record:
+                record.write(result.replace("\n", " ") + "\n")
+            for heartbeat in pipeline.process(result):
+                sendRawMessage(ws, heartbeat)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.close()
+        if record:
+            record.close()
+
+print(pipeline.stats)
 
 # Generate the csv
-generate_csv(data)
\ No newline at end of file
+store_to_csv(store)
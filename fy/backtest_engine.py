@@ -0,0 +1,435 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+INITIAL_BALANCE = 1000000
+
+HOLD = 0
+LONG = 1
+SHORT = -1
+
+SIDE_NAMES = {LONG: "long", SHORT: "short"}
+
+
+def signal_array(col):
+    """
+    Signal column as a boolean array.
+    Mirrors the truthiness of `row.LONG` inside `iterrows`: the NaN left behind by
+    `shift(1)` counts as a signal.
+    """
+    return np.asarray(col).astype(bool)
+
+
+def simulate_trades(open_, high, low, close, long_, exit_long, short, exit_short,
+                    stop_loss_lvl=None, balance=INITIAL_BALANCE):
+    """
+    Signal Backtest Simulation.
+    Runs the long/short state machine of `run_stock_ta_backtest` on raw arrays. Positions
+    only change on bars carrying a signal, so the Python-level loop visits those bars alone;
+    stop-loss hits are located with array searches and the daily market value is filled in
+    with one vectorized pass. As in the original loop, the short stop-loss is tested
+    against the low, so `high` is accepted for a uniform OHLC signature only.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+
+    events = np.flatnonzero(long_ | exit_long | short | exit_short)
+    bounds = np.append(events, n).tolist()
+
+    # lowest/highest low between consecutive signals; the stop-loss tests are monotonic
+    # in the low, so a segment only needs a full search when its extreme would trigger
+    if stop_loss_lvl and len(events):
+        seg_min = np.minimum.reduceat(low, events).tolist()
+        seg_max = np.maximum.reduceat(low, events).tolist()
+
+    ev_open = open_[events].tolist()
+    ev_long = long_[events].tolist()
+    ev_exit_long = exit_long[events].tolist()
+    ev_short = short[events].tolist()
+    ev_exit_short = exit_short[events].tolist()
+
+    last_signal = HOLD
+    last_price = 0.0
+    position = 0
+    entry = 0
+
+    start_idx, side = [], []
+    end_idx, days, pnls, rets = [], [], [], []
+    changes = [(0, HOLD, 0, balance, 0.0)]
+
+    for k in range(len(events)):
+        i = bounds[k]
+        price = ev_open[k]
+
+        # check and close any positions
+        if ev_exit_long[k] and last_signal == LONG:
+            end_idx.append(i)
+            days.append(i - entry)
+            pnls.append((price - last_price) * position)
+            rets.append((price / last_price - 1) * 100)
+            balance = balance + price * position
+            position = 0
+            last_signal = HOLD
+        elif ev_exit_short[k] and last_signal == SHORT:
+            end_idx.append(i)
+            days.append(i - entry)
+            pnl = (price - last_price) * position
+            pnls.append(pnl)
+            rets.append((last_price / price - 1) * 100)
+            balance = balance + pnl
+            position = 0
+            last_signal = HOLD
+
+        # check signal and enter any possible position
+        if ev_long[k] and last_signal != LONG:
+            last_signal = LONG
+            last_price = price
+            start_idx.append(i)
+            side.append(LONG)
+            position = int(balance / price)
+            balance = balance - position * price
+            entry = i
+        elif ev_short[k] and last_signal != SHORT:
+            last_signal = SHORT
+            last_price = price
+            start_idx.append(i)
+            side.append(SHORT)
+            position = int(balance / price) * -1
+            entry = i
+
+        changes.append((i, last_signal, position, balance, last_price))
+
+        # check stop loss on every bar until the next signal
+        if not stop_loss_lvl or last_signal == HOLD:
+            continue
+        if last_signal == LONG:
+            if (seg_min[k] / last_price - 1) * 100 > stop_loss_lvl:
+                continue
+            hit = (low[i:bounds[k + 1]] / last_price - 1) * 100 <= stop_loss_lvl
+        else:
+            if (last_price / seg_max[k] - 1) * 100 > stop_loss_lvl:
+                continue
+            hit = (last_price / low[i:bounds[k + 1]] - 1) * 100 <= stop_loss_lvl
+
+        j = i + int(hit.argmax())
+        end_idx.append(j)
+        days.append(j - entry + 1)
+        if last_signal == LONG:
+            stop_price = last_price + round(last_price * (stop_loss_lvl / 100), 4)
+            pnls.append((stop_price - last_price) * position)
+            rets.append((stop_price / last_price - 1) * 100)
+            balance = balance + stop_price * position
+        else:
+            stop_price = last_price - round(last_price * (stop_loss_lvl / 100), 4)
+            pnl = (stop_price - last_price) * position
+            pnls.append(pnl)
+            rets.append((last_price / stop_price - 1) * 100)
+            balance = balance + pnl
+        position = 0
+        last_signal = HOLD
+        changes.append((j, HOLD, 0, balance, last_price))
+
+    # expand the state changes to one value per bar
+    rows, state, pos, bal, last = zip(*changes)
+    lengths = np.diff(np.append(rows, n))
+    state = np.repeat(np.asarray(state, dtype=np.int8), lengths)
+    pos = np.repeat(np.asarray(pos, dtype=float), lengths)
+    bal = np.repeat(np.asarray(bal, dtype=float), lengths)
+    last = np.repeat(np.asarray(last, dtype=float), lengths)
+
+    market_value = np.where(
+        state == HOLD,
+        bal,
+        np.where(state == LONG, pos * close + bal, (close - last) * pos + bal),
+    )
+
+    return {
+        "market_value": market_value,
+        "trade_start": np.asarray(start_idx, dtype=int),
+        "trade_side": np.asarray(side, dtype=np.int8),
+        "trade_end": np.asarray(end_idx, dtype=int),
+        "trade_days": np.asarray(days, dtype=int),
+        "trade_pnl": np.asarray(pnls, dtype=float),
+        "trade_ret": np.asarray(rets, dtype=float),
+    }
+
+
+def max_drawdown(market_value):
+    """
+    Maximum Drawdown.
+    Largest drop from the running peak of the market value, as value and percentage.
+    """
+    roll_max = np.maximum.accumulate(market_value)
+    drawdown_val = market_value - roll_max
+    drawdown_pct = (market_value / roll_max - 1) * 100
+    return {
+        "value": round(drawdown_val.min(), 0),
+        "pct": round(drawdown_pct.min(), 2),
+    }
+
+
+def trade_ledger(sim, index):
+    """
+    Trade Ledger.
+    One row per closed trade with start/end dates, side, holding days, PnL and return.
+    """
+    size = min(len(sim["trade_start"]), len(sim["trade_end"]))
+    return pd.DataFrame(
+        {
+            "START": index[sim["trade_start"][:size]],
+            "END": index[sim["trade_end"][:size]],
+            "SIDE": [SIDE_NAMES[s] for s in sim["trade_side"][:size]],
+            "DAYS": sim["trade_days"][:size].tolist(),
+            "PNL": sim["trade_pnl"][:size].tolist(),
+            "RET": sim["trade_ret"][:size].tolist(),
+        }
+    )
+
+
+def trade_stats(trade_df):
+    """
+    Trade Statistics.
+    Number of trades, winners, holding days and return statistics grouped by side.
+    """
+    num_trades = trade_df.groupby("SIDE").count()[["START"]]
+    num_trades_win = trade_df[trade_df.PNL > 0].groupby("SIDE").count()[["START"]]
+
+    avg_days = trade_df.groupby("SIDE")[["DAYS"]].mean()
+
+    avg_ret = trade_df.groupby("SIDE")[["RET"]].mean()
+    avg_ret_win = trade_df[trade_df.PNL > 0].groupby("SIDE")[["RET"]].mean()
+    avg_ret_loss = trade_df[trade_df.PNL < 0].groupby("SIDE")[["RET"]].mean()
+
+    std_ret = trade_df.groupby("SIDE")[["RET"]].std()
+
+    detail_df = pd.concat(
+        [num_trades, num_trades_win, avg_days, avg_ret, avg_ret_win, avg_ret_loss, std_ret],
+        axis=1,
+        sort=False,
+    )
+    detail_df.columns = [
+        "NUM_TRADES",
+        "NUM_TRADES_WIN",
+        "AVG_DAYS",
+        "AVG_RET",
+        "AVG_RET_WIN",
+        "AVG_RET_LOSS",
+        "STD_RET",
+    ]
+    return detail_df
+
+
+def _group_mean(values):
+    # pandas' groupby mean: Kahan-compensated sum over the group divided by its size
+    total = compensation = 0.0
+    for v in values:
+        y = v - compensation
+        t = total + y
+        compensation = t - total - y
+        total = t
+    return total / len(values) if len(values) else math.nan
+
+
+def _group_std(values):
+    # pandas' groupby std (ddof=1): Welford's running mean and sum of squared deviations
+    if len(values) < 2:
+        return math.nan
+    mean = m2 = 0.0
+    for k, v in enumerate(values, 1):
+        previous = mean
+        mean += (v - previous) / k
+        m2 += (v - mean) * (v - previous)
+    return math.sqrt(m2 / (len(values) - 1))
+
+
+def sim_trade_stats(sim):
+    """
+    Trade Statistics of a simulation.
+    `trade_stats(trade_ledger(sim, index))` computed from the trade arrays directly: the same
+    frame, value for value, without the ledger frame and the pandas groupbys.
+    """
+    size = min(len(sim["trade_start"]), len(sim["trade_end"]))
+    if size == 0:
+        return trade_stats(trade_ledger(sim, pd.RangeIndex(0)))
+    side = sim["trade_side"][:size]
+    days = sim["trade_days"][:size].astype(float)
+    pnl = sim["trade_pnl"][:size]
+    ret = sim["trade_ret"][:size]
+
+    sides = [s for s in sorted(SIDE_NAMES, key=SIDE_NAMES.get) if (side == s).any()]
+    rows = []
+    for s in sides:
+        m = side == s
+        win = pnl[m] > 0
+        rows.append((
+            int(m.sum()),
+            # a side without winners is missing from the winners' groupby, hence NaN
+            int(win.sum()) or math.nan,
+            _group_mean(days[m].tolist()),
+            _group_mean(ret[m].tolist()),
+            _group_mean(ret[m][win].tolist()),
+            _group_mean(ret[m][pnl[m] < 0].tolist()),
+            _group_std(ret[m].tolist()),
+        ))
+    columns = ["NUM_TRADES", "NUM_TRADES_WIN", "AVG_DAYS", "AVG_RET", "AVG_RET_WIN", "AVG_RET_LOSS", "STD_RET"]
+    return pd.DataFrame(rows, columns=columns, index=pd.Index([SIDE_NAMES[s] for s in sides], name="SIDE"))
+
+
+def simulate_frame(bt_df, stop_loss_lvl=None):
+    """
+    Simulate a strategy frame.
+    Runs `simulate_trades` on a frame holding OHLC prices and the LONG/EXIT_LONG/SHORT/EXIT_SHORT
+    columns produced by the `strategy_*` functions.
+    """
+    return simulate_trades(
+        bt_df.Open.to_numpy(),
+        bt_df.High.to_numpy(),
+        bt_df.Low.to_numpy(),
+        bt_df.Close.to_numpy(),
+        signal_array(bt_df.LONG),
+        signal_array(bt_df.EXIT_LONG),
+        signal_array(bt_df.SHORT),
+        signal_array(bt_df.EXIT_SHORT),
+        stop_loss_lvl=stop_loss_lvl,
+    )
+
+
+def backtest_summary(bt_df, stop_loss_lvl=None):
+    """
+    Backtest Summary.
+    Final cumulative return (%) and maximum drawdown without building the trade tables,
+    which is all a parameter sweep needs.
+    """
+    mv = simulate_frame(bt_df, stop_loss_lvl)["market_value"]
+    return {
+        "return": (mv[-1] / INITIAL_BALANCE - 1) * 100,
+        "max_drawdown": max_drawdown(mv)["pct"],
+    }
+
+
+def run_backtest(bt_df, stop_loss_lvl=None):
+    """
+    Run Backtest.
+    Drop-in replacement for `run_stock_ta_backtest`: returns the cumulative return frame,
+    the maximum drawdown and the per-side trade statistics.
+    """
+    sim = simulate_frame(bt_df, stop_loss_lvl)
+    mv = sim["market_value"]
+    close = bt_df.Close.to_numpy(dtype=float)
+
+    cum_ret_df = pd.DataFrame(
+        {
+            "CUM_RET": (mv / INITIAL_BALANCE - 1) * 100,
+            "BUY_HOLD": (close / bt_df.Open.iloc[0] - 1) * 100,
+            "ZERO": np.zeros(len(mv), dtype=np.int64),
+        },
+        index=bt_df.index,
+    )
+
+    return {
+        "cum_ret_df": cum_ret_df,
+        "max_drawdown": max_drawdown(mv),
+        "trade_stats": sim_trade_stats(sim),
+    }
+
+
+def simulate_panel(open_, high, low, close, long_, exit_long, short, exit_short,
+                   stop_loss_lvl=None, balance=INITIAL_BALANCE):
+    """
+    Panel Backtest Simulation.
+    The `simulate_trades` state machine for a (date x ticker) panel: one pass over the dates,
+    each step updating every ticker's position with array operations. Returns the market
+    value panel and the number of closed and winning trades per ticker; every column matches
+    a `simulate_trades` run on that ticker alone.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    T, N = close.shape
+
+    state = np.zeros(N, dtype=np.int8)
+    position = np.zeros(N)
+    bal = np.full(N, float(balance))
+    last = np.zeros(N)
+    num_trades = np.zeros(N, dtype=int)
+    num_wins = np.zeros(N, dtype=int)
+    market_value = np.empty((T, N))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for t in range(T):
+            o = open_[t]
+
+            # check and close any positions
+            m = exit_long[t] & (state == LONG)
+            if m.any():
+                num_wins[m] += (o[m] - last[m]) * position[m] > 0
+                bal[m] = bal[m] + o[m] * position[m]
+                position[m] = 0
+                state[m] = HOLD
+                num_trades[m] += 1
+            m = exit_short[t] & (state == SHORT)
+            if m.any():
+                pnl = (o[m] - last[m]) * position[m]
+                num_wins[m] += pnl > 0
+                bal[m] = bal[m] + pnl
+                position[m] = 0
+                state[m] = HOLD
+                num_trades[m] += 1
+
+            # check signal and enter any possible position
+            enter_long = long_[t] & (state != LONG)
+            enter_short = short[t] & (state != SHORT) & ~enter_long
+            if enter_long.any():
+                m = enter_long
+                state[m] = LONG
+                last[m] = o[m]
+                position[m] = np.trunc(bal[m] / o[m])
+                bal[m] = bal[m] - position[m] * o[m]
+            if enter_short.any():
+                m = enter_short
+                state[m] = SHORT
+                last[m] = o[m]
+                position[m] = np.trunc(bal[m] / o[m]) * -1
+
+            # check stop loss; hits are rare, so the stop price is computed per ticker
+            # with Python's round() exactly as in simulate_trades
+            if stop_loss_lvl:
+                hit_long = (state == LONG) & ((low[t] / last - 1) * 100 <= stop_loss_lvl)
+                hit_short = (state == SHORT) & ((last / low[t] - 1) * 100 <= stop_loss_lvl)
+                for j in np.flatnonzero(hit_long | hit_short):
+                    lp = float(last[j])
+                    if state[j] == LONG:
+                        stop_price = lp + round(lp * (stop_loss_lvl / 100), 4)
+                        pnl = (stop_price - lp) * position[j]
+                        bal[j] = bal[j] + stop_price * position[j]
+                    else:
+                        stop_price = lp - round(lp * (stop_loss_lvl / 100), 4)
+                        pnl = (stop_price - lp) * position[j]
+                        bal[j] = bal[j] + pnl
+                    num_wins[j] += pnl > 0
+                    num_trades[j] += 1
+                    position[j] = 0
+                    state[j] = HOLD
+
+            market_value[t] = np.where(
+                state == HOLD,
+                bal,
+                np.where(state == LONG, position * close[t] + bal, (close[t] - last) * position + bal),
+            )
+
+    return {
+        "market_value": market_value,
+        "num_trades": num_trades,
+        "num_wins": num_wins,
+    }
+
+
+def panel_max_drawdown(market_value):
+    """
+    Maximum drawdown (%) of every column of a market value panel.
+    """
+    roll_max = np.maximum.accumulate(market_value, axis=0)
+    return np.round(((market_value / roll_max - 1) * 100).min(axis=0), 2)
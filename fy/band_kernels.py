@@ -0,0 +1,143 @@
+import numpy as np
+import rolling_kernels as rk
+
+# Kernels for path-dependent indicators (Wilder smoothing, SuperTrend style trailing bands,
+# Parabolic SAR) whose value depends on the previous value, so they cannot be written as
+# rolling windows. Each one makes a single pass over the rows of a raw (date x ticker) array and
+# updates every ticker at once with NumPy, instead of indexing a DataFrame row by row. They
+# accept a Series, a DataFrame or a 1-D/2-D array and return the same type, like rolling_kernels.
+
+
+def _wilder_average(values, n):
+    rows, cols = values.shape
+    result = np.full(values.shape, np.nan)
+    complete = rk.complete_windows(values, n)
+    if not complete.any():
+        return result
+    seeded = complete.any(axis=0)
+    seed_row = np.where(seeded, complete.argmax(axis=0), rows)
+    seed = np.full(cols, np.nan)
+    seed[seeded] = np.mean(
+        values[seed_row[seeded, None] - np.arange(n)[::-1], np.flatnonzero(seeded)[:, None]], axis=1
+    )
+    average = np.full(cols, np.nan)
+    for i in range(seed_row.min(), rows):
+        x = values[i]
+        # a NaN value leaves the average where it was and gives no value for that row
+        update = (average * (n - 1) + x) / n
+        average = np.where(seed_row == i, seed, np.where(np.isnan(x), average, update))
+        result[i] = np.where(np.isnan(x), np.nan, average)
+    return result
+
+
+def wilder_average(data, n):
+    """
+    Wilder Smoothing.
+    Wilder's running average: the simple average of the first n values, then
+    average = (previous average * (n - 1) + value) / n. Each column starts at its own first
+    window of n values without a NaN.
+    """
+    return rk.wrap(_wilder_average(rk.as_2d(data), n), data)
+
+
+def _trailing_bands(upper, lower, close):
+    rows, cols = close.shape
+    final_upper = np.full(close.shape, np.nan)
+    final_lower = np.full(close.shape, np.nan)
+    direction = np.zeros(close.shape)
+    band_upper = np.full(cols, np.nan)
+    band_lower = np.full(cols, np.nan)
+    prev_close = np.full(cols, np.nan)
+    prev_direction = np.zeros(cols)
+    for i in range(rows):
+        # the upper band can only come down and the lower band only go up while the close stays
+        # inside them; comparisons with a missing previous band are False and restart it
+        band_upper = np.where(prev_close <= band_upper, np.minimum(upper[i], band_upper), upper[i])
+        band_lower = np.where(prev_close >= band_lower, np.maximum(lower[i], band_lower), lower[i])
+        c = close[i]
+        # in a downtrend (or with no trend yet) the line follows the upper band until the close
+        # goes above it, in an uptrend the lower band until the close goes below it
+        down = np.where(prev_direction == 1, c < band_lower, c <= band_upper)
+        new_direction = np.where(np.isnan(c), prev_direction, np.where(down, -1.0, 1.0))
+        new_direction = np.where(np.isnan(band_upper) | np.isnan(band_lower), 0.0, new_direction)
+        final_upper[i] = band_upper
+        final_lower[i] = band_lower
+        direction[i] = new_direction
+        prev_close = c
+        prev_direction = new_direction
+    line = np.where(direction == -1, final_upper, np.where(direction == 1, final_lower, np.nan))
+    return line, direction, final_upper, final_lower
+
+
+def trailing_bands(upper, lower, close):
+    """
+    Trailing Bands.
+    Turns basic upper and lower bands into the final bands of SuperTrend style indicators and the
+    trend line that switches between them: returns (line, direction, final_upper, final_lower),
+    direction being 1 in an uptrend (the line is the final lower band), -1 in a downtrend (the
+    final upper band) and 0 before the bands start.
+    """
+    line, direction, final_upper, final_lower = _trailing_bands(
+        rk.as_2d(upper), rk.as_2d(lower), rk.as_2d(close)
+    )
+    return tuple(rk.wrap(v, close) for v in (line, direction, final_upper, final_lower))
+
+
+def _parabolic_sar(high, low, acceleration, maximum):
+    rows, cols = high.shape
+    result = np.full(high.shape, np.nan)
+    valid = ~(np.isnan(high) | np.isnan(low))
+    started = np.zeros(cols, dtype=bool)
+    long = np.ones(cols, dtype=bool)
+    sar = np.full(cols, np.nan)
+    extreme = np.full(cols, np.nan)
+    af = np.full(cols, float(acceleration))
+    prev_high = np.full(cols, np.nan)
+    prev_low = np.full(cols, np.nan)
+    prev2_high = np.full(cols, np.nan)
+    prev2_low = np.full(cols, np.nan)
+    for i in range(rows):
+        h, l, ok = high[i], low[i], valid[i]
+        # the first bar after a valid one starts the SAR: short if the low fell by more than the
+        # high rose, long otherwise, at the previous bar's extreme
+        start = ok & ~started & ~np.isnan(prev_high)
+        start_long = ~((prev_low - l > h - prev_high) & (prev_low - l > 0))
+
+        moved = sar + af * (extreme - sar)
+        # the SAR never goes inside the range of the two previous bars
+        moved = np.where(long, np.fmin(moved, np.fmin(prev_low, prev2_low)),
+                         np.fmax(moved, np.fmax(prev_high, prev2_high)))
+        reverse = np.where(long, l < moved, h > moved)
+        new_extreme = np.where(long, h > extreme, l < extreme)
+        raised = np.where(new_extreme, np.minimum(af + acceleration, maximum), af)
+        trailed = np.where(long, np.fmax(extreme, h), np.fmin(extreme, l))
+        step = ok & started
+        # on a reversal the SAR jumps to the old extreme and the new trend starts from this bar
+        sar = np.where(step, np.where(reverse, extreme, moved), sar)
+        af = np.where(step, np.where(reverse, acceleration, raised), af)
+        extreme = np.where(step, np.where(reverse, np.where(long, l, h), trailed), extreme)
+        long = np.where(step, long ^ reverse, long)
+
+        sar = np.where(start, np.where(start_long, prev_low, prev_high), sar)
+        extreme = np.where(start, np.where(start_long, h, l), extreme)
+        af = np.where(start, float(acceleration), af)
+        long = np.where(start, start_long, long)
+        started |= start
+
+        result[i] = np.where(ok & started, sar, np.nan)
+        prev2_high = np.where(ok, prev_high, prev2_high)
+        prev2_low = np.where(ok, prev_low, prev2_low)
+        prev_high = np.where(ok, h, prev_high)
+        prev_low = np.where(ok, l, prev_low)
+    return result
+
+
+def parabolic_sar(high, low, acceleration=0.02, maximum=0.2):
+    """
+    Parabolic SAR.
+    Wilder's stop and reverse: a trailing stop that moves towards the extreme price of the trend
+    by an acceleration factor, raised by `acceleration` at every new extreme up to `maximum`, and
+    jumps to the other side of the price when it is hit. Rows with a missing high or low are NaN
+    and leave the state as it was.
+    """
+    return rk.wrap(_parabolic_sar(rk.as_2d(high), rk.as_2d(low), acceleration, maximum), high)
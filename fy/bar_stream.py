@@ -0,0 +1,377 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+TICK_COLUMNS = ["time", "price", "volume"]
+FRAME_HEADER = re.compile(r"~m~(\d+)~m~")
+# the start of a header cut off at the end of a message
+PARTIAL_HEADER = re.compile(r"~(m(~(\d+(~m?)?)?)?)?")
+
+
+class FrameParser:
+    """
+    Incremental ~m~ frame parser.
+    TradingView websocket messages carry one or more `~m~<length>~m~<payload>` frames. `feed`
+    takes the text received so far and returns the complete payloads; an incomplete frame
+    at the end is kept (only that frame, so memory is bounded by the largest frame) until
+    the rest arrives. Text that is not a frame is skipped and counted in `skipped`.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.skipped = 0
+
+    def feed(self, text):
+        self.buffer += text
+        payloads = []
+        pos = 0
+        while True:
+            # skip separators (recordings keep one websocket message per line)
+            while pos < len(self.buffer) and self.buffer[pos] in "\r\n":
+                pos += 1
+            header = FRAME_HEADER.match(self.buffer, pos)
+            if header is None:
+                if pos == len(self.buffer) or PARTIAL_HEADER.fullmatch(self.buffer, pos):
+                    # header not complete yet
+                    break
+                # not a frame: skip to the next header, keeping a header that may be cut off
+                self.skipped += 1
+                next_header = self.buffer.find("~m~", pos + 1)
+                if next_header == -1:
+                    keep = 2 if self.buffer.endswith("~m") else 1 if self.buffer.endswith("~") else 0
+                    pos = max(pos + 1, len(self.buffer) - keep)
+                    break
+                pos = next_header
+                continue
+            end = header.end() + int(header.group(1))
+            if end > len(self.buffer):
+                break
+            payloads.append(self.buffer[header.end():end])
+            pos = end
+        self.buffer = self.buffer[pos:]
+        return payloads
+
+
+def parse_payload(payload):
+    """
+    Kind and content of a frame payload: ("heartbeat", payload) for `~h~` keep-alives (which
+    must be echoed back), ("message", dict) for JSON messages and ("text", payload) for
+    anything else (e.g. the session info sent on connect).
+    """
+    if payload.startswith("~h~"):
+        return "heartbeat", payload
+    try:
+        return "message", json.loads(payload)
+    except ValueError:
+        return "text", payload
+
+
+def series_bars(message, series="s1"):
+    """
+    Bars of `series` in a timescale_update (history) or du (live update) message as
+    (time, open, high, low, close, volume) tuples, time in epoch seconds.
+    """
+    if not isinstance(message, dict) or message.get("m") not in ("timescale_update", "du"):
+        return []
+    bars = []
+    for part in message.get("p", [])[1:]:
+        if isinstance(part, dict) and isinstance(part.get(series), dict):
+            for bar in part[series].get("s", []):
+                bars.append(tuple(float(v) for v in bar["v"][:6]))
+    return bars
+
+
+def quote_ticks(message):
+    """
+    Last-price updates of a qsd (quote) message as (symbol, time, price, cumulative volume)
+    tuples; fields missing from the update are None.
+    """
+    if not isinstance(message, dict) or message.get("m") != "qsd":
+        return []
+    ticks = []
+    for part in message.get("p", [])[1:]:
+        if isinstance(part, dict) and isinstance(part.get("v"), dict) and "lp" in part["v"]:
+            values = part["v"]
+            ticks.append((part.get("n"), values.get("lp_time"), values["lp"], values.get("volume")))
+    return ticks
+
+
+class RingBuffer:
+    """
+    Bounded row buffer.
+    A preallocated (capacity x columns) float array; once full, new rows overwrite the
+    oldest and `dropped` counts them. `drain` returns the buffered rows in arrival order and
+    empties the buffer.
+    """
+
+    def __init__(self, capacity, columns):
+        self.columns = list(columns)
+        self.values = np.empty((capacity, len(self.columns)))
+        self.start = 0
+        self.size = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        capacity = len(self.values)
+        self.values[(self.start + self.size) % capacity] = row
+        if self.size == capacity:
+            self.start = (self.start + 1) % capacity
+            self.dropped += 1
+        else:
+            self.size += 1
+
+    def rows(self):
+        idx = (self.start + np.arange(self.size)) % len(self.values)
+        return self.values[idx]
+
+    def drain(self):
+        rows = self.rows()
+        self.start = 0
+        self.size = 0
+        return rows
+
+
+class BarAggregator:
+    """
+    On-the-fly bar aggregation.
+    Rolls source bars (which may be revised while forming: a bar with the same time replaces
+    the previous version) or trades into bars of `interval` seconds. `add_bar` and
+    `add_tick` return the bars completed by the update as (time, open, high, low, close,
+    volume) tuples; `current` is the bar still forming.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.bucket = None
+        self.bar = None
+        self.forming = None
+
+    def _merge(self, bar, o, h, l, c, v):
+        if bar is None:
+            return [self.bucket, o, h, l, c, v]
+        bar[2] = max(bar[2], h)
+        bar[3] = min(bar[3], l)
+        bar[4] = c
+        bar[5] += v
+        return bar
+
+    def _roll(self, time):
+        # start the bucket of `time`, returning the bar of the previous bucket if it ended
+        bucket = time - time % self.interval
+        completed = []
+        if self.bucket is not None and bucket != self.bucket:
+            if self.bar is not None:
+                completed.append(tuple(self.bar))
+            self.bar = None
+        self.bucket = bucket
+        return completed
+
+    def add_bar(self, time, o, h, l, c, v):
+        if self.forming is not None:
+            if time < self.forming[0]:
+                # already part of an earlier bar
+                return []
+            if time == self.forming[0]:
+                self.forming = (time, o, h, l, c, v)
+                return []
+            self.bar = self._merge(self.bar, *self.forming[1:])
+        completed = self._roll(time)
+        self.forming = (time, o, h, l, c, v)
+        return completed
+
+    def add_tick(self, time, price, volume=0.0):
+        completed = self._roll(time)
+        self.bar = self._merge(self.bar, price, price, price, price, volume)
+        return completed
+
+    def current(self):
+        bar = None if self.bar is None else list(self.bar)
+        if self.forming is not None:
+            bar = self._merge(bar, *self.forming[1:])
+        return None if bar is None else tuple(bar)
+
+    def flush(self):
+        """
+        End of stream: return the forming bar as completed and reset.
+        """
+        bar = self.current()
+        self.bucket = self.bar = self.forming = None
+        return [] if bar is None else [bar]
+
+
+class ColumnStore:
+    """
+    Append-only columnar store.
+    One directory per table under `root` with a raw float64 file per column and a
+    `meta.json` holding the columns and the committed row count. Batches are appended to the
+    column files before the row count is updated, so a write cut short is discarded (and
+    truncated away by the next append) instead of corrupting the table. Appends with a `key`
+    column keep the table ordered by it: rows whose key is not after the last one committed
+    or earlier in the batch (equal keys are kept with `unique=False`) are dropped, so
+    replaying a stream or receiving history that is already stored does not add it again.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, table, name):
+        return os.path.join(self.root, table, name)
+
+    def metadata(self, table):
+        path = self._path(table, "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _last_key(self, table, meta, key):
+        if "last_key" in meta:
+            return meta["last_key"]
+        if meta["rows"] == 0:
+            return None
+        # tables written before keys were tracked
+        with open(self._path(table, key + ".f8"), "rb") as f:
+            f.seek((meta["rows"] - 1) * 8)
+            return float(np.frombuffer(f.read(8), dtype=float)[0])
+
+    def append(self, table, columns, rows, key=None, unique=True):
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(columns))
+        if len(rows) == 0:
+            return
+        meta = self.metadata(table)
+        if meta is None:
+            os.makedirs(os.path.join(self.root, table), exist_ok=True)
+            meta = {"columns": list(columns), "rows": 0}
+        elif meta["columns"] != list(columns):
+            raise ValueError("Table {} has columns {}".format(table, meta["columns"]))
+        if key is not None:
+            # drop every row at or before the latest key already committed or earlier in the batch
+            last = self._last_key(table, meta, key)
+            keys = rows[:, list(columns).index(key)]
+            previous = np.maximum.accumulate(np.r_[-np.inf if last is None else last, keys])[:-1]
+            rows = rows[keys > previous] if unique else rows[keys >= previous]
+            if len(rows) == 0:
+                return
+            meta["last_key"] = float(rows[-1, list(columns).index(key)])
+        for k, column in enumerate(columns):
+            with open(self._path(table, column + ".f8"), "ab") as f:
+                f.truncate(meta["rows"] * 8)
+                f.write(np.ascontiguousarray(rows[:, k]).tobytes())
+        meta["rows"] += len(rows)
+        tmp = self._path(table, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(table, "meta.json"))
+
+    def read(self, table):
+        """
+        All committed rows of `table` as a DataFrame (empty if the table does not exist).
+        """
+        meta = self.metadata(table)
+        if meta is None:
+            return pd.DataFrame()
+        return pd.DataFrame({
+            column: np.fromfile(self._path(table, column + ".f8"), dtype=float, count=meta["rows"])
+            for column in meta["columns"]
+        })
+
+
+class StreamPipeline:
+    """
+    Streaming Bar Pipeline.
+    Feeds raw websocket messages through the frame parser, aggregates the bars of `series`
+    (and the last-price ticks of quote messages) into bars of every interval in `intervals`
+    (seconds) as they arrive, and buffers completed bars and ticks in ring buffers that are
+    appended to the ColumnStore `store` every `batch_size` rows (tables bars_<interval> and
+    ticks, keyed by time, so history received again on reconnect or replay is not stored
+    twice). Memory stays constant however long the stream runs. `process` returns the
+    heartbeat payloads to echo back.
+    """
+
+    def __init__(self, store, intervals=(60, 300), series="s1", batch_size=500, capacity=10000):
+        self.store = store
+        self.series = series
+        self.batch_size = batch_size
+        self.parser = FrameParser()
+        self.aggregators = {interval: BarAggregator(interval) for interval in intervals}
+        self.buffers = {"bars_{}".format(interval): RingBuffer(capacity, BAR_COLUMNS) for interval in intervals}
+        self.buffers["ticks"] = RingBuffer(capacity, TICK_COLUMNS)
+        self.last_volume = {}
+        self.stats = {"messages": 0, "frames": 0, "bars": 0, "ticks": 0, "heartbeats": 0, "flushed": 0}
+
+    def _push(self, table, row):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self._flush(table)
+
+    def _flush(self, table):
+        buffer = self.buffers[table]
+        if len(buffer):
+            rows = buffer.drain()
+            # several ticks can share a time, bars cannot
+            self.store.append(table, buffer.columns, rows, key="time", unique=table != "ticks")
+            self.stats["flushed"] += len(rows)
+
+    def process(self, text):
+        self.stats["messages"] += 1
+        heartbeats = []
+        for payload in self.parser.feed(text):
+            self.stats["frames"] += 1
+            kind, message = parse_payload(payload)
+            if kind == "heartbeat":
+                self.stats["heartbeats"] += 1
+                heartbeats.append(message)
+                continue
+            if kind != "message":
+                continue
+            for bar in series_bars(message, self.series):
+                self.stats["bars"] += 1
+                for interval, aggregator in self.aggregators.items():
+                    for completed in aggregator.add_bar(*bar):
+                        self._push("bars_{}".format(interval), completed)
+            for symbol, time, price, volume in quote_ticks(message):
+                if time is None:
+                    continue
+                self.stats["ticks"] += 1
+                # quotes carry the day's cumulative volume
+                size = 0.0
+                if volume is not None:
+                    size = max(volume - self.last_volume.get(symbol, volume), 0.0)
+                    self.last_volume[symbol] = volume
+                self._push("ticks", (time, price, size))
+        return heartbeats
+
+    def close(self, emit_forming=False):
+        """
+        Flush everything buffered. The bars still forming are only flushed with `emit_forming`
+        (at the end of a recorded session); otherwise they are left out of the store, which
+        would keep a half-formed bar and drop the complete one received next session.
+        """
+        if emit_forming:
+            for interval, aggregator in self.aggregators.items():
+                for completed in aggregator.flush():
+                    self._push("bars_{}".format(interval), completed)
+        for table in self.buffers:
+            self._flush(table)
+
+
+def replay(path, pipeline, emit_forming=True):
+    """
+    Replay Mode.
+    Feeds a recorded stream (one websocket message per line, as written by the ingestion
+    loop) through `pipeline` a line at a time and closes it. A recording is a whole session,
+    so the bars still forming at its end are emitted too unless `emit_forming` is False.
+    """
+    with open(path) as f:
+        for line in f:
+            pipeline.process(line)
+    pipeline.close(emit_forming=emit_forming)
+    return pipeline
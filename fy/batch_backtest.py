@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+import backtest_engine as be
+import price_store as ps
+from grid_search import param_grid
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def load_panel(tickers, start, end, store=None):
+    """
+    OHLCV Panel.
+    Loads all tickers from the local price store (fetching only what is missing) and returns
+    {field: DataFrame(date x ticker)}. Prices are forward filled after each ticker's first
+    quote; dates before it stay NaN.
+    """
+    store = store if store is not None else ps.PriceStore()
+    panel = store.get_prices(tickers, start, end, fields=FIELDS)
+    return {field: panel[field].ffill() for field in FIELDS}
+
+
+# Panel versions of the strategy_* functions in Stock_analysis/backest_all_indicators.py.
+# They reproduce the `ta` indicator formulas column-wise on (date x ticker) frames, so a
+# column of the output matches the single-ticker strategy on that ticker.
+
+def _signals(long_, exit_long):
+    # every strategy shorts on its exit-long condition and covers on its long condition;
+    # signals are acted on at the next bar's open
+    long_ = long_.shift(1, fill_value=False)
+    exit_long = exit_long.shift(1, fill_value=False)
+    return {"LONG": long_, "EXIT_LONG": exit_long, "SHORT": exit_long, "EXIT_SHORT": long_}
+
+
+def _zero_cross(diff):
+    prev = diff.shift(1)
+    return _signals((diff > 0) & (prev <= 0), (diff < 0) & (prev >= 0))
+
+
+def _threshold_cross(value, low, high):
+    prev = value.shift(1)
+    return _signals((value > low) & (prev <= low), (value < high) & (prev >= high))
+
+
+def strategy_KeltnerChannel_origin(panel, **kwargs):
+    n = kwargs.get("n", 10)
+    high, low, close = panel["High"], panel["Low"], panel["Close"]
+
+    ub = (((4 * high) - (2 * low) + close) / 3.0).rolling(n, min_periods=0).mean().round(4)
+    lb = (((-2 * high) + (4 * low) + close) / 3.0).rolling(n, min_periods=0).mean().round(4)
+    close_prev = close.shift(1)
+
+    return _signals(
+        (close <= lb) & (close_prev > lb),
+        (close >= ub) & (close_prev < ub),
+    )
+
+
+def strategy_BollingerBands(panel, **kwargs):
+    n = kwargs.get("n", 10)
+    n_rng = kwargs.get("n_rng", 2)
+    close = panel["Close"]
+
+    mavg = close.rolling(n).mean()
+    mstd = close.rolling(n).std(ddof=0)
+
+    return _signals(close < mavg - n_rng * mstd, close > mavg + n_rng * mstd)
+
+
+def strategy_MA(panel, **kwargs):
+    n = kwargs.get("n", 50)
+    ma_type = kwargs.get("ma_type", "sma").strip().lower()
+    close = panel["Close"]
+
+    if ma_type == "sma":
+        ma = close.rolling(n).mean().round(4)
+    elif ma_type == "ema":
+        ma = close.ewm(span=n, min_periods=n, adjust=False).mean().round(4)
+    close_prev = close.shift(1)
+
+    return _signals(
+        (close > ma) & (close_prev <= ma),
+        (close < ma) & (close_prev >= ma),
+    )
+
+
+def strategy_MACD(panel, **kwargs):
+    n_slow = kwargs.get("n_slow", 26)
+    n_fast = kwargs.get("n_fast", 12)
+    n_sign = kwargs.get("n_sign", 9)
+    close = panel["Close"]
+
+    # same argument order as ta.trend.MACD(close, n_slow, n_fast, n_sign)
+    ema_fast = close.ewm(span=n_fast, min_periods=n_fast, adjust=False).mean()
+    ema_slow = close.ewm(span=n_slow, min_periods=n_slow, adjust=False).mean()
+    macd = ema_fast - ema_slow
+    signal = macd.ewm(span=n_sign, min_periods=n_sign, adjust=False).mean()
+
+    return _zero_cross((macd - signal).round(4))
+
+
+def strategy_RSI(panel, **kwargs):
+    n = kwargs.get("n", 14)
+    diff = panel["Close"].diff(1)
+
+    up = diff.where(diff > 0, 0.0).ewm(alpha=1 / n, min_periods=n, adjust=False).mean()
+    down = (-diff.where(diff < 0, 0.0)).ewm(alpha=1 / n, min_periods=n, adjust=False).mean()
+    rsi = (100 - (100 / (1 + up / down))).mask(down == 0, 100).round(4)
+
+    return _threshold_cross(rsi, 30, 70)
+
+
+def strategy_WR(panel, **kwargs):
+    n = kwargs.get("n", 14)
+    high, low, close = panel["High"], panel["Low"], panel["Close"]
+
+    highest_high = high.rolling(n).max()
+    lowest_low = low.rolling(n).min()
+    wr = (-100 * (highest_high - close) / (highest_high - lowest_low)).round(4)
+
+    return _threshold_cross(wr, -80, -20)
+
+
+def _stochastic(panel, k, d):
+    high, low, close = panel["High"], panel["Low"], panel["Close"]
+    smin = low.rolling(k).min()
+    smax = high.rolling(k).max()
+    stoch_k = 100 * (close - smin) / (smax - smin)
+    return stoch_k.round(4), stoch_k.rolling(d).mean().round(4)
+
+
+def strategy_Stochastic_fast(panel, **kwargs):
+    k = kwargs.get("k", 20)
+    d = kwargs.get("d", 5)
+
+    stoch_k, stoch_d = _stochastic(panel, k, d)
+
+    return _zero_cross(stoch_k - stoch_d)
+
+
+def strategy_Stochastic_slow(panel, **kwargs):
+    k = kwargs.get("k", 20)
+    d = kwargs.get("d", 5)
+    dd = kwargs.get("dd", 3)
+
+    _, stoch_d = _stochastic(panel, k, d)
+    stoch_dd = stoch_d.rolling(dd).mean().round(4)
+
+    return _zero_cross(stoch_d - stoch_dd)
+
+
+def strategy_Ichmoku(panel, **kwargs):
+    n_conv = kwargs.get("n_conv", 9)
+    n_base = kwargs.get("n_base", 26)
+    high, low = panel["High"], panel["Low"]
+
+    base = (0.5 * (high.rolling(n_base).max() + low.rolling(n_base).min())).round(4)
+    conv = (0.5 * (high.rolling(n_conv).max() + low.rolling(n_conv).min())).round(4)
+
+    return _zero_cross(conv - base)
+
+
+def run_panel_backtest(panel, signals, start_date, end_date, stop_loss_lvl=None):
+    """
+    Panel Backtest.
+    Runs one set of panel signals over [start_date, end_date] and returns per-ticker return,
+    maximum drawdown, number of trades and win rate.
+    """
+    close = panel["Close"]
+    rows = (close.index >= start_date) & (close.index <= end_date)
+    # no trading before a ticker's first quote
+    quoted = panel["Open"][rows].notna().to_numpy()
+
+    sim = be.simulate_panel(
+        panel["Open"][rows].to_numpy(),
+        panel["High"][rows].to_numpy(),
+        panel["Low"][rows].to_numpy(),
+        close[rows].to_numpy(),
+        signals["LONG"][rows].to_numpy(dtype=bool) & quoted,
+        signals["EXIT_LONG"][rows].to_numpy(dtype=bool) & quoted,
+        signals["SHORT"][rows].to_numpy(dtype=bool) & quoted,
+        signals["EXIT_SHORT"][rows].to_numpy(dtype=bool) & quoted,
+        stop_loss_lvl=stop_loss_lvl,
+    )
+    # tickers without quotes yet are flat, so their market value is the cash balance
+    mv = np.where(quoted, sim["market_value"], be.INITIAL_BALANCE)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        win_rate = sim["num_wins"] / sim["num_trades"] * 100
+    return pd.DataFrame(
+        {
+            "ticker": close.columns,
+            "return": (mv[-1] / be.INITIAL_BALANCE - 1) * 100,
+            "max_drawdown": be.panel_max_drawdown(mv),
+            "num_trades": sim["num_trades"],
+            "win_rate": win_rate,
+        }
+    )
+
+
+def run_batch_backtest(panel, strategies, start_date, end_date, stop_loss_lvl=(None,)):
+    """
+    Multi-Ticker Batch Backtest.
+    Evaluates every strategy/parameter/stop-loss combination over all tickers of the panel,
+    computing each set of signals once as (date x ticker) frames. Returns a tidy frame with
+    one row per (strategy, param, stoploss, ticker), best return first and shallower drawdown
+    breaking ties.
+    """
+    results = []
+    for s in strategies:
+        func = s["func"]
+        for param_dict in param_grid(s["param"]):
+            signals = func(panel, **param_dict)
+            for l in stop_loss_lvl:
+                result = run_panel_backtest(panel, signals, start_date, end_date, stop_loss_lvl=l)
+                result.insert(0, "strategy", func.__name__)
+                result.insert(1, "param", str(param_dict))
+                result.insert(2, "stoploss", l)
+                results.append(result)
+
+    results = pd.concat(results, ignore_index=True)
+    return results.sort_values(["return", "max_drawdown"], ascending=False, ignore_index=True)
@@ -0,0 +1,302 @@
+# Compares the array-based backtest engine with the original iterrows loop of
+# Stock_analysis/backest_all_indicators.py on 10 years of synthetic daily bars.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import backtest_engine as be
+
+years = 10
+repeats = 3
+# the engine calls take milliseconds, so they get more runs to find their best time
+engine_repeats = 30
+stop_loss_lvl = [None, -2, -3, -4, -5]
+
+
+def make_bars(n, seed=42):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * np.exp(rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, n)))
+    index = pd.bdate_range("2010-01-01", periods=n)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close}, index=index)
+
+
+def strategy_MA(df, n=20):
+    data = df.copy()
+    data["MA"] = data.Close.rolling(n).mean().round(4)
+    data["CLOSE_PREV"] = data.Close.shift(1)
+
+    data["LONG"] = (data.Close > data.MA) & (data.CLOSE_PREV <= data.MA)
+    data["EXIT_LONG"] = (data.Close < data.MA) & (data.CLOSE_PREV >= data.MA)
+
+    data["SHORT"] = (data.Close < data.MA) & (data.CLOSE_PREV >= data.MA)
+    data["EXIT_SHORT"] = (data.Close > data.MA) & (data.CLOSE_PREV <= data.MA)
+
+    data.LONG = data.LONG.shift(1)
+    data.EXIT_LONG = data.EXIT_LONG.shift(1)
+    data.SHORT = data.SHORT.shift(1)
+    data.EXIT_SHORT = data.EXIT_SHORT.shift(1)
+
+    return data
+
+
+def strategy_random(df, p=0.05, seed=7):
+    # dense, overlapping signals to exercise flips without exits
+    rng = np.random.default_rng(seed)
+    data = df.copy()
+    for col in ["LONG", "EXIT_LONG", "SHORT", "EXIT_SHORT"]:
+        data[col] = rng.random(len(data)) < p
+    return data
+
+
+def run_stock_ta_backtest_loop(bt_df, stop_loss_lvl=None):
+    balance = 1000000
+    pnl = 0
+    position = 0
+
+    last_signal = "hold"
+    last_price = 0
+    c = 0
+
+    trade_date_start = []
+    trade_date_end = []
+    trade_days = []
+    trade_side = []
+    trade_pnl = []
+    trade_ret = []
+
+    cum_value = []
+
+    for index, row in bt_df.iterrows():
+        # check and close any positions
+        if row.EXIT_LONG and last_signal == "long":
+            trade_date_end.append(row.name)
+            trade_days.append(c)
+
+            pnl = (row.Open - last_price) * position
+            trade_pnl.append(pnl)
+            trade_ret.append((row.Open / last_price - 1) * 100)
+
+            balance = balance + row.Open * position
+
+            position = 0
+            last_signal = "hold"
+
+            c = 0
+
+        elif row.EXIT_SHORT and last_signal == "short":
+            trade_date_end.append(row.name)
+            trade_days.append(c)
+
+            pnl = (row.Open - last_price) * position
+            trade_pnl.append(pnl)
+            trade_ret.append((last_price / row.Open - 1) * 100)
+
+            balance = balance + pnl
+
+            position = 0
+            last_signal = "hold"
+
+            c = 0
+
+        # check signal and enter any possible position
+        if row.LONG and last_signal != "long":
+            last_signal = "long"
+            last_price = row.Open
+            trade_date_start.append(row.name)
+            trade_side.append("long")
+
+            position = int(balance / row.Open)
+            cost = position * row.Open
+            balance = balance - cost
+
+            c = 0
+
+        elif row.SHORT and last_signal != "short":
+            last_signal = "short"
+            last_price = row.Open
+            trade_date_start.append(row.name)
+            trade_side.append("short")
+
+            position = int(balance / row.Open) * -1
+
+            c = 0
+
+        if stop_loss_lvl:
+            # check stop loss
+            if (
+                last_signal == "long"
+                and (row.Low / last_price - 1) * 100 <= stop_loss_lvl
+            ):
+                c = c + 1
+
+                trade_date_end.append(row.name)
+                trade_days.append(c)
+
+                stop_loss_price = last_price + round(
+                    last_price * (stop_loss_lvl / 100), 4
+                )
+
+                pnl = (stop_loss_price - last_price) * position
+                trade_pnl.append(pnl)
+                trade_ret.append((stop_loss_price / last_price - 1) * 100)
+
+                balance = balance + stop_loss_price * position
+
+                position = 0
+                last_signal = "hold"
+
+                c = 0
+
+            elif (
+                last_signal == "short"
+                and (last_price / row.Low - 1) * 100 <= stop_loss_lvl
+            ):
+                c = c + 1
+
+                trade_date_end.append(row.name)
+                trade_days.append(c)
+
+                stop_loss_price = last_price - round(
+                    last_price * (stop_loss_lvl / 100), 4
+                )
+
+                pnl = (stop_loss_price - last_price) * position
+                trade_pnl.append(pnl)
+                trade_ret.append((last_price / stop_loss_price - 1) * 100)
+
+                balance = balance + pnl
+
+                position = 0
+                last_signal = "hold"
+
+                c = 0
+
+        # compute market value and count days for any possible poisition
+        if last_signal == "hold":
+            market_value = balance
+        elif last_signal == "long":
+            c = c + 1
+            market_value = position * row.Close + balance
+        else:
+            c = c + 1
+            market_value = (row.Close - last_price) * position + balance
+
+        cum_value.append(market_value)
+
+    # generate analysis
+    # performance over time
+    cum_ret_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["CUM_RET"])
+    cum_ret_df["CUM_RET"] = (cum_ret_df.CUM_RET / 1000000 - 1) * 100
+    cum_ret_df["BUY_HOLD"] = (bt_df.Close / bt_df.Open.iloc[0] - 1) * 100
+    cum_ret_df["ZERO"] = 0
+
+    # trade stats
+    size = min(len(trade_date_start), len(trade_date_end))
+
+    tarde_dict = {
+        "START": trade_date_start[:size],
+        "END": trade_date_end[:size],
+        "SIDE": trade_side[:size],
+        "DAYS": trade_days[:size],
+        "PNL": trade_pnl[:size],
+        "RET": trade_ret[:size],
+    }
+
+    trade_df = pd.DataFrame(tarde_dict)
+
+    num_trades = trade_df.groupby("SIDE").count()[["START"]]
+    num_trades_win = trade_df[trade_df.PNL > 0].groupby("SIDE").count()[["START"]]
+
+    avg_days = trade_df.groupby("SIDE").mean()[["DAYS"]]
+
+    avg_ret = trade_df.groupby("SIDE").mean()[["RET"]]
+    avg_ret_win = trade_df[trade_df.PNL > 0].groupby("SIDE").mean()[["RET"]]
+    avg_ret_loss = trade_df[trade_df.PNL < 0].groupby("SIDE").mean()[["RET"]]
+
+    std_ret = trade_df.groupby("SIDE").std()[["RET"]]
+
+    detail_df = pd.concat(
+        [
+            num_trades,
+            num_trades_win,
+            avg_days,
+            avg_ret,
+            avg_ret_win,
+            avg_ret_loss,
+            std_ret,
+        ],
+        axis=1,
+        sort=False,
+    )
+
+    detail_df.columns = [
+        "NUM_TRADES",
+        "NUM_TRADES_WIN",
+        "AVG_DAYS",
+        "AVG_RET",
+        "AVG_RET_WIN",
+        "AVG_RET_LOSS",
+        "STD_RET",
+    ]
+
+    detail_df.round(2)
+
+    # max drawdown
+    mv_df = pd.DataFrame(cum_value, index=bt_df.index, columns=["MV"])
+
+    days = len(mv_df)
+
+    roll_max = mv_df.MV.rolling(window=days, min_periods=1).max()
+    drawdown_val = mv_df.MV - roll_max
+    drawdown_pct = (mv_df.MV / roll_max - 1) * 100
+
+    # return all stats
+    return {
+        "cum_ret_df": cum_ret_df,
+        "max_drawdown": {
+            "value": round(drawdown_val.min(), 0),
+            "pct": round(drawdown_pct.min(), 2),
+        },
+        "trade_stats": detail_df,
+    }
+
+def assert_same(expected, result):
+    pd.testing.assert_frame_equal(expected["cum_ret_df"], result["cum_ret_df"], check_exact=True)
+    assert expected["max_drawdown"] == result["max_drawdown"]
+    pd.testing.assert_frame_equal(
+        expected["trade_stats"].sort_index(), result["trade_stats"].sort_index(), check_exact=True
+    )
+
+
+def timed(func, *args, repeats=repeats, **kwargs):
+    best = np.inf
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+df = make_bars(252 * years)
+
+for name, bt_df in [("MA(20)", strategy_MA(df)), ("random", strategy_random(df))]:
+    for l in stop_loss_lvl:
+        assert_same(run_stock_ta_backtest_loop(bt_df, l), be.run_backtest(bt_df, l))
+
+        t_loop = timed(run_stock_ta_backtest_loop, bt_df, l)
+        t_full = timed(be.run_backtest, bt_df, l, repeats=engine_repeats)
+        t_summary = timed(be.backtest_summary, bt_df, l, repeats=engine_repeats)
+
+        print(
+            "{:<8} stop={:<5} loop {:8.2f} ms | run_backtest {:6.2f} ms ({:5.0f}x) | "
+            "backtest_summary {:6.3f} ms ({:5.0f}x)".format(
+                name, str(l), t_loop * 1e3, t_full * 1e3, t_loop / t_full,
+                t_summary * 1e3, t_loop / t_summary,
+            )
+        )
@@ -0,0 +1,99 @@
+# Replays a synthetic session of TradingView websocket messages (1 minute bar revisions, quotes and
+# heartbeats) through the streaming pipeline and compares it with Stock_data/tradingview_intraday_data.py
+# before the pipeline, which concatenated every message and parsed the bars with regexes at the end.
+# Reports the throughput and the peak memory of both as the session grows, and checks that replaying a
+# session into a store that already holds it adds nothing.
+import json
+import re
+import tempfile
+import time
+import tracemalloc
+import sys
+import os
+import numpy as np
+import pandas as pd
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import bar_stream as bs
+
+updates_per_minute = 30
+sessions = [390, 780]
+
+
+def frame(message):
+    payload = message if isinstance(message, str) else json.dumps(message, separators=(',', ':'))
+    return "~m~{}~m~{}".format(len(payload), payload)
+
+
+def generate_messages(minutes, seed=0):
+    # one message per bar revision, each with the bar, a quote and every few updates a heartbeat
+    rng = np.random.default_rng(seed)
+    start = 1700000100
+    price, cumulative = 100.0, 0.0
+    for k in range(minutes):
+        o = price
+        path = o + np.cumsum(rng.normal(0, 0.05, updates_per_minute))
+        volumes = rng.integers(1, 100, updates_per_minute)
+        for u in range(updates_per_minute):
+            bar = [start + 60 * k, o, max(o, path[:u + 1].max()), min(o, path[:u + 1].min()), path[u],
+                   float(volumes[:u + 1].sum())]
+            cumulative += volumes[u]
+            parts = [frame({"m": "du", "p": ["cs_x", {"s1": {"s": [{"i": k, "v": bar}]}}]}),
+                     frame({"m": "qsd", "p": ["qs_x", {"n": "NASDAQ:AAPL", "s": "ok",
+                                                       "v": {"lp": path[u], "lp_time": bar[0] + 2 * u, "volume": cumulative}}]})]
+            if u % 10 == 0:
+                parts.append(frame("~h~{}".format(k * updates_per_minute + u)))
+            yield "".join(parts)
+        price = path[-1]
+
+
+def concatenate_then_parse(messages):
+    # the original approach: keep the whole session in memory and extract the bars at the end
+    data = ""
+    for result in messages:
+        data = data + result + "\n"
+    bars = {}
+    for found in re.finditer(r'"i":(\d+),"v":\[([^\]]+)\]', data):
+        bars[int(found.group(1))] = [float(v) for v in found.group(2).split(",")]
+    return pd.DataFrame(list(bars.values()), columns=bs.BAR_COLUMNS)
+
+
+def streaming(messages, store=None):
+    store = store if store is not None else bs.ColumnStore(tempfile.mkdtemp())
+    pipeline = bs.StreamPipeline(store)
+    for result in messages:
+        pipeline.process(result)
+    # the synthetic session is over, so its last bar is complete
+    pipeline.close(emit_forming=True)
+    return store.read("bars_60")
+
+
+def measure(function, minutes):
+    # timed without tracing, which slows allocations down, then traced on a second pass
+    messages = list(generate_messages(minutes))
+    t0 = time.perf_counter()
+    bars = function(messages)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    function(messages)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return bars, elapsed, peak
+
+
+for minutes in sessions:
+    num_messages = minutes * updates_per_minute
+    expected, loop_time, loop_peak = measure(concatenate_then_parse, minutes)
+    bars, stream_time, stream_peak = measure(streaming, minutes)
+    np.testing.assert_allclose(bars.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+    print("{} minutes, {} messages".format(minutes, num_messages))
+    print("Concatenate then parse: {:.0f} messages/s, peak {:.1f} MB".format(num_messages / loop_time, loop_peak / 2 ** 20))
+    print("Streaming pipeline: {:.0f} messages/s, peak {:.1f} MB".format(num_messages / stream_time, stream_peak / 2 ** 20))
+
+# a second session sends the same history again: the stored bars do not change
+messages = list(generate_messages(sessions[0]))
+store = bs.ColumnStore(tempfile.mkdtemp())
+first = streaming(messages, store)
+pd.testing.assert_frame_equal(streaming(messages, store), first)
+print("Replayed session: {} bars stored once".format(len(first)))
@@ -0,0 +1,89 @@
+# Computes the breadth of a universe the size of the bundled NYSE + NASDAQ lists over 3 years of
+# synthetic daily bars: one ticker at a time with pandas (on a subset, extrapolated) against the
+# vectorized breadth.breadth, then 20 new days recomputed from scratch against BreadthEngine
+# updates, checking that all of them give the same values.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import breadth as br
+
+num_days = 252 * 3
+new_days = 20
+num_tickers = sum(len(pd.read_csv(os.path.join(parent_dir, f))) for f in ("nyse_tickers.csv", "nasdaq_tickers.csv"))
+loop_tickers = 300
+
+rng = np.random.default_rng(0)
+dates = pd.bdate_range("2020-01-01", periods=num_days + new_days)
+close = pd.DataFrame(np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), num_tickers)), axis=0)), 2),
+                     index=dates, columns=["T{}".format(i) for i in range(num_tickers)])
+# listings and delistings during the period
+listed = rng.integers(0, num_days, num_tickers // 10)
+close.iloc[:, :len(listed)] = close.iloc[:, :len(listed)].where(dates.to_numpy()[:, None] >= dates[listed].to_numpy())
+panel = {
+    "Close": close,
+    "High": (close * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))).round(2),
+    "Low": (close * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))).round(2),
+    "Volume": pd.DataFrame(rng.integers(1_000, 1_000_000, close.shape).astype(float), index=dates,
+                           columns=close.columns).where(close.notna()),
+}
+history = {field: frame.iloc[:num_days] for field, frame in panel.items()}
+
+
+def breadth_loop(panel, window=252, ma_periods=(50, 200)):
+    # one ticker at a time, adding its flags to the daily counts
+    index = panel["Close"].index
+    counts = pd.DataFrame(0.0, index=index, columns=["Advances", "Declines", "Up_Volume", "Down_Volume",
+                                                      "New_Highs", "New_Lows"])
+    above = {n: pd.Series(0.0, index=index) for n in ma_periods}
+    quoted = {n: pd.Series(0.0, index=index) for n in ma_periods}
+    for ticker in panel["Close"].columns:
+        close, high, low, volume = (panel[f][ticker] for f in ("Close", "High", "Low", "Volume"))
+        change = close.diff()
+        counts["Advances"] += change > 0
+        counts["Declines"] += change < 0
+        counts["Up_Volume"] += volume.where(change > 0, 0.0)
+        counts["Down_Volume"] += volume.where(change < 0, 0.0)
+        counts["New_Highs"] += high >= high.rolling(window).max()
+        counts["New_Lows"] += low <= low.rolling(window).min()
+        for n in ma_periods:
+            sma = close.rolling(n).mean()
+            above[n] += close > sma
+            quoted[n] += sma.notna()
+    for n in ma_periods:
+        counts["Pct_Above_{}MA".format(n)] = 100 * above[n] / quoted[n]
+    return counts
+
+
+subset = {field: frame.iloc[:, -loop_tickers:] for field, frame in history.items()}
+t0 = time.perf_counter()
+expected = breadth_loop(subset)
+loop_time = (time.perf_counter() - t0) / loop_tickers * num_tickers
+pd.testing.assert_frame_equal(br.breadth(subset)[expected.columns], expected, check_freq=False)
+
+t0 = time.perf_counter()
+result = br.breadth(history)
+batch_time = time.perf_counter() - t0
+
+# a new day recomputed from the full history, the way a script rerun would
+t0 = time.perf_counter()
+for day in range(num_days, num_days + new_days):
+    expected = br.breadth({field: frame.iloc[:day + 1] for field, frame in panel.items()})
+recompute_time = (time.perf_counter() - t0) / new_days
+
+engine = br.BreadthEngine()
+engine.seed(history)
+t0 = time.perf_counter()
+rows = [engine.update({field: frame.loc[date] for field, frame in panel.items()}, date)
+        for date in dates[num_days:]]
+update_time = (time.perf_counter() - t0) / new_days
+pd.testing.assert_frame_equal(pd.DataFrame(rows), expected.iloc[num_days:], check_freq=False, rtol=1e-9)
+
+print("{} days x {} tickers".format(num_days, num_tickers))
+print("Ticker by ticker: {:.1f} s (extrapolated from {} tickers), vectorized: {:.2f} s ({:.0f}x)".format(
+    loop_time, loop_tickers, batch_time, loop_time / batch_time))
+print("New day: recompute {:.0f} ms, incremental update {:.1f} ms ({:.0f}x)".format(
+    recompute_time * 1e3, update_time * 1e3, recompute_time / update_time))
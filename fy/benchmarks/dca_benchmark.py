@@ -0,0 +1,75 @@
+# Values lump sum and dollar cost averaging started on every date of 20 years of daily prices with
+# the functions of portfolio_strategies/ls_dca_analysis.py (a date_range, searchsorted and .loc
+# lookup per installment) and with dca (installment schedules computed once, every start date at
+# once), checking that both give the same values, then times the full surface of installment
+# counts and frequencies for one ticker and for 50 tickers.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import dca as dc
+
+num_days = 252 * 20
+num_tickers = 50
+loop_dates = 500
+periods = range(1, 25)
+freqs = ("7D", "14D", "30D", "ME")
+
+rng = np.random.default_rng(0)
+dates = pd.bdate_range("2004-01-01", periods=num_days)
+prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (num_days, num_tickers)), axis=0)),
+                      index=dates, columns=["T{}".format(i) for i in range(num_tickers)])
+data = pd.DataFrame({"Adj Close": prices["T0"]})
+
+
+def lumpsum(invest_date, principal=10000):
+    invest_price = data.loc[invest_date]["Adj Close"]
+    current_price = data["Adj Close"].iloc[-1]
+    investment_return = (current_price / invest_price) - 1
+    return principal * (1 + investment_return)
+
+
+def dollar_cost_average(invest_date, periods=12, freq="30D", principal=10000):
+    dca_dates = pd.date_range(invest_date, periods=periods, freq=freq)
+    dca_dates = dca_dates[dca_dates < data.index[-1]]
+    cut_off_value = (periods - len(dca_dates)) * (principal / periods)
+    dca_value = cut_off_value
+    for date in dca_dates:
+        trading_date = data.index[data.index.searchsorted(date)]
+        dca_value += lumpsum(trading_date, principal=principal / periods)
+    return dca_value
+
+
+# the last dates, where installments get cut off, and a sample of the others
+checked = dates[np.r_[np.linspace(0, num_days - 300, loop_dates - 250).astype(int), np.arange(num_days - 250, num_days)]]
+t0 = time.perf_counter()
+expected_lump = [lumpsum(d) for d in checked]
+expected_dca = [dollar_cost_average(d) for d in checked]
+loop_time = (time.perf_counter() - t0) / len(checked) * num_days
+
+t0 = time.perf_counter()
+lump = dc.lump_sum(data["Adj Close"])
+dca = dc.dollar_cost_average(data["Adj Close"])
+vector_time = time.perf_counter() - t0
+np.testing.assert_allclose(lump.loc[checked].to_numpy(), expected_lump, rtol=1e-12)
+np.testing.assert_allclose(dca.loc[checked].to_numpy(), expected_dca, rtol=1e-12)
+for freq, p in [("ME", 6), ("7D", 24)]:
+    expected = [dollar_cost_average(d, p, freq) for d in checked[-100:]]
+    np.testing.assert_allclose(dc.dollar_cost_average(data["Adj Close"], p, freq).loc[checked[-100:]], expected, rtol=1e-12)
+
+t0 = time.perf_counter()
+surface = dc.dca_surface(data["Adj Close"], periods, freqs)
+surface_time = time.perf_counter() - t0
+t0 = time.perf_counter()
+panel_surface = dc.dca_surface(prices, periods, freqs)
+panel_time = time.perf_counter() - t0
+np.testing.assert_allclose(panel_surface[..., 0], surface[..., 0], rtol=1e-12)
+
+print("{} start dates".format(num_days))
+print("12 x 30D plan: loop {:.1f} s (extrapolated from {} dates), dca {:.3f} s ({:.0f}x)".format(
+    loop_time, len(checked), vector_time, loop_time / vector_time))
+print("Surface of {} plans: 1 ticker {:.2f} s, {} tickers {:.2f} s (loop ~{:.0f} s per ticker)".format(
+    len(periods) * len(freqs), surface_time, num_tickers, panel_time, loop_time * len(periods) * len(freqs)))
@@ -0,0 +1,100 @@
+# Values the S&P 500 dividend discount model of Stock_analysis/sp500_valuation.py over a dense
+# (growth scenario x discount rate x terminal growth) grid of 12,000 scenarios, with the original
+# per-case get_value loop (checked on a subset and extrapolated) and with one broadcasted call, and
+# solves the implied return of every scenario per case and with the vectorized IRR.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+from scipy.optimize import brentq
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import dividend_discount as dd
+
+price = 3446.0
+eps_growths = np.array([
+    [0, -0.1, 0, 0.25, 0.25, 0.15, 0.12, 0.10, 0.08, 0.08],
+    [0, 0.15, 0.22, 0.20, 0.16, 0.13, 0.11, 0.09, 0.08, 0.08],
+    [0, 0.0755, 0.18, 0.14, 0.10, 0.08, 0.08, 0.08, 0.08, 0.08],
+])
+eps_nexts = np.array([96, 96, 129.67])
+discount_rates = np.linspace(0.06, 0.10, 100)
+terminal_growths = np.linspace(0.01, 0.05, 40)
+num_scenarios = len(eps_growths) * len(discount_rates) * len(terminal_growths)
+loop_scenarios = 300
+
+
+def get_value(tg, dr, eps_growth, eps_next):
+    # the original Stock_analysis/sp500_valuation.py value function
+    terminal_growth = tg
+    discount_rate = dr
+    payout_ratio = 0.50
+
+    value_df = pd.DataFrame()
+    value_df["earnings"] = (np.array(eps_growth) + 1).cumprod() * eps_next
+    value_df["dividends"] = payout_ratio * value_df["earnings"]
+    value_df["year"] = [i for i in range(2021, 2031)]
+    value_df.set_index("year", inplace=True)
+
+    pv_dividends = 0
+    for i in range(value_df.shape[0]):
+        pv_dividends += value_df["dividends"].iloc[i] / (1 + discount_rate) ** i
+
+    terminal_value = (
+        value_df["dividends"].iloc[-1]
+        * (1 + terminal_growth)
+        / (discount_rate - terminal_growth)
+    )
+    return pv_dividends + terminal_value / (1 + discount_rate) ** 10
+
+
+def irr_loop(flows):
+    # one root solve per case (numpy_financial.irr when it is installed)
+    try:
+        import numpy_financial as npf
+        return np.array([npf.irr(f) for f in flows])
+    except ImportError:
+        t = np.arange(flows.shape[1])
+        return np.array([brentq(lambda r: np.sum(f / (1 + r) ** t), -0.99, 10, xtol=1e-14) for f in flows])
+
+
+cases = [(g, d, t) for g in range(len(eps_growths)) for d in range(len(discount_rates))
+         for t in range(len(terminal_growths))]
+rng = np.random.default_rng(0)
+subset = [cases[k] for k in rng.choice(len(cases), loop_scenarios, replace=False)]
+
+t0 = time.perf_counter()
+expected = [get_value(terminal_growths[t], discount_rates[d], eps_growths[g], eps_nexts[g]) for g, d, t in subset]
+loop_time = time.perf_counter() - t0
+loop_estimate = loop_time * num_scenarios / loop_scenarios
+
+t0 = time.perf_counter()
+grid = dd.ddm_grid(eps_growths, eps_nexts, discount_rates, terminal_growths)
+grid_time = time.perf_counter() - t0
+np.testing.assert_allclose([grid[g, d, t] for g, d, t in subset], expected, rtol=1e-12)
+
+print("{} scenarios".format(num_scenarios))
+print("get_value loop: ~{:.1f}s (extrapolated from {} scenarios)".format(loop_estimate, loop_scenarios))
+print("Broadcasted grid: {:.2f}ms ({:.0f}x)".format(grid_time * 1e3, loop_estimate / grid_time))
+
+# implied return of buying at `price` and receiving the payouts, where the terminal value is defined
+dividends = dd.dividend_paths(eps_nexts, eps_growths)[:, None, None, :]
+flows = dd.payouts(dividends, discount_rates[None, :, None], terminal_growths[None, None, :])
+flows = np.concatenate([np.full(flows.shape[:-1] + (1,), -price), flows], axis=-1)
+defined = (discount_rates[None, :, None] > terminal_growths[None, None, :]) & np.ones(grid.shape, dtype=bool)
+flows = flows[defined]
+
+t0 = time.perf_counter()
+expected = irr_loop(flows[:loop_scenarios])
+loop_time = time.perf_counter() - t0
+loop_estimate = loop_time * len(flows) / loop_scenarios
+
+t0 = time.perf_counter()
+rates = dd.irr(flows)
+irr_time = time.perf_counter() - t0
+np.testing.assert_allclose(rates[:loop_scenarios], expected, rtol=1e-9, atol=1e-12)
+
+print("{} implied returns".format(len(flows)))
+print("Per-case IRR: ~{:.1f}s (extrapolated from {} scenarios)".format(loop_estimate, loop_scenarios))
+print("Vectorized IRR: {:.2f}ms ({:.0f}x)".format(irr_time * 1e3, loop_estimate / irr_time))
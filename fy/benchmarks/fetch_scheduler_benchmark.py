@@ -0,0 +1,83 @@
+# Loads a synthetic universe through PriceStore + HTTPCSVSource from a local stub HTTP server
+# that enforces its own rate limit (HTTP 429 over the limit), adds latency and fails a share
+# of requests with HTTP 503, and compares with the old serial loop with time.sleep(1).
+import numpy as np
+import pandas as pd
+import tempfile
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import fetch_scheduler as fs
+import price_store as ps
+
+num_tickers = 300
+server_rate = 50      # requests per second the stub server accepts
+latency = 0.05        # seconds per response
+failure_rate = 0.05   # share of requests answered with HTTP 503
+
+rng = np.random.default_rng(0)
+index = pd.bdate_range("2015-01-01", "2020-12-31")
+close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(index), num_tickers)), axis=0))
+tickers = ["T{:03d}".format(i) for i in range(num_tickers)]
+csvs = {
+    t: pd.DataFrame(
+        {"Open": close[:, i], "High": close[:, i], "Low": close[:, i], "Close": close[:, i],
+         "Adj Close": close[:, i], "Volume": 1e6},
+        index=pd.Index(index, name="Date"),
+    ).to_csv().encode()
+    for i, t in enumerate(tickers)
+}
+
+server_bucket = fs.TokenBucket(server_rate, server_rate)
+counts = {"ok": 0, "limited": 0, "failed": 0}
+lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        ticker = self.path.strip("/").split(".csv")[0]
+        allowed = server_bucket.try_acquire()
+        time.sleep(latency)
+        if not allowed:
+            status = 429
+        elif rng.random() < failure_rate:
+            status = 503
+        else:
+            status = 200
+        with lock:
+            counts[{200: "ok", 429: "limited", 503: "failed"}[status]] += 1
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        body = csvs.get(ticker, b"") if status == 200 else b""
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = "http://127.0.0.1:{}/{{ticker}}.csv".format(server.server_port)
+
+scheduler = fs.FetchScheduler(rate=server_rate, max_per_host=8, max_workers=16, backoff=0.1)
+with tempfile.TemporaryDirectory() as root:
+    store = ps.PriceStore(root, source=ps.HTTPCSVSource(url, scheduler))
+    t0 = time.perf_counter()
+    panel = store.get_prices(tickers, index[0], index[-1], fields=["Close"])
+    elapsed = time.perf_counter() - t0
+server.shutdown()
+
+assert panel["Close"].notna().all().all(), "missing tickers"
+np.testing.assert_allclose(panel["Close"].to_numpy(), close)
+print("{} tickers in {:.1f}s ({:.0f} req/s, server limit {} req/s)".format(
+    num_tickers, elapsed, num_tickers / elapsed, server_rate))
+print("Server responses: {ok} ok, {limited} rate limited, {failed} failed".format(**counts))
+print("Scheduler: {requests} requests, {retries} retries, {failures} failures".format(**scheduler.stats))
+print("Serial loop with time.sleep(1): >= {:.0f}s".format(num_tickers * (1 + latency)))
@@ -0,0 +1,67 @@
+# Runs the per-bar logic of machine_learning/sklearn_trading_bot.py's IsolationStrategy on a
+# synthetic OHLCV stream, comparing the original (an IsolationForest refitted on the whole history,
+# the history grown by appending a row and its mean/std recomputed every bar) with the incremental
+# model, in bars per second.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+from sklearn.ensemble import IsolationForest
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+from incremental_isolation import IncrementalIsolationModel
+
+columns = "Open High Low Close Volume".split()
+num_history = 1000
+num_bars = 2000
+check_bars = 100
+
+rng = np.random.default_rng(0)
+close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, num_history + num_bars)))
+bars = np.column_stack([
+    close * (1 + rng.normal(0, 0.002, len(close))),
+    close * (1 + np.abs(rng.normal(0, 0.01, len(close)))),
+    close * (1 - np.abs(rng.normal(0, 0.01, len(close)))),
+    close,
+    rng.lognormal(13, 0.5, len(close)),
+])
+history, stream = bars[:num_history], bars[num_history:]
+
+
+def original_labels(history, stream, random_state):
+    # IsolationStrategy.next before the change (DataFrame.append is pd.concat in pandas 2)
+    model_data = pd.DataFrame(history, columns=columns)
+    labels = []
+    for bar in stream:
+        x = pd.DataFrame([bar], columns=columns)
+        normalized_data = (model_data - model_data.mean()) / model_data.std()
+        iso = IsolationForest(contamination=0.001, random_state=random_state).fit(normalized_data)
+        model_data = pd.concat([model_data, x], ignore_index=True)
+        mean_to_normalize = pd.DataFrame([[np.mean(model_data[c]) for c in columns]], columns=columns)
+        std_to_normalize = pd.DataFrame([[np.std(model_data[c]) for c in columns]], columns=columns)
+        labels.append(iso.predict((x - mean_to_normalize) / std_to_normalize)[0])
+    return np.array(labels)
+
+
+def incremental_labels(history, stream, **kwargs):
+    model = IncrementalIsolationModel(history, random_state=0, **kwargs)
+    return np.array([model.update(bar) for bar in stream]), model.num_fits
+
+
+t0 = time.perf_counter()
+expected = original_labels(history, stream[:check_bars], random_state=0)
+original_rate = check_bars / (time.perf_counter() - t0)
+labels, _ = incremental_labels(history, stream[:check_bars], refit_every=1, drift_threshold=None)
+assert (labels == expected).all()
+
+print("{} history bars + {} new bars".format(num_history, num_bars))
+print("Original (refit every bar): {:.1f} bars/s over the first {} bars, slower as the history grows".format(
+    original_rate, check_bars))
+for refit_every in [1, 21, 63]:
+    n = check_bars if refit_every == 1 else num_bars
+    t0 = time.perf_counter()
+    labels, num_fits = incremental_labels(history, stream[:n], refit_every=refit_every)
+    rate = n / (time.perf_counter() - t0)
+    print("Incremental, refit_every={}: {:.1f} bars/s ({:.0f}x), {} fits, {} outliers".format(
+        refit_every, rate, rate / original_rate, num_fits, (labels == -1).sum()))
@@ -0,0 +1,95 @@
+# Finds support and resistance levels for 500 tickers over 5 years of daily bars with the loops of
+# portfolio_strategies/support_resistance_finder.py (isSupport / isResistance row lookups, then
+# isFarFromLevel against every kept level; a few tickers, extrapolated) and with levels.find_levels
+# (shifted comparisons over the whole panel, sorted-sweep clustering, touch counts), checking the
+# pivots, clusters and touch counts against plain loops.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import levels as lv
+
+num_days = 252 * 5
+num_tickers = 500
+loop_tickers = 10
+
+rng = np.random.default_rng(0)
+dates = pd.bdate_range("2019-01-01", periods=num_days)
+tickers = ["T{}".format(i) for i in range(num_tickers)]
+close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (num_days, num_tickers)), axis=0)),
+                     index=dates, columns=tickers)
+high = close * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))
+low = close * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))
+
+
+def levels_loop(df):
+    def isSupport(df, i):
+        return (df["Low"][i] < df["Low"][i - 1] and df["Low"][i] < df["Low"][i + 1]
+                and df["Low"][i + 1] < df["Low"][i + 2] and df["Low"][i - 1] < df["Low"][i - 2])
+
+    def isResistance(df, i):
+        return (df["High"][i] > df["High"][i - 1] and df["High"][i] > df["High"][i + 1]
+                and df["High"][i + 1] > df["High"][i + 2] and df["High"][i - 1] > df["High"][i - 2])
+
+    def isFarFromLevel(l, levels, s):
+        return np.sum([abs(l - x) < s for x in levels]) == 0
+
+    s = np.mean(df["High"] - df["Low"])
+    pivots = []
+    levels = []
+    for i in range(2, df.shape[0] - 2):
+        if isSupport(df, i):
+            pivots.append((i, df["Low"][i], True))
+        elif isResistance(df, i):
+            pivots.append((i, df["High"][i], False))
+        else:
+            continue
+        if isFarFromLevel(pivots[-1][1], levels, s):
+            levels.append(pivots[-1][1])
+    return pivots, levels
+
+
+def cluster_loop(prices, tolerance):
+    # the lowest price not yet clustered starts a level taking the prices less than tolerance above it
+    prices = sorted(prices)
+    clusters = []
+    for p in prices:
+        if clusters and p < clusters[-1][0] + tolerance:
+            clusters[-1].append(p)
+        else:
+            clusters.append([p])
+    return [np.mean(c) for c in clusters], [len(c) for c in clusters]
+
+
+checked = tickers[:loop_tickers]
+t0 = time.perf_counter()
+expected = {t: levels_loop(pd.DataFrame({"High": high[t], "Low": low[t]}).reset_index(drop=True)) for t in checked}
+loop_time = (time.perf_counter() - t0) / loop_tickers * num_tickers
+
+t0 = time.perf_counter()
+table = lv.find_levels(high, low)
+find_time = time.perf_counter() - t0
+support, resistance = lv.fractal_pivots(high, low)
+for t in checked:
+    pivots, _ = expected[t]
+    assert [i for i, _, s in pivots if s] == list(np.flatnonzero(support[t].to_numpy()))
+    assert [i for i, _, s in pivots if not s] == list(np.flatnonzero(resistance[t].to_numpy()))
+    tolerance = (high[t] - low[t]).mean()
+    means, sizes = cluster_loop([p for _, p, _ in pivots], tolerance)
+    levels = table[table["Ticker"] == t]
+    np.testing.assert_allclose(levels["Level"].to_numpy(), means, rtol=1e-12)
+    assert levels["Pivots"].tolist() == sizes
+    touches = [((low[t] <= level + tolerance / 2) & (high[t] >= level - tolerance / 2)).sum() for level in means]
+    assert levels["Touches"].tolist() == touches
+
+t0 = time.perf_counter()
+multi = lv.multi_timeframe_levels(high, low, timeframes=(None, "W", "ME"))
+multi_time = time.perf_counter() - t0
+
+print("{} days x {} tickers, {} levels".format(num_days, num_tickers, len(table)))
+print("Row loops: {:.1f} s (extrapolated from {} tickers), find_levels: {:.2f} s ({:.0f}x)".format(
+    loop_time, loop_tickers, find_time, loop_time / find_time))
+print("Daily, weekly and monthly levels: {:.2f} s".format(multi_time))
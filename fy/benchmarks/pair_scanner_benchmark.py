@@ -0,0 +1,76 @@
+# Scans every pair of a synthetic 500-ticker universe with the batched Engle-Granger scanner and
+# compares it with the double loop over statsmodels' coint of portfolio_strategies/pairs_trading.py
+# (checked on a 40-ticker subset and extrapolated to all pairs), then re-runs a rolling scan from
+# its cache.
+import numpy as np
+import pandas as pd
+import tempfile
+import time
+import sys
+import os
+from statsmodels.tsa.stattools import coint
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import pair_scanner as psn
+
+num_days = 300
+num_tickers = 500
+loop_tickers = 40
+
+rng = np.random.default_rng(0)
+factors = np.cumsum(rng.normal(0, 0.01, (num_days, 10)), axis=0)
+log_prices = factors @ rng.normal(0, 1, (10, num_tickers)) + np.cumsum(rng.normal(0, 0.01, (num_days, num_tickers)), axis=0)
+prices = pd.DataFrame(100 * np.exp(log_prices), index=pd.bdate_range("2020-01-01", periods=num_days),
+                      columns=["T{:03d}".format(i) for i in range(num_tickers)])
+window = prices.iloc[-252:]
+
+
+def find_cointegrated_pairs_loop(data):
+    n = data.shape[1]
+    score_matrix = np.zeros((n, n))
+    pvalue_matrix = np.ones((n, n))
+    keys = data.keys()
+    pairs = []
+    for i in range(n):
+        for j in range(i + 1, n):
+            result = coint(data[keys[i]], data[keys[j]])
+            score_matrix[i, j] = result[0]
+            pvalue_matrix[i, j] = result[1]
+            if result[1] < 0.01:
+                pairs.append((keys[i], keys[j]))
+    return score_matrix, pvalue_matrix, pairs
+
+
+subset = window.iloc[:, :loop_tickers]
+t0 = time.perf_counter()
+expected = find_cointegrated_pairs_loop(subset)
+loop_time = time.perf_counter() - t0
+result = psn.find_cointegrated_pairs(subset)
+np.testing.assert_allclose(result[0], expected[0], rtol=1e-8, atol=1e-10)
+np.testing.assert_allclose(result[1], expected[1], rtol=1e-8, atol=1e-10)
+assert result[2] == expected[2]
+
+num_pairs = num_tickers * (num_tickers - 1) // 2
+loop_estimate = loop_time * num_pairs / (loop_tickers * (loop_tickers - 1) // 2)
+print("{} tickers x {} days, {} pairs".format(num_tickers, len(window), num_pairs))
+print("coint double loop: ~{:.0f}s (extrapolated from {} tickers)".format(loop_estimate, loop_tickers))
+
+for min_corr in [None, 0.3]:
+    scanner = psn.PairScanner(min_corr=min_corr)
+    t0 = time.perf_counter()
+    scan = scanner.scan(window)
+    elapsed = time.perf_counter() - t0
+    print("Batched scan, min_corr={}: {} pairs tested in {:.1f}s ({:.0f}x), {} with p < 0.01".format(
+        min_corr, len(scan), elapsed, loop_estimate / elapsed, (scan.pvalue < 0.01).sum()))
+
+with tempfile.TemporaryDirectory() as directory:
+    cache_path = os.path.join(directory, "pairs.csv")
+    t0 = time.perf_counter()
+    first = psn.PairScanner(min_corr=0.3, cache_path=cache_path).rolling_scan(prices, 252, 21)
+    first_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    again = psn.PairScanner(min_corr=0.3, cache_path=cache_path).rolling_scan(prices, 252, 21)
+    again_time = time.perf_counter() - t0
+    pd.testing.assert_frame_equal(first, again)
+    print("Rolling scan over {} windows: {:.1f}s, again from the cache: {:.2f}s".format(
+        first.end.nunique(), first_time, again_time))
@@ -0,0 +1,74 @@
+# Backtests the z-score rules of portfolio_strategies/pairs_trading.py on 5000 pairs of a synthetic
+# universe at once and compares it with a per-pair loop (pandas rolling OLS hedge, rolling z-score
+# and a position state machine), checked on a subset and extrapolated to all pairs.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import pairs_backtest as pb
+
+num_days = 756
+num_tickers = 200
+num_pairs = 5000
+loop_pairs = 50
+window, z_window, entry, exit = 60, 20, 2.0, 0.5
+
+rng = np.random.default_rng(0)
+factors = np.cumsum(rng.normal(0, 0.01, (num_days, 10)), axis=0)
+log_prices = factors @ rng.normal(0, 1, (10, num_tickers)) + np.cumsum(rng.normal(0, 0.01, (num_days, num_tickers)), axis=0)
+prices = pd.DataFrame(100 * np.exp(log_prices), index=pd.bdate_range("2020-01-01", periods=num_days),
+                      columns=["T{:03d}".format(i) for i in range(num_tickers)])
+i, j = np.triu_indices(num_tickers, k=1)
+pick = rng.choice(len(i), num_pairs, replace=False)
+pairs = [(prices.columns[a], prices.columns[b]) for a, b in zip(i[pick], j[pick])]
+
+
+def backtest_pair_loop(y, x):
+    cov = y.rolling(window).cov(x)
+    beta = cov / x.rolling(window).var()
+    alpha = y.rolling(window).mean() - beta * x.rolling(window).mean()
+    spread = y - beta.shift(1) * x - alpha.shift(1)
+    z = (spread - spread.rolling(z_window).mean()) / spread.rolling(z_window).std()
+    pos = np.zeros(len(y))
+    for t in range(len(y)):
+        previous = pos[t - 1] if t > 0 else 0
+        if np.isnan(z.iloc[t]):
+            pos[t] = 0
+        elif abs(z.iloc[t]) < exit:
+            pos[t] = 0
+        elif z.iloc[t] > entry:
+            pos[t] = -1
+        elif z.iloc[t] < -entry:
+            pos[t] = 1
+        else:
+            pos[t] = previous
+    hedge = beta.fillna(0).to_numpy()
+    y, x = y.to_numpy(), x.to_numpy()
+    capital = y + np.abs(hedge) * x
+    returns = np.zeros(len(y))
+    returns[1:] = (pos[:-1] * np.diff(y) - pos[:-1] * hedge[:-1] * np.diff(x)) / capital[:-1]
+    return pos, returns
+
+
+t0 = time.perf_counter()
+expected = [backtest_pair_loop(prices[a], prices[b]) for a, b in pairs[:loop_pairs]]
+loop_time = time.perf_counter() - t0
+loop_estimate = loop_time * num_pairs / loop_pairs
+
+t0 = time.perf_counter()
+result = pb.backtest_pairs(prices, pairs, window=window, z_window=z_window, entry=entry, exit=exit)
+batch_time = time.perf_counter() - t0
+for k, (pos, returns) in enumerate(expected):
+    np.testing.assert_array_equal(result["positions"].iloc[:, k].to_numpy(), pos)
+    np.testing.assert_allclose(result["returns"].iloc[:, k].to_numpy(), returns, rtol=1e-6, atol=1e-12)
+
+print("{} pairs x {} days".format(num_pairs, num_days))
+print("Per-pair loop: ~{:.0f}s (extrapolated from {} pairs)".format(loop_estimate, loop_pairs))
+print("Batched OLS backtest: {:.2f}s ({:.0f}x)".format(batch_time, loop_estimate / batch_time))
+
+t0 = time.perf_counter()
+pb.backtest_pairs(prices, pairs, method="kalman", z_window=z_window, entry=entry, exit=exit)
+print("Batched Kalman backtest: {:.2f}s".format(time.perf_counter() - t0))
@@ -0,0 +1,61 @@
+# Simulates 100k paths x 252 days with path_simulation.simulate and compares it with the
+# per-step loop of portfolio_strategies/monte_carlo.py (timed on fewer paths and
+# extrapolated), then runs 1M paths in chunks and reports peak memory.
+import numpy as np
+import time
+import tracemalloc
+import math
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import path_simulation as sim
+
+paths = 100_000
+loop_paths = 2_000
+days = 252
+start_price = 100.0
+mu, vol = 0.12, 0.35
+step_mean, step_std = mu / days, vol / math.sqrt(days)
+
+
+def monte_carlo_loop(simulations, days_predicted):
+    results = []
+    for _ in range(simulations):
+        prices = [start_price]
+        for _ in range(days_predicted):
+            shock = np.random.normal(mu / days_predicted, vol / math.sqrt(days_predicted))
+            prices.append(prices[-1] * (1 + shock))
+        results.append(prices[-1])
+    return results
+
+
+np.random.seed(0)
+t0 = time.perf_counter()
+loop_terminal = monte_carlo_loop(loop_paths, days)
+loop_time = (time.perf_counter() - t0) * paths / loop_paths
+
+t0 = time.perf_counter()
+result = sim.simulate(start_price, step_mean, step_std, days, paths, seed=0)
+engine_time = time.perf_counter() - t0
+
+# same distribution: the terminal mean is start * (1 + step_mean) ** days
+expected_mean = start_price * (1 + step_mean) ** days
+assert abs(result["terminal"].mean() / expected_mean - 1) < 0.01
+assert abs(np.mean(loop_terminal) / expected_mean - 1) < 0.05
+assert np.allclose(sim.simulate(start_price, step_mean, step_std, days, 1000, seed=1)["terminal"],
+                   sim.simulate(start_price, step_mean, step_std, days, 1000, seed=1)["terminal"])
+
+print("{} paths x {} days".format(paths, days))
+print("Per-step loop: ~{:.1f}s (extrapolated from {} paths)".format(loop_time, loop_paths))
+print("Vectorized:    {:.2f}s ({:.0f}x)".format(engine_time, loop_time / engine_time))
+print("Terminal percentiles:", {p: round(v, 2) for p, v in result["percentiles"].items()})
+
+for chunk_size in [50_000, 1_000_000]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    big = sim.simulate(start_price, step_mean, step_std, days, 1_000_000, seed=0, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("1M paths, chunk_size={}: {:.2f}s, peak memory {:.0f} MB".format(chunk_size, elapsed, peak / 1024 ** 2))
@@ -0,0 +1,94 @@
+# Times the O(n) rolling kernels behind LINEARREG, MAXINDEX, MININDEX, MINMAXINDEX and MFI in
+# ta_functions.py against the previous rolling(...).apply implementations on a 1M-row series,
+# and checks that they return the same values.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import rolling_kernels as rk
+
+rows = 1_000_000
+# the previous MFI builds a Series per window, so it is timed on a slice and extrapolated
+mfi_apply_rows = 50_000
+timeperiod = 14
+
+rng = np.random.default_rng(0)
+close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows))))
+close.iloc[rng.integers(0, rows, 20)] = np.nan
+high = close * np.exp(np.abs(rng.normal(0, 0.005, rows)))
+low = close * np.exp(-np.abs(rng.normal(0, 0.005, rows)))
+volume = pd.Series(rng.integers(1_000, 1_000_000, rows).astype(float))
+# rounded prices produce ties in the argmax/argmin windows
+ticks = close.round(0)
+
+
+def LINEARREG_apply(close, timeperiod=14):
+    idx = np.arange(timeperiod)
+    def linreg(x):
+        return np.polyval(np.polyfit(idx, x, 1), idx)[-1]
+    return close.rolling(window=timeperiod).apply(linreg, raw=True)
+
+
+def MAXINDEX_apply(data, timeperiod=14):
+    return data.rolling(window=timeperiod).apply(np.argmax) + 1
+
+
+def MININDEX_apply(data, timeperiod=14):
+    return data.rolling(window=timeperiod).apply(np.argmin) + 1
+
+
+def MFI_apply(high, low, close, volume, timeperiod=14):
+    typical_price = (high + low + close) / 3
+    raw_money_flow = typical_price * volume
+    money_flow_ratio = (
+        raw_money_flow.rolling(window=timeperiod).apply(lambda x: np.sum(x[x > x.shift(1)])) /
+        raw_money_flow.rolling(window=timeperiod).apply(lambda x: np.sum(x[x < x.shift(1)]))
+    )
+    mfi = 100 - (100 / (1 + money_flow_ratio))
+    return mfi
+
+
+def MFI_reference(high, low, close, volume, timeperiod=14):
+    # money flow index as defined by TA-Lib: per-window sums of the flows of up and down bars
+    typical_price = (high + low + close) / 3
+    raw_money_flow = typical_price * volume
+    prev = typical_price.shift(1)
+    up = (typical_price > prev).astype(float).where(prev.notna() & typical_price.notna())
+    down = (typical_price < prev).astype(float).where(prev.notna() & typical_price.notna())
+    positive = (raw_money_flow * up).rolling(timeperiod).apply(np.sum, raw=True)
+    negative = (raw_money_flow * down).rolling(timeperiod).apply(np.sum, raw=True)
+    return 100 - (100 / (1 + positive / negative))
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+cases = [
+    ("LINEARREG", LINEARREG_apply, rk.rolling_linreg, (close,), dict(rtol=1e-6, atol=1e-8)),
+    ("MAXINDEX", MAXINDEX_apply, lambda d, n: rk.rolling_argmax(d, n) + 1, (ticks,), dict(rtol=0, atol=0)),
+    ("MININDEX", MININDEX_apply, lambda d, n: rk.rolling_argmin(d, n) + 1, (ticks,), dict(rtol=0, atol=0)),
+    ("MFI", MFI_reference, rk.money_flow_index, (high, low, close, volume), dict(rtol=1e-8, atol=1e-8)),
+]
+
+print("{:<12} {:>12} {:>12} {:>10}".format("function", "apply (s)", "kernel (s)", "speedup"))
+for name, reference, kernel, args, tol in cases:
+    expected, reference_time = timed(reference, *args, timeperiod)
+    result, kernel_time = timed(kernel, *args, timeperiod)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), **tol)
+    print("{:<12} {:>12.2f} {:>12.4f} {:>9.0f}x".format(name, reference_time, kernel_time, reference_time / kernel_time))
+
+# MINMAXINDEX is one argmin and one argmax pass
+_, kernel_time = timed(lambda: (rk.rolling_argmin(ticks, timeperiod), rk.rolling_argmax(ticks, timeperiod)))
+print("{:<12} {:>12} {:>12.4f}".format("MINMAXINDEX", "", kernel_time))
+
+# the previous MFI compared raw money flows within each window instead of typical prices
+sl = slice(0, mfi_apply_rows)
+_, apply_time = timed(MFI_apply, high[sl], low[sl], close[sl], volume[sl], timeperiod)
+print("Previous MFI rolling apply: {:.2f}s for {} rows (~{:.0f}s for {})".format(
+    apply_time, mfi_apply_rows, apply_time * rows / mfi_apply_rows, rows))
@@ -0,0 +1,73 @@
+# Screens 3,000 synthetic tickers with the panel screener and checks the last date against
+# the per-ticker loop of find_stocks/minervini_screener.py (with price-ratio returns).
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import screener as sr
+
+num_tickers = 3000
+num_days = 504
+
+rng = np.random.default_rng(1)
+index = pd.bdate_range("2022-01-03", periods=num_days)
+tickers = ["T{:04d}".format(i) for i in range(num_tickers)]
+drift = rng.normal(0.0005, 0.001, num_tickers)
+close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(drift, 0.02, (num_days, num_tickers)), axis=0)),
+                     index=index, columns=tickers)
+high = close * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))
+low = close * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))
+index_close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, num_days))), index=index)
+
+
+def screen_loop(close, high, low, index_close):
+    index_return = index_close.iloc[-1] / index_close.iloc[-253]
+    multiples = [round(close[t].iloc[-1] / close[t].iloc[-253] / index_return, 2) for t in close.columns]
+    rs_df = pd.DataFrame({'Ticker': close.columns, 'Returns_multiple': multiples})
+    rs_df['RS_Rating'] = rs_df['Returns_multiple'].rank(pct=True) * 100
+    top_stocks = rs_df[rs_df['RS_Rating'] >= rs_df['RS_Rating'].quantile(0.70)]['Ticker']
+
+    rows = []
+    for stock in top_stocks:
+        df = pd.DataFrame({'Adj Close': close[stock], 'High': high[stock], 'Low': low[stock]})
+        df['SMA_50'] = df['Adj Close'].rolling(window=50).mean()
+        df['SMA_150'] = df['Adj Close'].rolling(window=150).mean()
+        df['SMA_200'] = df['Adj Close'].rolling(window=200).mean()
+        current_close = df['Adj Close'].iloc[-1]
+        low_52_week = df['Low'].rolling(window=260).min().iloc[-1]
+        high_52_week = df['High'].rolling(window=260).max().iloc[-1]
+        rs = rs_df[rs_df['Ticker'] == stock]['RS_Rating'].iloc[0]
+        conditions = [
+            current_close > df['SMA_150'].iloc[-1] > df['SMA_200'].iloc[-1],
+            df['SMA_150'].iloc[-1] > df['SMA_200'].iloc[-20],
+            current_close > df['SMA_50'].iloc[-1],
+            current_close >= 1.3 * low_52_week,
+            current_close >= 0.75 * high_52_week
+        ]
+        if all(conditions):
+            rows.append([stock, rs, df['SMA_50'].iloc[-1], df['SMA_150'].iloc[-1], df['SMA_200'].iloc[-1],
+                         low_52_week, high_52_week])
+    result = pd.DataFrame(rows, columns=["Stock"] + sr.TEMPLATE_COLUMNS)
+    return result.sort_values("RS_Rating", ascending=False).reset_index(drop=True)
+
+
+t0 = time.perf_counter()
+expected = screen_loop(close, high, low, index_close)
+loop_time = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+rs = sr.rs_rating(close, index_close, lookback=252, recent=None)
+template = sr.trend_template(close, high, low, rs=rs)
+result = sr.screen(template, rs)
+panel_time = time.perf_counter() - t0
+
+key = ["RS_Rating", "Stock"]
+pd.testing.assert_frame_equal(
+    result.sort_values(key).reset_index(drop=True), expected.sort_values(key).reset_index(drop=True)
+)
+print("{} tickers, {} passing on the last date".format(num_tickers, len(result)))
+print("Per-ticker loop (last date only): {:.2f}s".format(loop_time))
+print("Panel screener ({} dates): {:.3f}s ({:.0f}x)".format(num_days, panel_time, loop_time / panel_time))
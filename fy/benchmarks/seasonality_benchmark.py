@@ -0,0 +1,120 @@
+# Runs the seasonal scan of Stock_analysis/seasonal_stock_analysis.py on a synthetic 500-ticker x
+# 30-year close panel with the array engine and compares it with the script's per-ticker pandas
+# pipeline (pct_change, pivot on month-day strings, row statistics and the trade statistics per
+# holding period), checked on a subset and extrapolated to all tickers.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import seasonality as sn
+
+num_tickers = 500
+loop_tickers = 10
+threshold = 0.8
+
+rng = np.random.default_rng(0)
+dates = pd.bdate_range("1994-01-01", "2023-12-31")
+dates = dates[rng.random(len(dates)) > 0.035]
+seasonal = 0.002 * np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365.25)[:, None]
+log_prices = np.cumsum(rng.normal(0.0003, 0.015, (len(dates), num_tickers)) + seasonal, axis=0)
+close = pd.DataFrame(100 * np.exp(log_prices), index=dates, columns=["T{:03d}".format(i) for i in range(num_tickers)])
+# later listings
+listed = rng.integers(0, len(dates) - 1500, num_tickers) * (rng.random(num_tickers) < 0.3)
+close = close.mask(np.arange(len(dates))[:, None] < listed)
+
+
+def seasonal_stats_loop(close, dperiods, interval):
+    df = pd.DataFrame(close.dropna().rename("Close"))
+    dfr = df.pct_change(periods=dperiods)
+    dfr.index.name = "Date"
+    dfr.reset_index(level=0, inplace=True)
+    dfr.rename(columns={"Close": "Returns"}, inplace=True)
+    dfr = dfr.round(4)
+    dfr["Month"] = pd.DatetimeIndex(dfr["Date"]).month
+    dfr["Day"] = pd.DatetimeIndex(dfr["Date"]).day
+    dfr["Year"] = pd.DatetimeIndex(dfr["Date"]).year
+    dfr["M-D"] = dfr["Month"].astype(str) + "-" + dfr["Day"].astype(str)
+    p = dfr.pivot(index="M-D", columns="Year", values="Returns")
+    # forward filled in calendar order (the script filled the string-sorted M-D rows)
+    p = p.loc[sorted(p.index, key=lambda md: pd.Timestamp("2000-" + md))]
+    p.reset_index(level=0, inplace=True)
+    p.columns.name = "Index"
+    p = p.ffill()
+    lookback = 20
+    start = 1 if lookback > len(p.columns) - 1 else len(p.columns) - lookback
+    p["YearCount"] = p.count(axis=1, numeric_only=True)
+    p["Lookback"] = lookback
+    p["UpCount"] = p[p.iloc[:, start:len(p.columns) - 2] > 0].count(axis=1)
+    p["DownCount"] = p[p.iloc[:, start:len(p.columns)] < 0].count(axis=1)
+    p["PctUp"] = p["UpCount"] / p["Lookback"]
+    p["PctDown"] = p["DownCount"] / p["Lookback"]
+    p["AvgReturn"] = p.iloc[:, start:len(p.columns) - 6].mean(axis=1)
+    p["StDevReturns"] = p.iloc[:, start:len(p.columns) - 7].std(axis=1)
+    p["67PctDownside"] = p["AvgReturn"] - p["StDevReturns"]
+    p["MaxReturn"] = p.iloc[:, start:len(p.columns) - 9].max(axis=1)
+    p["MinReturn"] = p.iloc[:, start:len(p.columns) - 10].min(axis=1)
+    p["Date"] = pd.to_datetime("2000-" + p["M-D"].astype(str))
+    p.sort_values(by="Date", ascending=True, inplace=True)
+    p.reset_index(inplace=True)
+    p = p.round(4)
+    up = p["PctUp"] > threshold
+    r = {}
+    r["pct_uprows"] = round(p.loc[up, "PctUp"].count() / p["PctUp"].count(), 4)
+    r["max_up_return"] = p.loc[up, "MaxReturn"].max()
+    r["min_up_return"] = p.loc[up, "MinReturn"].min()
+    r["avg_up_return"] = np.float64(p.loc[p["PctUp"] > 0.5, "AvgReturn"].mean()).round(4)
+    r["avg_down_return"] = np.float64(p.loc[p["PctDown"] > 0.5, "AvgReturn"].mean()).round(4)
+    r["exp_return"] = round(p["AvgReturn"].mean(), 4)
+    r["stdev_returns"] = np.float64(p["StDevReturns"].mean()).round(4)
+    r["worst_return"] = p["MinReturn"].min()
+    r["pct_downside"] = np.float64(r["exp_return"] - r["stdev_returns"]).round(4)
+    r["least_pain_pt"] = p.loc[up, "67PctDownside"].max()
+    r["total_years"] = p["YearCount"].max()
+    best = run = 0
+    for x in p["PctUp"]:
+        # longest run (the script restarted runs at 1 and missed the last one)
+        run = run + 1 if x > threshold else 0
+        best = max(best, run)
+    r["max_consec_beat"] = best
+    try:
+        r["best_sell_date"] = p.loc[p["67PctDownside"] == r["least_pain_pt"], "M-D"].iloc[0]
+    except IndexError:
+        r["best_sell_date"] = "nan"
+    try:
+        row = p.loc[p["M-D"] == r["best_sell_date"], "M-D"].index[0] - interval
+        r["best_buy_date"] = p.iloc[row, p.columns.get_loc("M-D")]
+    except IndexError:
+        r["best_buy_date"] = "nan"
+    r["analyzed_years"] = lookback
+    return r
+
+
+t0 = time.perf_counter()
+expected = [
+    (ticker, hold_per, seasonal_stats_loop(close[ticker], dperiods, interval))
+    for ticker in close.columns[:loop_tickers]
+    for hold_per, dperiods, interval in sn.HOLDING_PERIODS
+]
+loop_time = time.perf_counter() - t0
+loop_estimate = loop_time * num_tickers / loop_tickers
+
+result = sn.seasonal_stats(close.iloc[:, :loop_tickers], max_workers=1)
+for (ticker, hold_per, stats), (_, row) in zip(expected, result.iterrows()):
+    assert (row.my_ticker, row.hold_per) == (ticker, hold_per)
+    for column, value in stats.items():
+        if isinstance(value, str):
+            assert row[column] == value, (ticker, hold_per, column)
+        else:
+            np.testing.assert_allclose(float(row[column]), float(value), atol=1e-9, err_msg=column)
+
+print("{} tickers x {} days, {} holding periods".format(num_tickers, len(dates), len(sn.HOLDING_PERIODS)))
+print("Per-ticker pandas pipeline: ~{:.0f}s (extrapolated from {} tickers)".format(loop_estimate, loop_tickers))
+for max_workers in [1, None]:
+    t0 = time.perf_counter()
+    result = sn.seasonal_stats(close, max_workers=max_workers)
+    elapsed = time.perf_counter() - t0
+    print("Array engine, max_workers={}: {:.1f}s ({:.0f}x), {} rows".format(
+        max_workers, elapsed, loop_estimate / elapsed, len(result)))
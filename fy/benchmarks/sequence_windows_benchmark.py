@@ -0,0 +1,94 @@
+# Builds LSTM training windows for a synthetic 500-ticker x 10-year panel with the shared
+# windowing utility and compares it with the loops of machine_learning/deep_learning_bot.py
+# (split_sequences and the element-wise normalize_data, checked on a subset and extrapolated).
+import numpy as np
+import pandas as pd
+import tempfile
+import tracemalloc
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import sequence_windows as sw
+
+num_days = 2520
+num_tickers = 500
+num_features = 5
+seq_len = 60
+loop_tickers = 20
+
+rng = np.random.default_rng(0)
+panel = (100 * np.exp(np.cumsum(rng.normal(0, 0.01, (num_days, num_tickers, num_features)), axis=0))).astype(np.float32)
+# later listings: the first days of some tickers are missing
+listed = rng.integers(0, 1000, num_tickers) * (rng.random(num_tickers) < 0.2)
+panel[np.arange(num_days)[:, None] < listed] = np.nan
+
+
+def normalize_data_loop(dataset):
+    minmax = []
+    for column in dataset:
+        minmax.append([min(dataset[column]), max(dataset[column])])
+    for column in dataset:
+        values = dataset[column].values
+        for i in range(len(values)):
+            values[i] = (values[i] - minmax[column][0]) / (minmax[column][1] - minmax[column][0])
+        dataset[column] = values
+    return dataset, minmax
+
+
+def split_sequences_loop(sequences, seq_len):
+    X, y = [], []
+    for i in range(len(sequences)):
+        end_ix = i + seq_len
+        if end_ix > len(sequences) - 1:
+            break
+        X.append(sequences[i:end_ix, :])
+        y.append(sequences[end_ix, :])
+    return np.array(X), np.array(y)
+
+
+t0 = time.perf_counter()
+expected = []
+for k in range(loop_tickers):
+    values = panel[listed[k]:, k]
+    scaled, minmax = normalize_data_loop(pd.DataFrame(values.copy()))
+    expected.append(split_sequences_loop(scaled.values, seq_len))
+loop_time = time.perf_counter() - t0
+loop_estimate = loop_time * num_tickers / loop_tickers
+
+t0 = time.perf_counter()
+scaler = sw.MinMaxScaler().fit(panel)
+scaled = scaler.transform(panel)
+scale_time = time.perf_counter() - t0
+starts, tickers = sw.window_index(scaled, seq_len)
+for k in range(loop_tickers):
+    X, y = sw.split_sequences(scaled[listed[k]:, k], seq_len)
+    np.testing.assert_allclose(X, expected[k][0], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(y, expected[k][1], rtol=1e-5, atol=1e-6)
+    assert (tickers == k).sum() == len(expected[k][0])
+
+full_bytes = len(starts) * seq_len * num_features * panel.itemsize
+print("{} tickers x {} days x {} features, {} windows of {} days".format(
+    num_tickers, num_days, num_features, len(starts), seq_len))
+print("Loops: ~{:.0f}s (extrapolated from {} tickers), {:.1f} GB of windows".format(
+    loop_estimate, loop_tickers, full_bytes / 1024 ** 3))
+
+tracemalloc.start()
+t0 = time.perf_counter()
+num_windows = 0
+for X, y in sw.window_batches(scaled, seq_len, batch_size=1024, target=[3], shuffle=True, seed=0):
+    num_windows += len(X)
+batch_time = time.perf_counter() - t0
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+assert num_windows == len(starts)
+print("Scaling: {:.2f}s, all windows in batches of 1024: {:.1f}s ({:.0f}x), peak {:.0f} MB".format(
+    scale_time, batch_time, loop_estimate / (scale_time + batch_time), peak / 1024 ** 2))
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "scaler.npz")
+    scaler.save(path)
+    loaded = sw.MinMaxScaler.load(path)
+    np.testing.assert_array_equal(loaded.transform(panel[-seq_len:]), scaled[-seq_len:])
+    np.testing.assert_allclose(loaded.inverse_transform(scaled[-1:]), panel[-1:], rtol=1e-5)
@@ -0,0 +1,128 @@
+# Feeds 500 new bars to the live indicators the way the alert scripts did (recompute the ta_functions
+# indicator on the last year of bars for every new bar) and with the streaming_indicators state
+# objects seeded on the year of history, checking that every value matches the batch function.
+# The equality is then checked over several seeds and parameter sets, on series with missing
+# (NaN) values and price gaps.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import ta_functions as ta
+import streaming_indicators as si
+
+history_days = 252
+new_bars = 500
+
+
+
+def make_bars(seed, n, nan_fraction=0.0, gap_fraction=0.0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.02, n)
+    # overnight gaps: the bar opens far from the previous close, outside its high-low range
+    gaps = rng.random(n) < gap_fraction
+    returns[gaps] += rng.choice([-1, 1], gaps.sum()) * rng.uniform(0.05, 0.15, gaps.sum())
+    close = 100 * np.exp(np.cumsum(returns))
+    bars = pd.DataFrame({
+        "High": close * np.exp(np.abs(rng.normal(0, 0.01, n))),
+        "Low": close * np.exp(-np.abs(rng.normal(0, 0.01, n))),
+        "Close": close,
+        "Volume": rng.integers(1_000, 1_000_000, n).astype(float),
+    }, index=pd.bdate_range("2020-01-01", periods=n))
+    for column in bars:
+        bars.loc[rng.random(n) < nan_fraction, column] = np.nan
+    return bars
+
+
+n = history_days + new_bars
+bars = make_bars(0, n)
+
+indicators = {
+    "SMA": (lambda: si.SMA(20), lambda d: ta.SMA(d["Close"], 20)),
+    "EMA": (lambda: si.EMA(12), lambda d: ta.EMA(d["Close"], 12)),
+    "RSI": (lambda: si.RSI(14), lambda d: ta.RSI(d["Close"], 14)),
+    "MACD": (lambda: si.MACD(), lambda d: ta.MACD(d["Close"])),
+    "BBANDS": (lambda: si.BBANDS(20), lambda d: ta.BBANDS(d["Close"], 20)),
+    "ATR": (lambda: si.ATR(14), lambda d: ta.ATR(d["High"], d["Low"], d["Close"], 14)),
+    "STOCH": (lambda: si.STOCH(), lambda d: ta.STOCH(d["High"], d["Low"], d["Close"])),
+    "OBV": (lambda: si.OBV(), lambda d: ta.OBV(d["Close"], d["Volume"])),
+    "VWAP": (lambda: si.VWAP(), lambda d: ta.VWAP(d["High"], d["Low"], d["Close"], d["Volume"])),
+}
+
+
+def last_value(result):
+    if isinstance(result, tuple):
+        return tuple(r.iloc[-1] for r in result)
+    return result.iloc[-1]
+
+
+rows = bars.to_dict("records")
+print("{} days of history, {} new bars".format(history_days, new_bars))
+for name, (streaming, batch) in indicators.items():
+    t0 = time.perf_counter()
+    for t in range(history_days, n):
+        last_value(batch(bars.iloc[t + 1 - history_days:t + 1]))
+    recompute_time = time.perf_counter() - t0
+
+    indicator = streaming()
+    t0 = time.perf_counter()
+    indicator.seed(bars.iloc[:history_days])
+    seed_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    values = [indicator.update(row) for row in rows[history_days:]]
+    update_time = time.perf_counter() - t0
+
+    # the streaming values match the batch function over the whole series
+    reference = batch(bars)
+    reference = np.column_stack(reference if isinstance(reference, tuple) else [reference])[-new_bars:]
+    np.testing.assert_allclose(np.array(values, dtype=float).reshape(reference.shape), reference, rtol=1e-9, atol=1e-9)
+    print("{:<7} recompute {:8.1f} us/bar, streaming {:5.1f} us/bar ({:.0f}x), seed {:.1f} ms".format(
+        name, recompute_time / new_bars * 1e6, update_time / new_bars * 1e6, recompute_time / update_time,
+        seed_time * 1e3))
+
+
+def wilder_atr(d, timeperiod):
+    return ta.TRANGE(d["High"], d["Low"], d["Close"]).ewm(alpha=1 / timeperiod, adjust=False).mean()
+
+
+cases = []
+for p in (2, 5, 20, 50):
+    cases.append(("SMA({})".format(p), lambda p=p: si.SMA(p), lambda d, p=p: ta.SMA(d["Close"], p)))
+    cases.append(("EMA({})".format(p), lambda p=p: si.EMA(p), lambda d, p=p: ta.EMA(d["Close"], p)))
+for p in (2, 14, 30):
+    for wilder in (False, True):
+        cases.append(("RSI({}, wilder={})".format(p, wilder), lambda p=p, w=wilder: si.RSI(p, wilder=w),
+                      lambda d, p=p, w=wilder: ta.RSI(d["Close"], p, wilder=w)))
+    cases.append(("ATR({})".format(p), lambda p=p: si.ATR(p),
+                  lambda d, p=p: ta.ATR(d["High"], d["Low"], d["Close"], p)))
+    cases.append(("ATR({}, wilder=True)".format(p), lambda p=p: si.ATR(p, wilder=True),
+                  lambda d, p=p: wilder_atr(d, p)))
+for params in ((12, 26, 9), (5, 35, 5), (3, 10, 16)):
+    cases.append(("MACD{}".format(params), lambda a=params: si.MACD(*a), lambda d, a=params: ta.MACD(d["Close"], *a)))
+for params in ((5, 2, 2), (20, 2, 2), (50, 1, 3)):
+    cases.append(("BBANDS{}".format(params), lambda a=params: si.BBANDS(*a),
+                  lambda d, a=params: ta.BBANDS(d["Close"], *a)))
+for k, sk, sd in ((14, 3, 3), (5, 3, 5), (21, 5, 3)):
+    cases.append(("STOCH{}".format((k, sk, sd)), lambda a=(k, sk, sd): si.STOCH(*a),
+                  lambda d, a=(k, sk, sd): ta.STOCH(d["High"], d["Low"], d["Close"], fastk_period=a[0],
+                                                    slowk_period=a[1], slowd_period=a[2])))
+cases.append(("OBV", si.OBV, lambda d: ta.OBV(d["Close"], d["Volume"])))
+cases.append(("VWAP", si.VWAP, lambda d: ta.VWAP(d["High"], d["Low"], d["Close"], d["Volume"])))
+
+seeds = range(5)
+series = [("clean", 0.0, 0.0), ("5% NaN", 0.05, 0.0), ("gaps", 0.0, 0.05), ("NaN and gaps", 0.05, 0.05)]
+for seed in seeds:
+    for label, nan_fraction, gap_fraction in series:
+        test_bars = make_bars(seed, 400, nan_fraction, gap_fraction)
+        for name, streaming, batch in cases:
+            # seed on the first half and stream the rest, so both code paths are covered
+            indicator = streaming()
+            indicator.seed(test_bars.iloc[:200])
+            values = [indicator.update(row) for row in test_bars.iloc[200:].to_dict("records")]
+            reference = batch(test_bars)
+            reference = np.column_stack(reference if isinstance(reference, tuple) else [reference])[200:]
+            np.testing.assert_allclose(np.array(values, dtype=float).reshape(reference.shape), reference,
+                                       rtol=1e-9, atol=1e-9, err_msg="{}, seed {}, {}".format(name, seed, label))
+print("streaming == batch for {} indicator settings x {} seeds x {} series".format(len(cases), len(seeds), len(series)))
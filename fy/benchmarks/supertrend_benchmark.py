@@ -0,0 +1,140 @@
+# Computes SuperTrend and the Parabolic SAR for 20 years of daily bars of 500 tickers with the
+# band_kernels behind ta_functions.SUPERTREND / ta_functions.SAR and compares them with the row by
+# row loops of technical_indicators/super_trend.py (per ticker, on a few tickers and extrapolated),
+# checking that both give the same values.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import band_kernels as bk
+
+num_days = 252 * 20
+num_tickers = 500
+loop_tickers = 3
+n = 7
+f = 3
+
+rng = np.random.default_rng(0)
+dates = pd.bdate_range("2004-01-01", periods=num_days)
+tickers = ["T{}".format(i) for i in range(num_tickers)]
+close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (num_days, num_tickers)), axis=0)),
+                     index=dates, columns=tickers)
+high = close * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))
+low = close * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))
+# tickers listed later in the period start with missing bars
+for i, first in enumerate(rng.integers(0, num_days // 2, num_tickers // 5)):
+    for frame in (close, high, low):
+        frame.iloc[:first, i] = np.nan
+
+
+def supertrend_loop(df):
+    # technical_indicators/super_trend.py, row by row; the ATR is seeded with the average of the
+    # first n true ranges and the final lower band compares the close with the previous final band
+    df = df.copy()
+    df["H-L"] = abs(df["High"] - df["Low"])
+    df["H-PC"] = abs(df["High"] - df["Close"].shift(1))
+    df["L-PC"] = abs(df["Low"] - df["Close"].shift(1))
+    df["TR"] = df[["H-L", "H-PC", "L-PC"]].max(axis=1, skipna=False)
+    idx = df.index
+    s = df["TR"].first_valid_index()
+    s = idx.get_loc(s)
+    df["ATR"] = np.nan
+    df.loc[idx[s + n - 1], "ATR"] = df["TR"].iloc[s:s + n].mean()
+    for i in range(s + n, len(df)):
+        df.loc[idx[i], "ATR"] = (df.loc[idx[i - 1], "ATR"] * (n - 1) + df.loc[idx[i], "TR"]) / n
+
+    df["BASIC UPPERBAND"] = (df["High"] + df["Low"]) / 2 + (f * df["ATR"])
+    df["BASIC LOWERBAND"] = (df["High"] + df["Low"]) / 2 - (f * df["ATR"])
+    df["FINAL UPPERBAND"] = df["BASIC UPPERBAND"]
+    df["FINAL LOWERBAND"] = df["BASIC LOWERBAND"]
+    first = s + n - 1
+    for i in range(first + 1, len(df)):
+        if df.loc[idx[i - 1], "Close"] <= df.loc[idx[i - 1], "FINAL UPPERBAND"]:
+            df.loc[idx[i], "FINAL UPPERBAND"] = min(df.loc[idx[i], "BASIC UPPERBAND"], df.loc[idx[i - 1], "FINAL UPPERBAND"])
+        else:
+            df.loc[idx[i], "FINAL UPPERBAND"] = df.loc[idx[i], "BASIC UPPERBAND"]
+    for i in range(first + 1, len(df)):
+        if df.loc[idx[i - 1], "Close"] >= df.loc[idx[i - 1], "FINAL LOWERBAND"]:
+            df.loc[idx[i], "FINAL LOWERBAND"] = max(df.loc[idx[i], "BASIC LOWERBAND"], df.loc[idx[i - 1], "FINAL LOWERBAND"])
+        else:
+            df.loc[idx[i], "FINAL LOWERBAND"] = df.loc[idx[i], "BASIC LOWERBAND"]
+
+    df["SUPERTREND"] = np.nan
+    if df.loc[idx[first], "Close"] <= df.loc[idx[first], "FINAL UPPERBAND"]:
+        df.loc[idx[first], "SUPERTREND"] = df.loc[idx[first], "FINAL UPPERBAND"]
+    else:
+        df.loc[idx[first], "SUPERTREND"] = df.loc[idx[first], "FINAL LOWERBAND"]
+    for i in range(first + 1, len(df)):
+        prev = df.loc[idx[i - 1], "SUPERTREND"]
+        c = df.loc[idx[i], "Close"]
+        if prev == df.loc[idx[i - 1], "FINAL UPPERBAND"]:
+            band = "FINAL UPPERBAND" if c <= df.loc[idx[i], "FINAL UPPERBAND"] else "FINAL LOWERBAND"
+        else:
+            band = "FINAL LOWERBAND" if c >= df.loc[idx[i], "FINAL LOWERBAND"] else "FINAL UPPERBAND"
+        df.loc[idx[i], "SUPERTREND"] = df.loc[idx[i], band]
+    return df["SUPERTREND"]
+
+
+def sar_loop(high, low, acceleration=0.02, maximum=0.2):
+    # Wilder's Parabolic SAR on plain floats, one ticker at a time
+    high, low = high.dropna(), low.dropna()
+    h, l = high.to_numpy(), low.to_numpy()
+    result = pd.Series(np.nan, index=high.index)
+    long = not (l[0] - l[1] > h[1] - h[0] and l[0] - l[1] > 0)
+    sar, extreme, af = (l[0], h[1], acceleration) if long else (h[0], l[1], acceleration)
+    result.iloc[1] = sar
+    for i in range(2, len(h)):
+        sar = sar + af * (extreme - sar)
+        if long:
+            sar = min(sar, l[i - 1], l[i - 2])
+            if l[i] < sar:
+                long, sar, extreme, af = False, extreme, l[i], acceleration
+            elif h[i] > extreme:
+                extreme, af = h[i], min(af + acceleration, maximum)
+        else:
+            sar = max(sar, h[i - 1], h[i - 2])
+            if h[i] > sar:
+                long, sar, extreme, af = True, extreme, h[i], acceleration
+            elif l[i] < extreme:
+                extreme, af = l[i], min(af + acceleration, maximum)
+        result.iloc[i] = sar
+    return result
+
+
+def supertrend_kernels(high, low, close):
+    # what ta_functions.SUPERTREND computes, without the pandas_datareader / yfinance imports
+    prev_close = close.shift()
+    true_range = np.maximum(np.maximum(high - low, (high - prev_close).abs()), (low - prev_close).abs())
+    atr = bk.wilder_average(true_range, n)
+    median_price = (high + low) / 2
+    return bk.trailing_bands(median_price + f * atr, median_price - f * atr, close)[0]
+
+
+checked = tickers[:1] + tickers[-loop_tickers + 1:]
+t0 = time.perf_counter()
+expected = {t: supertrend_loop(pd.DataFrame({"High": high[t], "Low": low[t], "Close": close[t]})) for t in checked}
+loop_time = (time.perf_counter() - t0) / len(checked) * num_tickers
+
+t0 = time.perf_counter()
+supertrend = supertrend_kernels(high, low, close)
+kernel_time = time.perf_counter() - t0
+for t in checked:
+    np.testing.assert_allclose(supertrend[t].to_numpy(), expected[t].to_numpy(), rtol=1e-12)
+
+t0 = time.perf_counter()
+expected = {t: sar_loop(high[t], low[t]) for t in checked}
+sar_loop_time = (time.perf_counter() - t0) / len(checked) * num_tickers
+t0 = time.perf_counter()
+sar = bk.parabolic_sar(high, low)
+sar_time = time.perf_counter() - t0
+for t in checked:
+    np.testing.assert_allclose(sar[t].to_numpy(), expected[t].reindex(dates).to_numpy(), rtol=1e-12)
+
+print("{} days x {} tickers".format(num_days, num_tickers))
+print("SuperTrend: row loop {:.0f} s (extrapolated from {} tickers), band kernels {:.2f} s ({:.0f}x)".format(
+    loop_time, len(checked), kernel_time, loop_time / kernel_time))
+print("Parabolic SAR: float loop {:.1f} s (extrapolated), band kernel {:.2f} s ({:.0f}x)".format(
+    sar_loop_time, sar_time, sar_loop_time / sar_time))
@@ -0,0 +1,75 @@
+# Computes ta_functions indicators for a universe of tickers with one call per ticker (Series)
+# and with one batched call on (date x ticker) DataFrames, for 500 and 3,000 columns, and
+# checks that both return the same values.
+import numpy as np
+import pandas as pd
+import time
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import ta_functions as ta
+
+num_days = 2520
+column_counts = [500, 3000]
+
+
+def make_panel(num_tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2014-01-01", periods=num_days)
+    columns = ["T{:04d}".format(i) for i in range(num_tickers)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (num_days, num_tickers)), axis=0))
+    high = close * np.exp(np.abs(rng.normal(0, 0.01, close.shape)))
+    low = close * np.exp(-np.abs(rng.normal(0, 0.01, close.shape)))
+    volume = rng.integers(1_000, 1_000_000, close.shape).astype(float)
+    frame = lambda values: pd.DataFrame(values, index=index, columns=columns)
+    return {"High": frame(high), "Low": frame(low), "Close": frame(close), "Volume": frame(volume)}
+
+
+indicators = {
+    "SMA": lambda p: ta.SMA(p["Close"], 20),
+    "EMA": lambda p: ta.EMA(p["Close"], 20),
+    "RSI": lambda p: ta.RSI(p["Close"], 14),
+    "BBANDS": lambda p: ta.BBANDS(p["Close"], 20),
+    "STOCH": lambda p: ta.STOCH(p["High"], p["Low"], p["Close"]),
+    "MACD": lambda p: ta.MACD(p["Close"]),
+    "CCI": lambda p: ta.CCI(p["High"], p["Low"], p["Close"]),
+    "ATR": lambda p: ta.ATR(p["High"], p["Low"], p["Close"]),
+    "ADX": lambda p: ta.ADX(p["High"], p["Low"], p["Close"]),
+    "WILLR": lambda p: ta.WILLR(p["High"], p["Low"], p["Close"]),
+    "OBV": lambda p: ta.OBV(p["Close"], p["Volume"]),
+    "MFI": lambda p: ta.MFI(p["High"], p["Low"], p["Close"], p["Volume"]),
+    "LINEARREG": lambda p: ta.LINEARREG(p["Close"]),
+    "MAXINDEX": lambda p: ta.MAXINDEX(p["Close"]),
+}
+
+
+def as_tuple(result):
+    return result if isinstance(result, tuple) else (result,)
+
+
+for num_tickers in column_counts:
+    panel = make_panel(num_tickers)
+    print("{} days x {} tickers".format(num_days, num_tickers))
+    print("{:<12} {:>14} {:>12} {:>10}".format("indicator", "per ticker (s)", "batched (s)", "speedup"))
+    total_loop = total_batched = 0.0
+    for name, indicator in indicators.items():
+        t0 = time.perf_counter()
+        per_ticker = {
+            t: as_tuple(indicator({field: frame[t] for field, frame in panel.items()}))
+            for t in panel["Close"].columns
+        }
+        loop_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batched = as_tuple(indicator(panel))
+        batched_time = time.perf_counter() - t0
+
+        for i, output in enumerate(batched):
+            expected = pd.DataFrame({t: per_ticker[t][i] for t in output.columns})
+            np.testing.assert_allclose(output.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9)
+
+        total_loop += loop_time
+        total_batched += batched_time
+        print("{:<12} {:>14.2f} {:>12.3f} {:>9.0f}x".format(name, loop_time, batched_time, loop_time / batched_time))
+    print("{:<12} {:>14.2f} {:>12.3f} {:>9.0f}x\n".format("total", total_loop, total_batched, total_loop / total_batched))
@@ -0,0 +1,143 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import streaming_indicators as si
+
+FIELDS = ("High", "Low", "Close", "Volume")
+BREADTH_COLUMNS = ["Advances", "Declines", "Unchanged", "Net_Advances", "AD_Line", "Up_Volume",
+                   "Down_Volume", "New_Highs", "New_Lows", "RANA", "McClellan_Oscillator",
+                   "McClellan_Summation", "TRIN"]
+
+
+def _daily(prev_close, high, low, close, volume, high_max, low_min, smas):
+    # breadth of every row of (date x ticker) arrays: counts across the tickers quoted on both
+    # the previous and the current bar, new highs / lows against the window extremes and the
+    # share of tickers above each moving average (among those that have one)
+    change = close - prev_close
+    up = change > 0
+    down = change < 0
+    advances = up.sum(axis=1).astype(float)
+    declines = down.sum(axis=1).astype(float)
+    volume = np.where(np.isnan(volume), 0.0, volume)
+    up_volume = np.where(up, volume, 0.0).sum(axis=1)
+    down_volume = np.where(down, volume, 0.0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = {
+            "Advances": advances,
+            "Declines": declines,
+            "Unchanged": (change == 0).sum(axis=1).astype(float),
+            "Net_Advances": advances - declines,
+            "Up_Volume": up_volume,
+            "Down_Volume": down_volume,
+            "New_Highs": (high >= high_max).sum(axis=1).astype(float),
+            "New_Lows": (low <= low_min).sum(axis=1).astype(float),
+            # Ratio Adjusted Net Advances: (advances - declines) / (advances + declines) * 1000
+            "RANA": (advances - declines) / (advances + declines) * 1000,
+            # Arms index: advance / decline ratio over the up / down volume ratio
+            "TRIN": (advances / declines) / (up_volume / down_volume),
+        }
+        for n, sma in smas.items():
+            daily["Pct_Above_{}MA".format(n)] = (
+                100 * (close > sma).sum(axis=1) / (~np.isnan(sma)).sum(axis=1)
+            )
+    return daily
+
+
+def breadth(panel, window=252, ma_periods=(50, 200), fast=19, slow=39):
+    """
+    Market Breadth.
+    Breadth of a universe from its (date x ticker) OHLCV panel ({field: DataFrame}, as
+    price_store.get_prices returns it), for every date in one pass: advances, declines and
+    unchanged against the previous close, the advance / decline line, up and down volume, new
+    `window`-bar highs and lows, the Ratio Adjusted Net Advances (RANA), the McClellan
+    oscillator (`fast` EMA - `slow` EMA of the RANA) and summation index, the TRIN and the
+    percentage of tickers above each of their `ma_periods` moving averages.
+    """
+    close = panel["Close"]
+    high = panel["High"].reindex_like(close)
+    low = panel["Low"].reindex_like(close)
+    volume = panel["Volume"].reindex_like(close)
+    smas = {n: close.rolling(n).mean().to_numpy() for n in ma_periods}
+    daily = _daily(
+        close.shift().to_numpy(), high.to_numpy(), low.to_numpy(), close.to_numpy(),
+        volume.to_numpy(dtype=float), high.rolling(window).max().to_numpy(),
+        low.rolling(window).min().to_numpy(), smas,
+    )
+    result = pd.DataFrame(daily, index=close.index)
+    result["AD_Line"] = result["Net_Advances"].cumsum()
+    oscillator = (result["RANA"].ewm(span=fast, adjust=False).mean()
+                  - result["RANA"].ewm(span=slow, adjust=False).mean())
+    result["McClellan_Oscillator"] = oscillator
+    result["McClellan_Summation"] = oscillator.cumsum()
+    pct_columns = ["Pct_Above_{}MA".format(n) for n in ma_periods]
+    return result[BREADTH_COLUMNS + pct_columns]
+
+
+class BreadthEngine:
+    """
+    Incremental Breadth.
+    Keeps the last bars of a universe so that the breadth of a new day is computed from that
+    day's bars alone, with the same values `breadth` gives for the whole history. `seed(panel)`
+    computes the history with `breadth` and keeps its state; `update(bar, date)` takes the next
+    day's bar ({field: Series indexed by ticker}) and returns its breadth as a Series. Tickers
+    are the columns of the seed panel; tickers missing from a bar count as not quoted.
+    """
+
+    def __init__(self, window=252, ma_periods=(50, 200), fast=19, slow=39):
+        self.window = window
+        self.ma_periods = tuple(ma_periods)
+        self.fast = fast
+        self.slow = slow
+        self.tickers = None
+        self.bars = deque(maxlen=max((window,) + self.ma_periods))
+        self.ema_fast = si.EMA(fast)
+        self.ema_slow = si.EMA(slow)
+        self.ad_line = 0.0
+        self.summation = 0.0
+        self.history = None
+
+    def _row(self, bar):
+        return {field: np.asarray(bar[field].reindex(self.tickers), dtype=float) for field in FIELDS}
+
+    def seed(self, panel):
+        close = panel["Close"]
+        self.tickers = close.columns
+        self.history = breadth(panel, self.window, self.ma_periods, self.fast, self.slow)
+        for date in close.index[-self.bars.maxlen:]:
+            self.bars.append(self._row({field: panel[field].loc[date] for field in FIELDS}))
+        self.ema_fast.seed(self.history["RANA"])
+        self.ema_slow.seed(self.history["RANA"])
+        self.ad_line = self.history["AD_Line"].iloc[-1]
+        summation = self.history["McClellan_Summation"].dropna()
+        self.summation = summation.iloc[-1] if len(summation) else 0.0
+        return self.history
+
+    def _window(self, field, n, reduce):
+        # statistic of the last n bars, NaN when there are fewer or one of them is missing
+        if len(self.bars) < n:
+            return np.full((1, len(self.tickers)), np.nan)
+        values = np.stack([b[field] for b in list(self.bars)[-n:]])
+        return reduce(values, axis=0)[None, :]
+
+    def update(self, bar, date=None):
+        row = self._row(bar)
+        prev_close = self.bars[-1]["Close"] if self.bars else np.full(len(self.tickers), np.nan)
+        self.bars.append(row)
+        smas = {n: self._window("Close", n, np.mean) for n in self.ma_periods}
+        daily = _daily(
+            prev_close[None, :], row["High"][None, :], row["Low"][None, :], row["Close"][None, :],
+            row["Volume"][None, :], self._window("High", self.window, np.max),
+            self._window("Low", self.window, np.min), smas,
+        )
+        daily = {name: value[0] for name, value in daily.items()}
+        self.ad_line += daily["Net_Advances"]
+        daily["AD_Line"] = self.ad_line
+        oscillator = self.ema_fast.update(daily["RANA"]) - self.ema_slow.update(daily["RANA"])
+        daily["McClellan_Oscillator"] = oscillator
+        if not np.isnan(oscillator):
+            self.summation += oscillator
+        daily["McClellan_Summation"] = self.summation if not np.isnan(oscillator) else np.nan
+        pct_columns = ["Pct_Above_{}MA".format(n) for n in self.ma_periods]
+        return pd.Series(daily, name=date)[BREADTH_COLUMNS + pct_columns]
@@ -0,0 +1,31 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+def map_column_chunks(func, frame, args=(), key="Ticker", columns=None, by=(), ascending=(),
+                      max_workers=None, chunk_size=100):
+    """
+    Column Chunk Map.
+    Runs `func(chunk, *args)` on chunks of `chunk_size` columns of a (date x ticker) `frame`,
+    spread over a process pool when there is more than one chunk, and concatenates the frames it
+    returns. Rows are ordered by the position of their `key` column in `frame`, then by `by`
+    (with `ascending` per column), and limited to `columns`; an empty `frame` gives an empty
+    result with those columns. `func` must be a module-level function so the pool can pickle it.
+    """
+    chunks = [frame.iloc[:, s:s + chunk_size] for s in range(0, frame.shape[1], chunk_size)]
+    if len(chunks) <= 1 or max_workers == 1:
+        results = [func(c, *args) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(func, c, *args) for c in chunks]
+            results = [f.result() for f in futures]
+    if not results:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(results, ignore_index=True)
+    order = {t: k for k, t in enumerate(frame.columns)}
+    result["order"] = result[key].map(order)
+    ascending = [True] + (list(ascending) if len(ascending) else [True] * len(by))
+    result = result.sort_values(["order", *by], ascending=ascending, na_position="last", kind="stable")
+    result = result[columns] if columns is not None else result.drop(columns="order")
+    return result.reset_index(drop=True)
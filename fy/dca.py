@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+
+
+def _as_frame(prices):
+    if isinstance(prices, pd.Series):
+        return prices.to_frame(prices.name if prices.name is not None else 0)
+    return prices
+
+
+def _growth(prices):
+    # value today of 1 invested at each date: the last price over the price at that date
+    last = prices.ffill().iloc[-1].to_numpy(dtype=float)
+    return last / prices.to_numpy(dtype=float)
+
+
+def installment_indices(index, periods=12, freq="30D"):
+    """
+    Installment Schedule.
+    Position in the trading dates `index` of every installment of a DCA plan started on every
+    date: installment k is k `freq` steps after the start, as pd.date_range(start, periods=periods,
+    freq=freq) gives it, bought on the first trading date on or after it. Returns (positions,
+    invested), two (periods x dates) arrays; installments falling on or after the last date are
+    not invested.
+    """
+    index = pd.DatetimeIndex(index)
+    offset = to_offset(freq)
+    if isinstance(offset, Tick):
+        target = index
+    else:
+        # anchored frequencies start on the first date on the offset, like pd.date_range
+        target = pd.DatetimeIndex([offset.rollforward(d) for d in index])
+    positions = np.empty((periods, len(index)), dtype=int)
+    invested = np.empty((periods, len(index)), dtype=bool)
+    for k in range(periods):
+        if k:
+            target = target + offset
+        invested[k] = target < index[-1]
+        positions[k] = np.minimum(index.searchsorted(target), len(index) - 1)
+    return positions, invested
+
+
+def lump_sum(prices, principal=10000):
+    """
+    Lump Sum.
+    Value on the last date of `principal` invested at every date of a price Series or (date x
+    ticker) panel.
+    """
+    frame = _as_frame(prices)
+    value = principal * _growth(frame)
+    if isinstance(prices, pd.Series):
+        return pd.Series(value[:, 0], index=prices.index, name=prices.name)
+    return pd.DataFrame(value, index=frame.index, columns=frame.columns)
+
+
+def dca_surface(prices, periods=(12,), freqs=("30D",), principal=10000):
+    """
+    DCA Surface.
+    Value on the last date of `principal` dollar cost averaged in `p` equal installments every
+    `freq`, started at every date, for every p in `periods` and freq in `freqs`, as a (freqs x
+    periods x dates x tickers) array. The installment schedule is computed once per frequency
+    and the values of all installment counts come from one running sum over the installments.
+    Money whose installment would fall on or after the last date is kept as cash.
+    """
+    prices = _as_frame(prices)
+    growth = _growth(prices)
+    periods = list(periods)
+    surface = np.empty((len(freqs), len(periods), len(prices), prices.shape[1]))
+    for f, freq in enumerate(freqs):
+        positions, invested = installment_indices(prices.index, max(periods), freq)
+        total = np.zeros(growth.shape)
+        count = np.zeros(len(prices))
+        for k in range(max(periods)):
+            total += np.where(invested[k][:, None], growth[positions[k]], 0.0)
+            count += invested[k]
+            for j, p in enumerate(periods):
+                if p == k + 1:
+                    surface[f, j] = principal / p * (total + (p - count)[:, None])
+    return surface
+
+
+def dollar_cost_average(prices, periods=12, freq="30D", principal=10000):
+    """
+    Dollar Cost Averaging.
+    Value on the last date of `principal` invested in `periods` installments every `freq`,
+    started at every date of a price Series or (date x ticker) panel (see `dca_surface`).
+    """
+    frame = _as_frame(prices)
+    value = dca_surface(frame, [periods], [freq], principal)[0, 0]
+    if isinstance(prices, pd.Series):
+        return pd.Series(value[:, 0], index=prices.index, name=prices.name)
+    return pd.DataFrame(value, index=frame.index, columns=frame.columns)
+
+
+def lump_sum_win_rate(prices, periods=(12,), freqs=("30D",)):
+    """
+    Lump Sum vs. DCA.
+    Percentage of the start dates on which the lump sum ends above dollar cost averaging, for
+    every (freq, periods) plan (rows) and ticker (columns). Start dates without a price are left
+    out.
+    """
+    prices = _as_frame(prices)
+    surface = dca_surface(prices, periods, freqs, principal=1)
+    lump = _growth(prices)
+    quoted = ~np.isnan(lump)
+    wins = ((lump > surface) & quoted).sum(axis=2) / quoted.sum(axis=0)
+    rows = pd.MultiIndex.from_product([list(freqs), list(periods)], names=["freq", "periods"])
+    return pd.DataFrame(100 * wins.reshape(len(rows), -1), index=rows, columns=prices.columns)
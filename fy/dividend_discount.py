@@ -0,0 +1,108 @@
+import numpy as np
+
+
+def dividend_paths(eps_next, eps_growth, payout_ratio=0.50):
+    """
+    Projected dividends of every growth scenario: next year's EPS grown by the yearly
+    `eps_growth` rates (last axis, years) and paid out at `payout_ratio`. `eps_next` and
+    `payout_ratio` broadcast against the scenario axes of `eps_growth`.
+    """
+    eps_growth = np.asarray(eps_growth, dtype=float)
+    eps_next = np.asarray(eps_next, dtype=float)[..., None]
+    payout_ratio = np.asarray(payout_ratio, dtype=float)[..., None]
+    return payout_ratio * ((eps_growth + 1).cumprod(axis=-1) * eps_next)
+
+
+def ddm_value(dividends, discount_rate, terminal_growth):
+    """
+    Dividend Discount Model.
+    Value of the projected `dividends` (last axis, years) of Stock_analysis/sp500_valuation.py:
+    dividend i discounted i years, plus a Gordon growth terminal value of the last dividend
+    growing at `terminal_growth` discounted over the whole horizon. All arguments broadcast
+    together (the years axis excluded), so a grid of scenarios is valued in one computation,
+    e.g. dividends of shape (g, 1, 1, years) with discount rates of shape (d, 1) and terminal
+    growths of shape (t,) give a (g, d, t) grid.
+    """
+    dividends = np.asarray(dividends, dtype=float)
+    discount_rate = np.asarray(discount_rate, dtype=float)
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+    years = dividends.shape[-1]
+    growth = (1 + discount_rate)[..., None] ** np.arange(years + 1)
+    pv_dividends = (dividends / growth[..., :years]).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terminal_value = dividends[..., -1] * (1 + terminal_growth) / (discount_rate - terminal_growth)
+    return pv_dividends + terminal_value / growth[..., years]
+
+
+def ddm_grid(eps_growths, eps_nexts, discount_rates, terminal_growths, payout_ratio=0.50):
+    """
+    Valuation Grid.
+    DDM values of every (growth scenario x discount rate x terminal growth) combination as a
+    (scenarios, discount rates, terminal growths) array; `eps_growths` is a (scenarios x years)
+    array of yearly EPS growth and `eps_nexts` the next-year EPS of every scenario.
+    """
+    dividends = dividend_paths(eps_nexts, eps_growths, payout_ratio)
+    discount_rates = np.asarray(discount_rates, dtype=float)
+    terminal_growths = np.asarray(terminal_growths, dtype=float)
+    return ddm_value(dividends[:, None, None, :], discount_rates[None, :, None], terminal_growths[None, None, :])
+
+
+def payouts(dividends, discount_rate, terminal_growth):
+    """
+    Yearly payouts of the DDM: the projected dividends with the terminal value added to the
+    last year (the "all_payouts" of Stock_analysis/sp500_valuation.py), broadcast like
+    `ddm_value`.
+    """
+    dividends = np.asarray(dividends, dtype=float)
+    discount_rate = np.asarray(discount_rate, dtype=float)[..., None]
+    terminal_growth = np.asarray(terminal_growth, dtype=float)[..., None]
+    shape = np.broadcast_shapes(dividends.shape, discount_rate.shape, terminal_growth.shape)
+    flows = np.array(np.broadcast_to(dividends, shape))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        flows[..., -1:] += dividends[..., -1:] * (1 + terminal_growth) / (discount_rate - terminal_growth)
+    return flows
+
+
+def _npv(values, rate):
+    # NPV of cash flows at times 0, 1, ... and its derivative with respect to the rate
+    t = np.arange(values.shape[-1])
+    discount = (1 + rate)[..., None] ** -t
+    npv = (values * discount).sum(axis=-1)
+    derivative = -(t * values * discount).sum(axis=-1) / (1 + rate)
+    return npv, derivative
+
+
+def irr(cash_flows, low=-0.99, high=10.0, tol=1e-12, maxiter=100):
+    """
+    Vectorized IRR.
+    Internal rate of return of every row of `cash_flows` (last axis: flows at times 0, 1, ...)
+    at once, by Newton steps safeguarded with bisection inside [low, high]. Rows whose NPV does
+    not change sign over the bracket have no IRR there and are NaN. For conventional flows (an
+    outlay followed by inflows) the root is unique and the same as numpy_financial.irr.
+    """
+    values = np.asarray(cash_flows, dtype=float)
+    shape = values.shape[:-1]
+    lo = np.full(shape, float(low))
+    hi = np.full(shape, float(high))
+    f_lo = _npv(values, lo)[0]
+    f_hi = _npv(values, hi)[0]
+    valid = np.sign(f_lo) * np.sign(f_hi) <= 0
+    rate = np.where(f_lo == 0, lo, np.where(f_hi == 0, hi, (lo + hi) / 2))
+    done = ~valid | (f_lo == 0) | (f_hi == 0)
+    for _ in range(maxiter):
+        if done.all():
+            break
+        f, derivative = _npv(values, rate)
+        # keep the root bracketed: replace the bound with the same sign as the NPV at the rate
+        same = np.sign(f) == np.sign(f_lo)
+        lo = np.where(same, rate, lo)
+        f_lo = np.where(same, f, f_lo)
+        hi = np.where(same, hi, rate)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = rate - f / derivative
+        inside = np.isfinite(newton) & (newton > np.minimum(lo, hi)) & (newton < np.maximum(lo, hi))
+        step = np.where(f == 0, rate, np.where(inside, newton, (lo + hi) / 2))
+        converged = (np.abs(step - rate) <= tol * (1 + np.abs(rate))) | (f == 0)
+        rate = np.where(done, rate, step)
+        done |= converged
+    return np.where(valid, rate, np.nan)
@@ -0,0 +1,173 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """
+    Transient failure worth retrying; `retry_after` (seconds) overrides the backoff if set.
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token Bucket rate limiter.
+    Allows bursts of up to `capacity` requests and `rate` requests per second sustained;
+    `acquire` blocks until a token is available. Thread-safe.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take `tokens` if available without blocking; returns whether they were taken.
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def batched(items, size):
+    """
+    Split `items` into lists of at most `size` (for sources with multi-ticker requests).
+    """
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class FetchScheduler:
+    """
+    Bounded concurrent fetcher.
+    Runs requests on a thread pool while enforcing, per host, a token-bucket rate limit
+    (`rate` per second, bursts of `burst`) and at most `max_per_host` requests in flight.
+    Connection errors, timeouts and HTTP 429/5xx responses are retried up to `retries`
+    times with exponential backoff and jitter, honouring Retry-After when the server sends it.
+    """
+
+    def __init__(self, rate=5, burst=None, max_per_host=4, max_workers=16, retries=4,
+                 backoff=0.5, max_backoff=30, timeout=30, session=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_per_host = max_per_host
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.session = session if session is not None else requests.Session()
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    def _limits(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = (
+                    TokenBucket(self.rate, self.burst),
+                    threading.BoundedSemaphore(self.max_per_host),
+                )
+            return self.hosts[host]
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def call(self, host, func, *args, **kwargs):
+        """
+        Run `func(*args, **kwargs)` under the limits of `host`, retrying transient errors.
+        """
+        bucket, slots = self._limits(host)
+        for attempt in range(self.retries + 1):
+            try:
+                with slots:
+                    bucket.acquire()
+                    self._count("requests")
+                    return func(*args, **kwargs)
+            except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * (0.5 + random.random())
+                retry_after = getattr(e, "retry_after", None)
+                time.sleep(retry_after if retry_after is not None else delay)
+
+    def _get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.get(url, **kwargs)
+        if response.status_code in RETRY_STATUS:
+            retry_after = response.headers.get("Retry-After")
+            raise RetryableError(
+                f"HTTP {response.status_code} for {url}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        response.raise_for_status()
+        return response
+
+    def get(self, url, **kwargs):
+        """
+        Rate-limited, retried `requests` GET.
+        """
+        return self.call(urlparse(url).netloc, self._get, url, **kwargs)
+
+    def map(self, func, items, host):
+        """
+        Apply `func(item)` to every item concurrently under the limits of `host`. Returns
+        ({item: result}, {item: exception}) for the items that succeeded / failed.
+        """
+        results, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.call, host, func, item): item for item in items}
+            for future, item in futures.items():
+                try:
+                    results[item] = future.result()
+                except Exception as e:
+                    errors[item] = e
+        return results, errors
+
+    def get_many(self, urls, **kwargs):
+        """
+        Concurrent `get` of many URLs; returns ({url: response}, {url: exception}).
+        """
+        results, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.get, url, **kwargs): url for url in urls}
+            for future, url in futures.items():
+                try:
+                    results[url] = future.result()
+                except Exception as e:
+                    errors[url] = e
+        return results, errors
@@ -1,13 +1,13 @@
 # Imports
-import yfinance as yf
 import pandas as pd
-from pandas_datareader import data as pdr
 from yahoo_fin import stock_info as si
 import datetime
-import time
-
-# Override yfinance API
-yf.pdr_override()
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import price_store as ps
+import screener as sr
 
 # Get tickers for all S&P 500 stocks and replace "." with "-" for compatibility with Yahoo Finance
 sp500_tickers = si.tickers_sp500()
@@ -16,44 +16,27 @@ sp500_tickers = [ticker.replace(".", "-") for ticker in sp500_tickers]
 # Define S&P 500 index
 sp500_index = '^GSPC'
 
-# Define date range for stock data
-start_date = datetime.datetime.now() - datetime.timedelta(days=365)
+# Define date range for stock data; one year of returns plus a buffer of holidays
+start_date = datetime.datetime.now() - datetime.timedelta(days=400)
 end_date = datetime.date.today()
 
-# Create empty list to store relative returns for each stock
-relative_returns = []
-
-# Retrieve historical price data for the S&P 500 index
-sp500_df = pdr.get_data_yahoo(sp500_index, start_date, end_date)
-sp500_df['Percent Change'] = sp500_df['Adj Close'].pct_change()
-sp500_returns = sp500_df['Percent Change'].cumprod()
-sp500_return = sp500_returns.iloc[-1]
-
-# Iterate over all S&P 500 stocks to calculate their relative returns relative to the S&P 500
-for ticker in sp500_tickers:
-    # Download historical data as CSV for each stock to speed up the process
-    stock_df = pdr.get_data_yahoo(ticker, start_date, end_date)
-    stock_df.to_csv(f'{ticker}.csv')
-
-    # Calculate percent change column
-    stock_df['Percent Change'] = stock_df['Adj Close'].pct_change()
-
-    # Calculate the relative return with double weight for the most recent quarter
-    stock_returns = stock_df['Percent Change'].cumprod()
-    stock_return = (stock_returns.iloc[-1] * 2 + stock_returns.iloc[-63]) / 3  # Double weight for the most recent quarter
-
-    relative_return = round(stock_return / sp500_return, 2)
-    relative_returns.append(relative_return)
-
-    # Print relative return for each stock
-    print(f'Ticker: {ticker}; Relative Return against S&P 500: {relative_return}\n')
+# Load the index and every stock from the local price store; only dates not on disk yet are downloaded
+prices = ps.get_prices(sp500_tickers + [sp500_index], start_date, end_date)
+close = prices['Adj Close'][sp500_tickers]
+index_close = prices['Adj Close'][sp500_index]
 
-    # Pause for 1 second to avoid overloading the server with requests
-    time.sleep(1)
+# Relative return against the S&P 500 over the last year with double weight for the most recent
+# quarter (the return up to 62 bars back, the original's .iloc[-63]), and its percentile rank,
+# computed for every ticker and date at once
+relative_returns = sr.relative_return(close, index_close, lookback=252, recent=62)
+rs_ratings = sr.rs_rating(close, index_close, lookback=252, recent=62)
 
 # Create dataframe with relative returns and corresponding Relative Strength (RS) rating
-rs_df = pd.DataFrame(list(zip(sp500_tickers, relative_returns)), columns=['Ticker', 'Relative Return'])
-rs_df['RS_Rating'] = rs_df.relative_return.rank(pct=True) * 100
+rs_df = pd.DataFrame({
+    'Ticker': sp500_tickers,
+    'Relative Return': relative_returns.iloc[-1].to_numpy(),
+    'RS_Rating': rs_ratings.iloc[-1].to_numpy(),
+})
 
 # Print RS ratings for all stocks
-print(rs_df)
\ No newline at end of file
+print(rs_df.sort_values('RS_Rating', ascending=False).to_string(index=False))
@@ -1,8 +1,14 @@
 # Import dependencies
+import os
+import sys
 import requests
 import pandas as pd
 from config import financial_model_prep
 
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import fundamentals as fd
+
 # Get the API key
 demo = financial_model_prep()
 
@@ -18,45 +24,41 @@ screener = requests.get(url).json()
 for item in screener:
     companies.append(item['symbol'])
 
+# Fetch the financial and growth ratios of the first 30 companies concurrently, cached locally for a week
+store = fd.FundamentalsStore(source=fd.FundamentalsSource(api_key=demo))
+companies = companies[:30]
+records = store.get([(company, statement, 'annual') for company in companies for statement in ['ratios', 'growth']])
+
 # Store the financial ratios of the companies that meet the search criteria
 value_ratios = {}
 
-# Define a counter to limit the number of companies to fetch the financial ratios for
-count = 0
-
 # Loop over each company
 for company in companies:
     try:
-        # Limit the number of companies to fetch the financial ratios for
-        if count < 30:
-            count += 1
-
-            # Fetch the financial ratios for the current company
-            fin_ratios = requests.get(f'https://financialmodelingprep.com/api/v3/ratios/{company}?apikey={demo}').json()
-
-            # Store the financial ratios of the current company
-            value_ratios[company] = {}
-            value_ratios[company]['ROE'] = fin_ratios[0]['returnOnEquity']
-            value_ratios[company]['ROA'] = fin_ratios[0]['returnOnAssets']
-            value_ratios[company]['Debt_Ratio'] = fin_ratios[0]['debtRatio']
-            value_ratios[company]['Interest_Coverage'] = fin_ratios[0]['interestCoverage']
-            value_ratios[company]['Payout_Ratio'] = fin_ratios[0]['payoutRatio']
-            value_ratios[company]['Dividend_Payout_Ratio'] = fin_ratios[0]['dividendPayoutRatio']
-            value_ratios[company]['PB'] = fin_ratios[0]['priceToBookRatio']
-            value_ratios[company]['PS'] = fin_ratios[0]['priceToSalesRatio']
-            value_ratios[company]['PE'] = fin_ratios[0]['priceEarningsRatio']
-            value_ratios[company]['Dividend_Yield'] = fin_ratios[0]['dividendYield']
-            value_ratios[company]['Gross_Profit_Margin'] = fin_ratios[0]['grossProfitMargin']
-
-            # Fetch the growth ratios for the current company
-            growth_ratios = requests.get(f'https://financialmodelingprep.com/api/v3/financial-growth/{company}?apikey={demo}').json()
-
-            # Store the growth ratios of the current company
-            value_ratios[company]['Revenue_Growth'] = growth_ratios[0]['revenueGrowth']
-            value_ratios[company]['NetIncome_Growth'] = growth_ratios[0]['netIncomeGrowth']
-            value_ratios[company]['EPS_Growth'] = growth_ratios[0]['epsgrowth']
-            value_ratios[company]['RD_Growth'] = growth_ratios[0]['rdexpenseGrowth']
-    except:
+        fin_ratios = records[(company, 'ratios', 'annual')]
+        growth_ratios = records[(company, 'growth', 'annual')]
+        ratios = {}
+
+        # Store the financial ratios of the current company
+        ratios['ROE'] = fin_ratios[0]['returnOnEquity']
+        ratios['ROA'] = fin_ratios[0]['returnOnAssets']
+        ratios['Debt_Ratio'] = fin_ratios[0]['debtRatio']
+        ratios['Interest_Coverage'] = fin_ratios[0]['interestCoverage']
+        ratios['Payout_Ratio'] = fin_ratios[0]['payoutRatio']
+        ratios['Dividend_Payout_Ratio'] = fin_ratios[0]['dividendPayoutRatio']
+        ratios['PB'] = fin_ratios[0]['priceToBookRatio']
+        ratios['PS'] = fin_ratios[0]['priceToSalesRatio']
+        ratios['PE'] = fin_ratios[0]['priceEarningsRatio']
+        ratios['Dividend_Yield'] = fin_ratios[0]['dividendYield']
+        ratios['Gross_Profit_Margin'] = fin_ratios[0]['grossProfitMargin']
+
+        # Store the growth ratios of the current company
+        ratios['Revenue_Growth'] = growth_ratios[0]['revenueGrowth']
+        ratios['NetIncome_Growth'] = growth_ratios[0]['netIncomeGrowth']
+        ratios['EPS_Growth'] = growth_ratios[0]['epsgrowth']
+        ratios['RD_Growth'] = growth_ratios[0]['rdexpenseGrowth']
+        value_ratios[company] = ratios
+    except (KeyError, IndexError):
         pass
 
 # Print the financial ratios
@@ -7,6 +7,11 @@ import datetime as dt
 import pandas as pd
 from pandas_datareader import data as pdr
 import time
+import sys
+
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import streaming_indicators as si
 
 # Get email address and password from environment variables
 EMAIL_ADDRESS = os.environ.get('EMAIL_USER')
@@ -31,11 +36,27 @@ msg['To'] = ''
 # Initialize the alerted flag
 alerted=False
 
+# Download the history once and warm the indicators up on it; later polls only fetch the last
+# few days and feed the completed bars that are new, instead of recomputing the whole history
+df = pdr.get_data_yahoo(stock, start, now)
+rsi = si.RSI(14)
+sma = si.SMA(50)
+completed = df[df.index.date < dt.date.today()]
+rsi.seed(completed["Adj Close"])
+sma.seed(completed["Adj Close"])
+last_bar = completed.index[-1] if len(completed) else None
+
 # Loop to check for the condition and send the email
 while 1:
-    # Get the stock data from Yahoo Finance API
-    df = pdr.get_data_yahoo(stock, start, now)
+    # Get the latest stock data from Yahoo Finance API
+    now = dt.datetime.now()
+    df = pdr.get_data_yahoo(stock, now - dt.timedelta(days=7), now)
     currentClose=df["Adj Close"][-1]
+    for date, bar in df[df.index.date < now.date()].iterrows():
+        if last_bar is None or date > last_bar:
+            rsi.update(bar["Adj Close"])
+            sma.update(bar["Adj Close"])
+            last_bar = date
 
     # Check if the current close price is greater than the target price and if alerted flag is False
     condition=currentClose>TargetPrice
@@ -43,7 +64,9 @@ while 1:
         # Set the alerted flag to True and create the message
         alerted=True
         message=stock +" Has activated the alert price of "+ str(TargetPrice) +\
-            "\nCurrent Price: "+ str(currentClose)
+            "\nCurrent Price: "+ str(currentClose) +\
+            "\nRSI(14): "+ str(round(rsi.value, 2)) +\
+            "\nSMA(50): "+ str(round(sma.value, 2))
         print(message)
         # Set the content of the email message
         msg.set_content(message)
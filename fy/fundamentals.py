@@ -0,0 +1,263 @@
+import datetime as dt
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import fetch_scheduler as fs
+
+FMP_URL = "https://financialmodelingprep.com/api/v3/"
+FINVIZ_URL = "https://finviz.com/quote.ashx?t={ticker}"
+FINVIZ_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 6.1; WOW64; rv:20.0) Gecko/20100101 Firefox/20.0"}
+FINVIZ_METRICS = ["Beta", "EPS next 5Y", "Shs Outstand"]
+
+# statement name: Financial Modeling Prep endpoint; "finviz" is the Finviz quote page snapshot
+STATEMENTS = {
+    "income": "income-statement",
+    "cash_flow": "cash-flow-statement",
+    "balance_sheet": "balance-sheet-statement",
+    "ratios": "ratios",
+    "growth": "financial-growth",
+    "key_metrics": "key-metrics",
+    "finviz": None,
+}
+
+# bumped when the layout of cached entries changes, so older entries are refetched
+CACHE_VERSION = 1
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fundamentals_data")
+DEFAULT_TTL = dt.timedelta(days=7)
+
+# (upper beta bound, discount rate %) of Stock_analysis/intrinsic_value.py, 9% above the last bound
+BETA_DISCOUNT = [(0.80, 5), (1.0, 6), (1.1, 6.5), (1.2, 7), (1.3, 7.5), (1.4, 8), (1.6, 8.5)]
+DCF_COLUMNS = ["free_cash_flow", "total_debt", "liquid_assets", "beta", "eps_growth_5Y", "shs_outstanding"]
+
+
+def parse_finviz_value(value):
+    """
+    Number of a Finviz snapshot value: percentages as percent, B and M suffixes expanded,
+    "-" (missing) as NaN; text that is not a number is returned as is.
+    """
+    multiplier = {"%": 1, "B": 1e9, "M": 1e6, "K": 1e3}.get(value[-1:], None)
+    number = value[:-1] if multiplier is not None else value
+    try:
+        return float(number.replace(",", "")) * (multiplier or 1)
+    except ValueError:
+        return np.nan if value.strip() == "-" else value
+
+
+class FundamentalsSource:
+    """
+    Fundamentals source.
+    Fetches Financial Modeling Prep statements (annual or quarter periods) and Finviz quote
+    page snapshots through a `FetchScheduler`, so concurrent requests respect its per-host
+    rate limits and transient errors are retried.
+    """
+
+    def __init__(self, api_key="demo", scheduler=None, metrics=FINVIZ_METRICS):
+        self.api_key = api_key
+        self.scheduler = scheduler if scheduler is not None else fs.FetchScheduler(rate=4, max_per_host=4)
+        self.metrics = metrics
+
+    def fetch(self, ticker, statement, period):
+        """
+        Records of one (ticker, statement, period): the list of statement dicts (newest
+        first) or the {metric: value} dict of a Finviz snapshot.
+        """
+        if statement == "finviz":
+            return self._finviz(ticker)
+        url = "{}{}/{}?apikey={}".format(FMP_URL, STATEMENTS[statement], ticker, self.api_key)
+        if period == "quarter":
+            url += "&period=quarter"
+        records = self.scheduler.get(url).json()
+        if not isinstance(records, list):
+            raise ValueError("No {} {} data for {}: {}".format(period, statement, ticker, records))
+        return records
+
+    def _finviz(self, ticker):
+        from bs4 import BeautifulSoup
+
+        response = self.scheduler.get(FINVIZ_URL.format(ticker=ticker), headers=FINVIZ_HEADERS)
+        soup = BeautifulSoup(response.content, features="lxml")
+        snapshot = {}
+        for metric in self.metrics:
+            label = soup.find(string=metric)
+            if label is not None:
+                snapshot[metric] = parse_finviz_value(label.find_next(class_="snapshot-td2").text)
+        return snapshot
+
+
+class FundamentalsStore:
+    """
+    Local fundamentals cache.
+    One JSON file per (ticker, statement, period) under `root/v<CACHE_VERSION>/<ticker>/`
+    holding the fetched records and the fetch time. Entries older than `ttl` are refetched;
+    everything missing or stale in a request is fetched from `source` on up to `max_workers`
+    threads (the source's scheduler enforces the per-host limits), and a failed refetch
+    falls back to the stale entry.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, source=None, ttl=DEFAULT_TTL, max_workers=16):
+        self.root = root
+        self.source = source if source is not None else FundamentalsSource()
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.stats = {"hits": 0, "fetched": 0, "stale": 0, "failures": 0}
+
+    def _path(self, ticker, statement, period):
+        return os.path.join(self.root, "v{}".format(CACHE_VERSION), ticker.replace(os.sep, "_"),
+                            "{}_{}.json".format(statement, period))
+
+    def read(self, ticker, statement, period="annual"):
+        """
+        Cached entry {"fetched_at", "records"} of a key, or None.
+        """
+        path = self._path(ticker, statement, period)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write(self, key, records):
+        path = self._path(*key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"fetched_at": dt.datetime.now().isoformat(timespec="seconds"), "records": records}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def fresh(self, entry):
+        return entry is not None and dt.datetime.now() - dt.datetime.fromisoformat(entry["fetched_at"]) < self.ttl
+
+    def get(self, keys):
+        """
+        Records of every (ticker, statement, period) key, from the cache when fresh and
+        fetched concurrently otherwise. Keys that could not be fetched and were never cached
+        are left out.
+        """
+        keys = list(dict.fromkeys(keys))
+        entries = {key: self.read(*key) for key in keys}
+        missing = [key for key in keys if not self.fresh(entries[key])]
+        self.stats["hits"] += len(keys) - len(missing)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self.source.fetch, *key): key for key in missing}
+                for future, key in futures.items():
+                    try:
+                        records = future.result()
+                    except Exception as e:
+                        print("Failed to fetch {} {} of {}: {}".format(key[2], key[1], key[0], e))
+                        self.stats["stale" if entries[key] is not None else "failures"] += 1
+                        continue
+                    self._write(key, records)
+                    entries[key] = {"records": records}
+                    self.stats["fetched"] += 1
+        return {key: entry["records"] for key, entry in entries.items() if entry is not None}
+
+    def statements(self, tickers, statement, period="annual"):
+        """
+        {ticker: DataFrame} of one statement for many tickers (see `statement_frame`).
+        """
+        records = self.get([(t, statement, period) for t in tickers])
+        return {key[0]: statement_frame(r) for key, r in records.items()}
+
+
+def statement_frame(records):
+    """
+    Statement records as a DataFrame indexed by date (newest first, as served) with every
+    column converted to numbers where possible.
+    """
+    df = pd.DataFrame(records)
+    if "date" in df.columns:
+        df = df.set_index("date")
+    return df.apply(pd.to_numeric, errors="coerce")
+
+
+def dcf_inputs(tickers, store=None):
+    """
+    DCF Inputs.
+    The inputs of Stock_analysis/intrinsic_value.py for many tickers at once, from one
+    concurrent batch of cached requests: trailing twelve months free cash flow (sum of the
+    last 4 quarters), total debt and cash and short-term investments of the last quarter,
+    and the Finviz beta, 5-year EPS growth (%) and shares outstanding. One row per ticker
+    (DCF_COLUMNS), NaN where data is missing.
+    """
+    store = store if store is not None else FundamentalsStore()
+    tickers = list(tickers)
+    keys = [(t, s, p) for t in tickers for s, p in
+            [("cash_flow", "quarter"), ("balance_sheet", "quarter"), ("finviz", "snapshot")]]
+    records = store.get(keys)
+
+    rows = {}
+    for ticker in tickers:
+        row = dict.fromkeys(DCF_COLUMNS, np.nan)
+        cash_flow = statement_frame(records.get((ticker, "cash_flow", "quarter"), []))
+        if "freeCashFlow" in cash_flow.columns and len(cash_flow):
+            row["free_cash_flow"] = cash_flow["freeCashFlow"].iloc[:4].sum()
+        balance_sheet = statement_frame(records.get((ticker, "balance_sheet", "quarter"), []))
+        if len(balance_sheet):
+            latest = balance_sheet.iloc[0]
+            row["total_debt"] = latest.get("totalDebt", np.nan)
+            row["liquid_assets"] = latest.get("cashAndShortTermInvestments", np.nan)
+        snapshot = records.get((ticker, "finviz", "snapshot"), {})
+        for column, metric in [("beta", "Beta"), ("eps_growth_5Y", "EPS next 5Y"), ("shs_outstanding", "Shs Outstand")]:
+            value = snapshot.get(metric, np.nan)
+            row[column] = value if isinstance(value, float) else np.nan
+        rows[ticker] = row
+    return pd.DataFrame.from_dict(rows, orient="index", columns=DCF_COLUMNS)
+
+
+def discount_rate(beta):
+    """
+    Discount rate (%) of Stock_analysis/intrinsic_value.py for each beta; 7% when the beta
+    is unknown.
+    """
+    beta = np.asarray(beta, dtype=float)
+    bounds = np.array([b for b, _ in BETA_DISCOUNT])
+    rates = np.array([r for _, r in BETA_DISCOUNT] + [9.0])
+    return np.where(np.isnan(beta), 7.0, rates[np.searchsorted(bounds, beta, side="right")])
+
+
+def calc_intrinsic_value(cash_flow, total_debt, liquid_assets, eps_growth_5Y, eps_growth_6Y_to_10Y,
+                         eps_growth_11Y_to_20Y, shs_outstanding, discount):
+    """
+    Vectorized DCF.
+    Intrinsic value per share of Stock_analysis/intrinsic_value.py: the cash flow grown at
+    eps_growth_5Y for years 1-5, eps_growth_6Y_to_10Y for 6-10 and eps_growth_11Y_to_20Y for
+    11-20 (all in %), discounted at `discount` (%), less debt plus liquid assets, per share.
+    Every argument may be a scalar or an array and they are broadcast together, e.g. per-ticker
+    arrays of shape (n,) with a column of discount rates of shape (k, 1) give a (k, n) grid of
+    values, one row per discount scenario.
+    """
+    args = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in
+                                 (cash_flow, total_debt, liquid_assets, eps_growth_5Y, eps_growth_6Y_to_10Y,
+                                  eps_growth_11Y_to_20Y, shs_outstanding, discount)])
+    cash_flow, total_debt, liquid_assets, g1, g2, g3, shs_outstanding, discount = args
+    years = np.arange(1, 21).reshape((-1,) + (1,) * cash_flow.ndim)
+    growth = np.where(years <= 5, g1, np.where(years <= 10, g2, g3)) / 100
+    projected = cash_flow * np.cumprod(1 + growth, axis=0)
+    discounted = projected / (1 + discount / 100) ** years
+    return (discounted.sum(axis=0) - total_debt + liquid_assets) / shs_outstanding
+
+
+def intrinsic_values(inputs, discounts=None):
+    """
+    Intrinsic value of every ticker of a `dcf_inputs` frame: a Series at each ticker's
+    beta-based discount rate, or a (ticker x discount rate) DataFrame for a list of
+    `discounts` (%) scenarios. Growth after year 5 is half the 5-year EPS growth, capped
+    at 4% from year 11, as in Stock_analysis/intrinsic_value.py.
+    """
+    eps_growth_5Y = inputs["eps_growth_5Y"].to_numpy(dtype=float)
+    eps_growth_6Y_to_10Y = eps_growth_5Y / 2
+    eps_growth_11Y_to_20Y = np.minimum(eps_growth_6Y_to_10Y, 4)
+    args = [inputs[c].to_numpy(dtype=float) for c in ["free_cash_flow", "total_debt", "liquid_assets"]]
+    args += [eps_growth_5Y, eps_growth_6Y_to_10Y, eps_growth_11Y_to_20Y, inputs["shs_outstanding"].to_numpy(dtype=float)]
+    if discounts is None:
+        values = calc_intrinsic_value(*args, discount_rate(inputs["beta"]))
+        return pd.Series(values, index=inputs.index, name="intrinsic_value")
+    discounts = np.asarray(discounts, dtype=float)
+    values = calc_intrinsic_value(*args, discounts[:, None])
+    return pd.DataFrame(values.T, index=inputs.index, columns=discounts)
@@ -0,0 +1,154 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import pandas as pd
+
+import backtest_engine as be
+import indicator_cache as ic
+import shared_frames as sf
+
+RESULT_COLUMNS = ["strategy", "param", "stoploss", "return", "max_drawdown"]
+
+# price frame rebuilt from shared memory once per worker process
+_frame = None
+_shm = None
+
+
+def param_grid(param):
+    """
+    Parameter Grid.
+    Expands {"n": [10, 20], "ma_type": ["sma", "ema"]} into one dict per combination.
+    """
+    names = list(param)
+    return [dict(zip(names, values)) for values in product(*param.values())]
+
+
+def stoploss_label(stop_loss_lvl):
+    return "" if stop_loss_lvl is None else str(stop_loss_lvl)
+
+
+def truncate_partial_row(path):
+    """
+    Cut a row left incomplete by a crash mid-write (everything after the last newline) off a
+    checkpoint CSV. A row torn inside its last field still has a value there, so it has to go
+    rather than be completed.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+def load_checkpoint(path):
+    """
+    Completed (strategy, param, stoploss) combos recorded in a checkpoint CSV.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    done = pd.read_csv(path, dtype=str, keep_default_na=False, usecols=RESULT_COLUMNS)
+    # a row cut short by a crash mid-write is not complete
+    done = done[done.max_drawdown != ""]
+    return set(zip(done.strategy, done.param, done.stoploss))
+
+
+def _attach_frame(meta):
+    global _frame, _shm
+    _shm, _frame = sf.attach_frame(meta)
+    # start counting from zero instead of the parent's statistics inherited on fork
+    ic.cache = ic.IndicatorCache(ic.cache.max_bytes)
+
+
+def _run_combo(strategy, param_dict, stop_loss_lvl, start_date, end_date):
+    df_strategy = strategy(_frame, **param_dict)
+    bt_df = df_strategy[(df_strategy.index >= start_date) & (df_strategy.index <= end_date)]
+
+    rows = []
+    for l in stop_loss_lvl:
+        result = be.backtest_summary(bt_df, stop_loss_lvl=l)
+        rows.append(
+            [strategy.__name__, str(param_dict), stoploss_label(l), result["return"], result["max_drawdown"]]
+        )
+    return rows, os.getpid(), ic.cache.stats()
+
+
+def run_grid_search(df, strategies, start_date, end_date, stop_loss_lvl, checkpoint,
+                    max_workers=None, verbose=True):
+    """
+    Parallel Grid Search.
+    Fans every (strategy, param_dict) combination out to a process pool; each task runs all
+    stop-loss levels on one set of signals. The OHLC frame is placed in shared memory once
+    instead of being pickled per task, results are appended to the `checkpoint` CSV as they
+    complete, and combos already in the checkpoint are skipped so an interrupted sweep
+    resumes where it stopped. Strategies must be importable by the workers (module-level
+    functions); a script defining them starts the search under `if __name__ == "__main__":`
+    so that workers importing it under the "spawn" start method do not run it again.
+    """
+    truncate_partial_row(checkpoint)
+    done = load_checkpoint(checkpoint)
+    tasks = []
+    for s in strategies:
+        func = s["func"]
+        for param_dict in param_grid(s["param"]):
+            pending = [
+                l for l in stop_loss_lvl
+                if (func.__name__, str(param_dict), stoploss_label(l)) not in done
+            ]
+            if pending:
+                tasks.append((func, param_dict, pending))
+
+    skipped = sum(len(param_grid(s["param"])) for s in strategies) - len(tasks)
+    if verbose:
+        print("Grid search: {} combos to run, {} already in {}".format(len(tasks), skipped, checkpoint))
+
+    worker_stats = {}
+    shm, meta = sf.share_frame(df)
+    t0 = time.perf_counter()
+    try:
+        write_header = not os.path.exists(checkpoint) or os.path.getsize(checkpoint) == 0
+        with open(checkpoint, "a", newline="") as f, ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_attach_frame, initargs=(meta,)
+        ) as pool:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(RESULT_COLUMNS)
+                f.flush()
+
+            futures = [
+                pool.submit(_run_combo, func, param_dict, pending, start_date, end_date)
+                for func, param_dict, pending in tasks
+            ]
+            for c, future in enumerate(as_completed(futures), 1):
+                rows, pid, stats = future.result()
+                writer.writerows(rows)
+                f.flush()
+                worker_stats[pid] = stats
+                if verbose and (c % 100 == 0 or c == len(futures)):
+                    print("Completed {}/{} combos in {:.1f}s".format(c, len(futures), time.perf_counter() - t0))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if verbose and worker_stats:
+        hits = sum(s["hits"] for s in worker_stats.values())
+        misses = sum(s["misses"] for s in worker_stats.values())
+        saved = sum(s["saved_time"] for s in worker_stats.values())
+        print(
+            "Indicator cache over {} workers: {} hits / {} misses ({:.1%} hit rate), {:.2f}s saved".format(
+                len(worker_stats), hits, misses, hits / max(hits + misses, 1), saved
+            )
+        )
+
+    results = pd.read_csv(checkpoint, float_precision="round_trip").dropna(subset=["max_drawdown"])
+    return results.drop_duplicates(["strategy", "param", "stoploss"], keep="last").reset_index(drop=True)
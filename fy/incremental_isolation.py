@@ -0,0 +1,165 @@
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+EULER_GAMMA = 0.5772156649015329
+
+
+def average_path_length(n):
+    """
+    Average path length of an unsuccessful search in a binary search tree of n samples, the
+    normalization of isolation depths (the same c(n) as sklearn's IsolationForest).
+    """
+    n = np.asarray(n, dtype=float)
+    out = np.where(n <= 2, np.maximum(n - 1, 0), 0.0)
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + EULER_GAMMA) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+def _scale(std):
+    # standard deviations used for standardizing; a constant feature (std 0) is only centered
+    return np.where(std > 0, std, 1.0)
+
+
+class RunningStats:
+    """
+    Running Mean and Variance.
+    Welford updates of the per-feature mean and sum of squared deviations, so the statistics of
+    the whole history cost O(1) per new row. The rows are kept in a preallocated array that
+    doubles when full (`values` is the filled part) for refitting models on the history.
+    """
+
+    def __init__(self, num_features, capacity=1024):
+        self.buffer = np.empty((capacity, num_features))
+        self.count = 0
+        self.mean = np.zeros(num_features)
+        self.m2 = np.zeros(num_features)
+
+    @property
+    def values(self):
+        return self.buffer[:self.count]
+
+    def update(self, x):
+        if self.count == len(self.buffer):
+            grown = np.empty((2 * len(self.buffer), self.buffer.shape[1]))
+            grown[:self.count] = self.buffer
+            self.buffer = grown
+        self.buffer[self.count] = x
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def extend(self, rows):
+        for x in np.asarray(rows, dtype=float):
+            self.update(x)
+
+    def std(self, ddof=0):
+        return np.sqrt(self.m2 / (self.count - ddof))
+
+
+class IncrementalIsolationModel:
+    """
+    Incremental Isolation Forest.
+    Scores each new bar with a cached IsolationForest instead of refitting one on the whole
+    history every bar. The forest is refitted on the standardized history every `refit_every`
+    bars, or earlier once the running mean of any feature has drifted more than
+    `drift_threshold` standard deviations (as of the last fit) away from its mean at the last
+    fit. New bars are standardized with the running mean and population standard deviation
+    of the history including the bar, like the original strategy; with refit_every=1 the
+    labels are the same as refitting every bar.
+    """
+
+    def __init__(self, history, refit_every=21, drift_threshold=0.5, contamination=0.001,
+                 random_state=None, **forest_kwargs):
+        history = np.asarray(history, dtype=float)
+        self.stats = RunningStats(history.shape[1], capacity=max(1024, 2 * len(history)))
+        self.stats.extend(history)
+        self.refit_every = refit_every
+        self.drift_threshold = drift_threshold
+        self.contamination = contamination
+        self.random_state = random_state
+        self.forest_kwargs = forest_kwargs
+        self.iso = None
+        self.fit_mean = None
+        self.fit_std = None
+        self.bars_since_fit = 0
+        self.num_fits = 0
+
+    def fit(self):
+        """
+        Refit the forest on the history standardized with its mean and sample standard
+        deviation (1 for a constant feature).
+        """
+        self.fit_mean = self.stats.mean.copy()
+        self.fit_std = _scale(self.stats.std(ddof=1))
+        self.iso = IsolationForest(contamination=self.contamination, random_state=self.random_state,
+                                   **self.forest_kwargs)
+        self.iso.fit((self.stats.values - self.fit_mean) / self.fit_std)
+        self._flatten_forest()
+        self.bars_since_fit = 0
+        self.num_fits += 1
+
+    def _flatten_forest(self):
+        # all trees as flat node arrays (children offset into the flat arrays, leaves pointing at
+        # themselves) with the isolation depth of every leaf, so one bar is scored by walking all
+        # trees together instead of going through IsolationForest.predict
+        features, thresholds, left, right, depths, roots = [], [], [], [], [], []
+        offset = 0
+        for tree, columns in zip(self.iso.estimators_, self.iso.estimators_features_):
+            t = tree.tree_
+            leaf = t.children_left == -1
+            # one level of depths per pass, children always come after their parent
+            split = np.flatnonzero(~leaf)
+            node_depth = np.zeros(t.node_count)
+            for _ in range(t.max_depth):
+                node_depth[t.children_left[split]] = node_depth[split] + 1
+                node_depth[t.children_right[split]] = node_depth[split] + 1
+            nodes = np.arange(t.node_count) + offset
+            features.append(np.where(leaf, 0, np.asarray(columns)[np.maximum(t.feature, 0)]))
+            thresholds.append(t.threshold)
+            left.append(np.where(leaf, nodes, t.children_left + offset))
+            right.append(np.where(leaf, nodes, t.children_right + offset))
+            depths.append(node_depth + average_path_length(t.n_node_samples))
+            roots.append(offset)
+            offset += t.node_count
+        self._features = np.concatenate(features)
+        self._thresholds = np.concatenate(thresholds)
+        self._left = np.concatenate(left)
+        self._right = np.concatenate(right)
+        self._depths = np.concatenate(depths)
+        self._roots = np.array(roots)
+        self._max_depth = max(tree.tree_.max_depth for tree in self.iso.estimators_)
+        self._normalizer = len(self.iso.estimators_) * average_path_length([self.iso.max_samples_])[0]
+
+    def predict(self, x):
+        """
+        Label of one standardized bar from the cached forest (1 for an inlier, -1 for an
+        outlier), the same as IsolationForest.predict.
+        """
+        # trees compare float32 features against their thresholds
+        x = np.asarray(x, dtype=np.float32).astype(float)
+        node = self._roots
+        for _ in range(self._max_depth):
+            node = np.where(x[self._features[node]] <= self._thresholds[node], self._left[node], self._right[node])
+        score = -(2 ** (-self._depths[node].sum() / self._normalizer))
+        return 1 if score - self.iso.offset_ >= 0 else -1
+
+    def drifted(self):
+        if self.drift_threshold is None or self.fit_mean is None:
+            return False
+        shift = np.abs(self.stats.mean - self.fit_mean) / self.fit_std
+        return bool(np.max(shift) > self.drift_threshold)
+
+    def update(self, x):
+        """
+        Score bar `x` (1 for an inlier, -1 for an outlier) and add it to the history. The
+        forest scoring it is fitted on the history before the bar.
+        """
+        x = np.asarray(x, dtype=float)
+        if self.iso is None or self.bars_since_fit >= self.refit_every or self.drifted():
+            self.fit()
+        self.stats.update(x)
+        self.bars_since_fit += 1
+        normalized_x = (x - self.stats.mean) / _scale(self.stats.std())
+        return self.predict(normalized_x)
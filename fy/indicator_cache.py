@@ -0,0 +1,135 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def frame_key(df):
+    """
+    Frame Key.
+    Identifies the price frame an indicator was computed from: the ticker stored in
+    `df.attrs["ticker"]` (if any), the date range covered and a fingerprint of the values,
+    so two frames over the same dates with different prices never share cache entries.
+    """
+    if len(df) == 0:
+        return (df.attrs.get("ticker"), None, None, 0, None)
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return (df.attrs.get("ticker"), df.index[0], df.index[-1], len(df), digest.hexdigest())
+
+
+def size_of(value):
+    """
+    Size of a cached value in bytes.
+    Counts pandas objects, NumPy arrays and tuples/lists/dicts of them.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(size_of(v) for v in value)
+    if isinstance(value, dict):
+        return sum(size_of(v) for v in value.values())
+    return 64
+
+
+class IndicatorCache:
+    """
+    Memoizing indicator layer.
+    Results are keyed on (ticker, date range, values, indicator, params) and evicted least recently
+    used first once the cached values exceed `max_bytes`. Cached values are shared, callers
+    must not modify them in place.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compute_time = 0.0
+        self.saved_time = 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, func, *args, **kwargs):
+        """
+        Return the cached value for `key`, computing it with `func(*args, **kwargs)` on a miss.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.saved_time += entry[1]
+            return entry[0]
+
+        self.misses += 1
+        t0 = time.perf_counter()
+        value = func(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        self.compute_time += elapsed
+
+        size = size_of(value)
+        if size <= self.max_bytes:
+            self.entries[key] = (value, elapsed, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return value
+
+    def indicator(self, df, name, func, **params):
+        """
+        Cached `func(df, **params)`, keyed on the frame, the indicator name and its params.
+        """
+        key = (frame_key(df), name, tuple(sorted(params.items())))
+        return self.get(key, func, df, **params)
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self.entries),
+            "nbytes": self.nbytes,
+            "evictions": self.evictions,
+            "compute_time": self.compute_time,
+            "saved_time": self.saved_time,
+        }
+
+    def report(self):
+        return (
+            "Indicator cache: {} hits / {} misses ({:.1%} hit rate), {} entries, {:.1f} MB, "
+            "{} evictions, {:.2f}s computing, {:.2f}s saved".format(
+                self.hits,
+                self.misses,
+                self.hit_rate,
+                len(self.entries),
+                self.nbytes / 1024 ** 2,
+                self.evictions,
+                self.compute_time,
+                self.saved_time,
+            )
+        )
+
+
+cache = IndicatorCache()
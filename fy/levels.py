@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+import rolling_kernels as rk
+
+LEVEL_COLUMNS = ["Ticker", "Timeframe", "Level", "Supports", "Resistances", "Pivots", "Touches",
+                 "First Date", "Last Date"]
+
+
+def _fractals(values, order):
+    # bars strictly below the `order` bars on each side, which fall towards it and rise after it
+    rows = len(values)
+    pivot = np.zeros(values.shape, dtype=bool)
+    if rows < 2 * order + 1:
+        return pivot
+    inner = slice(order, rows - order)
+    pivot[inner] = True
+    for k in range(1, order + 1):
+        pivot[inner] &= values[order - k + 1:rows - order - k + 1] < values[order - k:rows - order - k]
+        pivot[inner] &= values[order + k - 1:rows - order + k - 1] < values[order + k:rows - order + k]
+    return pivot
+
+
+def fractal_pivots(high, low, order=2):
+    """
+    Fractal Pivots.
+    Supports are lows below the `order` lows on each side (falling into the pivot, rising
+    after it), resistances highs above the `order` highs on each side, found for every bar and
+    ticker of (date x ticker) frames at once with shifted comparisons. A bar that is both counts
+    as a support, like portfolio_strategies/support_resistance_finder.py. Returns (support,
+    resistance) boolean frames.
+    """
+    support = _fractals(rk.as_2d(low), order)
+    resistance = _fractals(-rk.as_2d(high), order) & ~support
+    return rk.wrap(support, low), rk.wrap(resistance, high)
+
+
+def cluster_levels(prices, groups, tolerance):
+    """
+    Level Clustering.
+    Clusters the pivot `prices` of each group (ticker) in one sorted sweep: the lowest price
+    not yet clustered starts a level that takes every price less than `tolerance` (one value
+    per group) above it. After an O(n log n) sort, the next level start of every price (the
+    first price of its group at least `tolerance` above it) comes from one merge of the prices
+    with those bounds, and the level starts of all groups are then followed at the same time.
+    Returns the cluster number of every price.
+    """
+    prices = np.asarray(prices, dtype=float)
+    groups = np.asarray(groups)
+    tolerance = np.asarray(tolerance, dtype=float)
+    n = len(prices)
+    order = np.lexsort((prices, groups))
+    p = prices[order]
+    g = groups[order]
+
+    # merge the prices with the bounds, a bound before the prices equal to it, so the number of
+    # prices before a bound is the position of the first price of its group at or above it
+    is_bound = np.repeat([False, True], n)
+    merged = np.lexsort((~is_bound, np.concatenate([p, p + tolerance[g]]), np.concatenate([g, g])))
+    prices_before = np.cumsum(~is_bound[merged])
+    bounds = merged[is_bound[merged]]
+    next_start = np.empty(n, dtype=int)
+    next_start[bounds - n] = prices_before[is_bound[merged]]
+
+    first = np.flatnonzero(np.r_[True, g[1:] != g[:-1]]) if n else np.zeros(0, dtype=int)
+    end = np.r_[first[1:], n]
+    is_start = np.zeros(n, dtype=bool)
+    current = first
+    while len(current):
+        is_start[current] = True
+        current = next_start[current]
+        active = current < end
+        current, end = current[active], end[active]
+    labels = np.empty(n, dtype=int)
+    labels[order] = np.cumsum(is_start) - 1
+    return labels
+
+
+def level_touches(high, low, levels, tolerance):
+    """
+    Touch Counts.
+    Number of bars whose range [low, high] comes within tolerance / 2 of each level, from the
+    sorted highs and lows of one ticker: a bar misses a level only if its low is above the band
+    or its high below it, so each count is two binary searches.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    valid = ~(np.isnan(high) | np.isnan(low))
+    high = np.sort(high[valid])
+    low = np.sort(low[valid])
+    levels = np.asarray(levels, dtype=float)
+    above = len(low) - np.searchsorted(low, levels + tolerance / 2, side="right")
+    below = np.searchsorted(high, levels - tolerance / 2, side="left")
+    return len(low) - above - below
+
+
+def _as_frame(data):
+    if isinstance(data, pd.Series):
+        return data.to_frame(data.name if data.name is not None else 0)
+    return data
+
+
+def _align(high, low):
+    # two Series are one ticker's bars whatever their names; frames must share their tickers
+    if isinstance(high, pd.Series) and isinstance(low, pd.Series):
+        if len(high) != len(low):
+            raise ValueError("high and low have different lengths: {} and {}".format(len(high), len(low)))
+        high = _as_frame(high)
+        return high, pd.DataFrame(low.to_numpy(), index=high.index, columns=high.columns)
+    high, low = _as_frame(high), _as_frame(low)
+    if not high.columns.equals(low.columns):
+        raise ValueError("high and low have different columns")
+    return high, low.reindex(index=high.index)
+
+
+def _resample(high, low, timeframe):
+    high = high.resample(timeframe).max()
+    low = low.resample(timeframe).min()
+    quoted = high.notna().any(axis=1)
+    return high[quoted], low[quoted]
+
+
+def find_levels(high, low, order=2, width=1.0, timeframe=None):
+    """
+    Support and Resistance Levels.
+    Levels of every ticker of (date x ticker) high / low frames (or Series): fractal pivots
+    clustered within `width` times the ticker's mean bar range (the `s` of
+    support_resistance_finder.py), on the bars resampled to `timeframe` (e.g. "W") if given.
+    Each level is the mean price of its pivots, with the number of support and resistance
+    pivots in it, the number of bars that touched it and the dates of its first and last
+    pivot. Returns one row per level (LEVEL_COLUMNS), by ticker and level. A high and a low
+    Series are paired by position; frames must have the same columns.
+    """
+    high, low = _align(high, low)
+    if timeframe is not None:
+        high, low = _resample(high, low, timeframe)
+    tolerance = width * (high - low).mean().to_numpy()
+    support, resistance = fractal_pivots(high, low, order)
+
+    rows, cols = np.nonzero(support.to_numpy() | resistance.to_numpy())
+    is_support = support.to_numpy()[rows, cols]
+    prices = np.where(is_support, low.to_numpy()[rows, cols], high.to_numpy()[rows, cols])
+    pivots = pd.DataFrame({
+        "ticker": cols,
+        "label": cluster_levels(prices, cols, tolerance),
+        "price": prices,
+        "support": is_support,
+        "date": high.index[rows],
+    })
+    grouped = pivots.groupby("label")
+    table = pd.DataFrame({
+        "ticker": grouped["ticker"].first(),
+        "Level": grouped["price"].mean(),
+        "Supports": grouped["support"].sum(),
+        "Pivots": grouped.size(),
+        "First Date": grouped["date"].min(),
+        "Last Date": grouped["date"].max(),
+    })
+    table["Resistances"] = table["Pivots"] - table["Supports"]
+    table = table.sort_values(["ticker", "Level"])
+    touches = np.zeros(len(table), dtype=int)
+    level_ticker = table["ticker"].to_numpy()
+    level_price = table["Level"].to_numpy()
+    for ticker in np.unique(level_ticker):
+        of_ticker = level_ticker == ticker
+        touches[of_ticker] = level_touches(high.iloc[:, ticker], low.iloc[:, ticker],
+                                           level_price[of_ticker], tolerance[ticker])
+    table["Touches"] = touches
+    table["Ticker"] = high.columns[table["ticker"].to_numpy()]
+    table["Timeframe"] = timeframe if timeframe is not None else "bar"
+    return table[LEVEL_COLUMNS].reset_index(drop=True)
+
+
+def multi_timeframe_levels(high, low, timeframes=(None, "W"), order=2, width=1.0):
+    """
+    Levels on every timeframe in `timeframes` (None for the bars as given), one table.
+    """
+    tables = [find_levels(high, low, order, width, timeframe) for timeframe in timeframes]
+    return pd.concat(tables, ignore_index=True)
@@ -3,11 +3,16 @@ import os
 import datetime
 import requests
 import yfinance as yf
-from numpy import array, hstack
+import pandas as pd
+from numpy import array
 from sklearn.model_selection import train_test_split
 from keras.models import Sequential, model_from_json
 from keras.layers import LSTM, Dense, Flatten, TimeDistributed, Conv1D, MaxPooling1D
 from keras import callbacks
+import sys
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import sequence_windows as sw
 
 # Setup data for LSTM model
 def setup_data(symbol, data_len, seq_len):
@@ -23,59 +28,31 @@ def setup_data(symbol, data_len, seq_len):
     low = orig_dataset['Low'].values
     dataset, minmax = normalize_data(orig_dataset)
 
-    # Convert dataset into sequences of length seq_len
-    cols = dataset.columns.tolist()
-    data_seq = list()
-    for i in range(len(cols)):
-        if cols[i] < 4:
-            data_seq.append(dataset[cols[i]].values)
-            data_seq[i] = data_seq[i].reshape((len(data_seq[i]), 1))
-    data = hstack(data_seq)
+    # Convert the first four columns into sequences of length seq_len
+    data = dataset[[c for c in dataset.columns if c < 4]].values
     X, y = split_sequences(data, seq_len)
 
     # Reshape input data to fit the LSTM model
     n_seq, n_steps, n_features = X.shape
     X = X.reshape((n_seq, 1, n_steps, n_features))
-    true_y = [[y[i][0], y[i][1]] for i in range(len(y))]
-
-    return X, array(true_y), n_features, minmax, seq_len, close, open_, high, low
-
-# Normalize dataset between 0 and 1
-def normalize_data(dataset):
-    cols = dataset.columns.tolist()
-    col_name = [0] * len(cols)
-    for i in range(len(cols)):
-        col_name[i] = i
-    dataset.columns = col_name
-
-    for column in dataset:
-        dataset = dataset.astype({column: 'float32'})
-
-    minmax = []
-    for i in range(len(cols)):
-        col_values = dataset[col_name[i]]
-        value_min = min(col_values)
-        value_max = max(col_values)
-        minmax.append([value_min, value_max])
-
-    for column in dataset:
-        values = dataset[column].values
-        for i in range(len(values)):
-            values[i] = (values[i] - minmax[column][0]) / (minmax[column][1] - minmax[column][0])
-        dataset[column] = values
-
+    true_y = y[:, :2]
+
+    return X, true_y, n_features, minmax, seq_len, close, open_, high, low
+
+# Normalize dataset between 0 and 1, optionally saving the scaler to reuse it on live data
+def normalize_data(dataset, scaler_path=None):
+    values = dataset.to_numpy(dtype='float32')
+    scaler = sw.MinMaxScaler().fit(values)
+    if scaler_path is not None:
+        scaler.save(scaler_path)
+    dataset = pd.DataFrame(scaler.transform(values), index=dataset.index)
+    minmax = [[low, high] for low, high in zip(scaler.data_min, scaler.data_max)]
     return dataset, minmax
 
 # Split dataset into input sequences and their corresponding output
 def split_sequences(sequences, seq_len):
-    X, y = [], []
-    for i in range(len(sequences)):
-        end_ix = i + seq_len
-        if end_ix > len(sequences) - 1:
-            break
-        seq_x, seq_y = sequences[i:end_ix, :], sequences[end_ix, :]
-        X.append(seq_x)
-        y.append(seq_y)
+    # X is a zero-copy view of all windows, copied once here since it is reshaped and split
+    X, y = sw.split_sequences(sequences, seq_len)
     return array(X), array(y)
 
 # Set up training and testing datasets
@@ -9,6 +9,11 @@ from pandas_datareader import DataReader
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error
 from tensorflow.keras.layers import Dense, LSTM
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import sequence_windows as sw
 
 # Get the stock quote for the past 10 years
 stock = input("Enter a stock ticker: ")
@@ -28,19 +33,10 @@ scaled_data = scaler.fit_transform(dataset)
 # Create the training dataset
 train_data = scaled_data[0:train_data_len, :]
 
-# Split the data into x_train and y_train datasets
-x_train=[]
-y_train=[]
-
-for i in range(60,len(train_data)):
-    x_train.append(train_data[i-60:i, 0])
-    y_train.append(train_data[i, 0])
-
-# Convert x_train and y_train to numpy arrays
-x_train, y_train = np.array(x_train), np.array(y_train)
-
-# Reshape the data to 3 dimensions
-x_train = np.reshape(x_train, (x_train.shape[0], x_train.shape[1], 1))
+# Split the data into x_train and y_train datasets: 60-day windows (samples x 60 x 1) taken as
+# views of train_data and the close of the following day
+x_train, y_train = sw.split_sequences(train_data, 60)
+y_train = y_train[:, 0]
 
 # Build the LSTM model
 model = Sequential()
@@ -59,18 +55,9 @@ model.fit(x_train, y_train, batch_size=1, epochs=5)
 test_data = scaled_data[train_data_len-60:, :]
 
 # Create x_test, y_test datasets
-x_test = []
+x_test, _ = sw.split_sequences(test_data, 60)
 y_test = dataset[train_data_len:, :]
 
-for i in range(60,len(test_data)):
-    x_test.append(test_data[i-60:i, 0])
-
-# Convert data to numpy array
-x_test = np.array(x_test)
-
-# Reshape the data
-x_test = np.reshape(x_test, (x_test.shape[0], x_test.shape[1], 1))
-
 # Get the model's predicted price values
 predictions = model.predict(x_test)
 predictions = scaler.inverse_transform(predictions)
@@ -1,25 +1,17 @@
 # Import dependencies
 from datetime import datetime
-from sklearn.ensemble import IsolationForest
 import backtrader as bt
 import pandas as pd
-import numpy as np
 import pyfolio as pf
-
-class IsolationModel:
-    """This class initializes an isolation forest model to detect anomalies in data."""
-    def __init__(self, data):
-        self.normalized_data = (data - data.mean()) / data.std()
-        self.iso = IsolationForest(contamination=0.001, behaviour="new")
-        self.iso.fit(self.normalized_data)
-
-    def predict_outlier(self, data):
-        """This method takes in data and returns the predicted label (1 for inliers and -1 for outliers)."""
-        return self.iso.predict(data)
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+from incremental_isolation import IncrementalIsolationModel
 
 class IsolationStrategy(bt.Strategy):
     """This class implements the trading strategy that uses the isolation model to trade."""
-    def __init__(self, data):
+    def __init__(self, data, refit_every=21, drift_threshold=0.5):
         # Keep a reference to the "open", "high", "low", "close", and "volume" lines in the data[0] dataseries
         self.dataopen = self.datas[0].open
         self.datahigh = self.datas[0].high
@@ -27,8 +19,10 @@ class IsolationStrategy(bt.Strategy):
         self.dataclose = self.datas[0].close
         self.datavolume = self.datas[0].volume
 
-        # Read in the data for the isolation model
-        self.model_data = pd.read_csv(data)
+        # Read in the data for the isolation model: the forest is refitted every refit_every bars
+        # (or when the data drifts) and the running mean/std are updated in O(1) per bar
+        model_data = pd.read_csv(data)["Open High Low Close Volume".split()]
+        self.model = IncrementalIsolationModel(model_data, refit_every=refit_every, drift_threshold=drift_threshold)
 
         # Initialize variables for trading
         self.buyOut = False
@@ -45,70 +39,21 @@ class IsolationStrategy(bt.Strategy):
         """This method is called on each new data point and performs the trading logic."""
         self.log(self.dataclose[0])
 
-        # Construct dataframe to predict
-        x = pd.DataFrame(
-            data=[
-                [
-                    self.dataopen[0],
-                    self.datahigh[0],
-                    self.datalow[0],
-                    self.dataclose[0],
-                    self.datavolume[0],
-                ]
-            ],
-            columns="Open High Low Close Volume".split(),
-        )
-
-        # Create the model with all known data for normalization
-        model = IsolationModel(self.model_data)
-
-        # Append today's data for tomorrow's normalization
-        self.model_data = self.model_data.append(x, ignore_index=True)
-
-        # Dataframe to help normalize x
-        mean_to_normalize = pd.DataFrame(
-            data=[
-                [
-                    np.mean(self.model_data["Open"]),
-                    np.mean(self.model_data["High"]),
-                    np.mean(self.model_data["Low"]),
-                    np.mean(self.model_data["Close"]),
-                    np.mean(self.model_data["Volume"]),
-                ]
-            ],
-            columns="Open High Low Close Volume".split(),
-        )
-
-        # Dataframe to help normalize x
-        std_to_normalize = pd.DataFrame(
-            data=[
-                [
-                    np.std(self.model_data["Open"]),
-                    np.std(self.model_data["High"]),
-                    np.std(self.model_data["Low"]),
-                    np.std(self.model_data["Close"]),
-                    np.std(self.model_data["Volume"]),
-                ]
-            ],
-            columns="Open High Low Close Volume".split(),
-        )
-
-        # Normalize x
-        normalized_x = (x - mean_to_normalize) / std_to_normalize
+        # Score today's bar with the cached model, normalized with the running mean/std of all
+        # data including today
+        x = [self.dataopen[0], self.datahigh[0], self.datalow[0], self.dataclose[0], self.datavolume[0]]
+        outlier = self.model.update(x) == -1
+        mean_close = self.model.stats.mean[3]
 
         # Check if the current data point is an outlier and if the current price is above the mean of previous prices
-        if model.predict_outlier(normalized_x) == -1 & (
-            self.dataclose[0] > np.mean(self.model_data["Close"])
-        ):
+        if outlier and self.dataclose[0] > mean_close:
             self.log("SELL CREATE, %.2f" % self.dataclose[0])
             if not self.orderPosition == 0:
                 self.sell(size=1)
                 self.orderPosition -= 1
 
         # Same but opposite conditions
-        if model.predict_outlier(normalized_x) == -1 & (
-            self.dataclose[0] < np.mean(self.model_data["Close"])
-        ) & (self.cooldown == 0):
+        if outlier and self.dataclose[0] < mean_close and self.cooldown == 0:
             self.log("BUY CREATE, %.2f" % self.dataclose[0])
             self.buy(size=1)
             self.orderPosition += 1
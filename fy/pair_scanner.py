@@ -0,0 +1,286 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+import shared_frames as sf
+
+RESULT_COLUMNS = ["stock1", "stock2", "start", "end", "maxlag", "score", "pvalue", "hedge_ratio", "corr"]
+# same collinearity cut-off as statsmodels' coint
+SQRTEPS = np.sqrt(np.finfo(float).eps)
+
+# MacKinnon (1994) response surface of the tau statistic with a constant, for N = 1..6 I(1)
+# series (the tables behind statsmodels.tsa.adfvalues.mackinnonp): polynomial coefficients,
+# lowest order first, below / above TAU_STAR, and the bounds outside of which the p-value is
+# 0 or 1
+TAU_SMALLP = np.array([
+    [2.1659, 1.4412, 3.8269],
+    [2.92, 1.5012, 3.9796],
+    [3.4699, 1.4856, 3.164],
+    [3.9673, 1.4777, 2.6315],
+    [4.5509, 1.5338, 2.9545],
+    [5.1399, 1.6036, 3.4445]]) * [1, 1, 1e-2]
+TAU_LARGEP = np.array([
+    [1.7339, 9.3202, -1.2745, -1.0368],
+    [2.1945, 6.4695, -2.9198, -4.2377],
+    [2.5893, 4.5168, -3.6529, -5.0074],
+    [3.0387, 4.5452, -3.3666, -4.1921],
+    [3.5049, 5.2098, -2.9158, -3.3468],
+    [3.9489, 5.8933, -2.5359, -2.721]]) * [1, 1e-1, 1e-1, 1e-2]
+TAU_STAR = [-1.61, -2.62, -3.13, -3.47, -3.78, -3.93]
+TAU_MIN = [-18.83, -18.86, -23.48, -28.07, -25.96, -23.27]
+TAU_MAX = [2.74, 0.92, 0.55, 0.61, 0.79, 1]
+
+# price matrix mapped from shared memory once per worker process
+_values = None
+_shm = None
+
+
+def candidate_pairs(values, min_corr=None, sectors=None):
+    """
+    Candidate Pairs.
+    Column index pairs (i < j) of a (date x ticker) price matrix worth testing, screened in one
+    vectorized pass: the correlation of daily log returns must be at least `min_corr` and, with
+    `sectors` (one label per column), both tickers must be in the same sector. Returns the two
+    index arrays and the correlation of each pair.
+    """
+    n = values.shape[1]
+    i, j = np.triu_indices(n, k=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.corrcoef(np.diff(np.log(values), axis=0), rowvar=False).reshape(n, n)[i, j]
+    keep = np.ones(len(i), dtype=bool)
+    if min_corr is not None:
+        keep &= corr >= min_corr
+    if sectors is not None:
+        sectors = np.asarray(sectors)
+        keep &= sectors[i] == sectors[j]
+    return i[keep], j[keep], corr[keep]
+
+
+def mackinnon_pvalues(stat, N=2):
+    """
+    MacKinnon approximate p-values of many unit root / cointegration test statistics with a
+    constant at once, the vectorized form of statsmodels' mackinnonp(stat, regression="c", N=N).
+    """
+    stat = np.asarray(stat, dtype=float)
+    # collinear pairs have a statistic of -inf; they are set to 0 below
+    with np.errstate(invalid="ignore", over="ignore"):
+        small = np.polyval(TAU_SMALLP[N - 1][::-1], stat)
+        large = np.polyval(TAU_LARGEP[N - 1][::-1], stat)
+    pvalue = norm.cdf(np.where(stat <= TAU_STAR[N - 1], small, large))
+    pvalue[stat > TAU_MAX[N - 1]] = 1.0
+    pvalue[stat < TAU_MIN[N - 1]] = 0.0
+    return pvalue
+
+
+def _lag_design(xt, dxt, lag, nobs):
+    # ADF regressors of every series (series x regressor x observation) with `lag` lagged
+    # differences over the last `nobs` observations, as in statsmodels' adfuller: the lagged
+    # level followed by the lagged differences
+    P, T = xt.shape
+    Z = np.empty((P, lag + 1, nobs))
+    Z[:, 0] = xt[:, T - 1 - nobs:T - 1]
+    for k in range(1, lag + 1):
+        Z[:, k] = dxt[:, T - 1 - nobs - k:T - 1 - k]
+    return Z, dxt[:, T - 1 - nobs:]
+
+
+def adf_no_trend(x, maxlag=None):
+    """
+    Batched ADF Statistic.
+    Augmented Dickey-Fuller t-statistic without constant or trend for every column of x
+    (nobs x series), with the lag length chosen by AIC like statsmodels' adfuller(x,
+    regression="n", autolag="AIC"). All lag orders of all series are fitted together from
+    stacked Gram matrices instead of one OLS per series and lag.
+    """
+    T, P = x.shape
+    if maxlag is None:
+        maxlag = min(T // 2 - 1, int(np.ceil(12.0 * np.power(T / 100.0, 1 / 4.0))))
+    xt = np.ascontiguousarray(x.T)
+    dxt = np.diff(xt, axis=1)
+
+    # lag selection on the common sample of the longest lag
+    nobs = T - 1 - maxlag
+    Z, y = _lag_design(xt, dxt, maxlag, nobs)
+    gram = np.matmul(Z, Z.transpose(0, 2, 1))
+    zy = np.einsum("pkn,pn->pk", Z, y)
+    yy = np.einsum("pn,pn->p", y, y)
+    aic = np.empty((maxlag + 1, P))
+    for lag in range(maxlag + 1):
+        k = lag + 1
+        beta = np.linalg.solve(gram[:, :k, :k], zy[:, :k, None])[..., 0]
+        ssr = yy - np.einsum("pk,pk->p", beta, zy[:, :k])
+        aic[lag] = nobs * np.log(ssr) + 2 * k
+    best = np.argmin(aic, axis=0)
+
+    # refit every series with its own lag on the longest sample available for that lag
+    stat = np.empty(P)
+    for lag in np.unique(best):
+        cols = np.flatnonzero(best == lag)
+        k = lag + 1
+        nobs = T - 1 - lag
+        Z, y = _lag_design(xt[cols], dxt[cols], lag, nobs)
+        gram_inv = np.linalg.inv(np.matmul(Z, Z.transpose(0, 2, 1)))
+        beta = np.einsum("pkl,pl->pk", gram_inv, np.einsum("pkn,pn->pk", Z, y))
+        resid = y - np.einsum("pkn,pk->pn", Z, beta)
+        sigma2 = np.einsum("pn,pn->p", resid, resid) / (nobs - k)
+        stat[cols] = beta[:, 0] / np.sqrt(sigma2 * gram_inv[:, 0, 0])
+    return stat
+
+
+def engle_granger(values, i, j, maxlag=None):
+    """
+    Batched Engle-Granger Test.
+    Cointegration test of column i on column j of a (date x ticker) price matrix for many pairs
+    at once, matching statsmodels' coint(values[:, i], values[:, j]). The cointegrating OLS of
+    every pair comes from one matrix of centered cross products shared by all pairs. Returns
+    the test statistics, their MacKinnon p-values and the hedge ratios.
+    """
+    centered = values - values.mean(axis=0)
+    cols = np.unique(np.concatenate([i, j]))
+    pos = np.searchsorted(cols, [i, j])
+    moments = centered[:, cols].T @ centered[:, cols]
+    cov = moments[pos[0], pos[1]]
+    var_i, var_j = moments[pos[0], pos[0]], moments[pos[1], pos[1]]
+    hedge_ratio = cov / var_j
+    rsquared = cov * cov / (var_i * var_j)
+
+    score = np.full(len(i), -np.inf)
+    # (almost) perfectly collinear pairs are not tested, like coint
+    tested = rsquared < 1 - 100 * SQRTEPS
+    if tested.any():
+        resid = centered[:, i[tested]] - centered[:, j[tested]] * hedge_ratio[tested]
+        score[tested] = adf_no_trend(resid, maxlag=maxlag)
+    pvalue = mackinnon_pvalues(score, N=2)
+    return score, pvalue, hedge_ratio
+
+
+def _attach_values(meta):
+    global _values, _shm
+    _shm, _values = sf.attach_values(meta)
+
+
+def _test_chunk(i, j, maxlag):
+    return engle_granger(_values, i, j, maxlag=maxlag)
+
+
+class PairScanner:
+    """
+    Cointegrated Pair Scanner.
+    Screens all ticker pairs of a price panel by return correlation (`min_corr`) and sector,
+    then runs batched Engle-Granger tests on the survivors in chunks of `chunk_size` pairs,
+    spread over a process pool when there is more than one chunk. Results are cached per
+    (pair, window, maxlag); with `cache_path` the cache is a CSV that later scans (e.g. the
+    nightly rolling re-evaluation) reuse.
+    """
+
+    def __init__(self, min_corr=None, sectors=None, max_workers=None, chunk_size=2000,
+                 maxlag=None, cache_path=None):
+        self.min_corr = min_corr
+        self.sectors = sectors
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.maxlag = maxlag
+        # the ADF lag order picked by AIC up to the default maximum is labelled "auto"
+        self.maxlag_label = "auto" if maxlag is None else str(maxlag)
+        self.cache_path = cache_path
+        self.cache = {}
+        if cache_path is not None and os.path.exists(cache_path) and os.path.getsize(cache_path):
+            cached = pd.read_csv(cache_path, dtype={"start": str, "end": str, "maxlag": str},
+                                 float_precision="round_trip")
+            if list(cached.columns) != RESULT_COLUMNS:
+                raise ValueError("{} has columns {}, expected {}".format(
+                    cache_path, list(cached.columns), RESULT_COLUMNS))
+            for row in cached.itertuples(index=False):
+                self.cache[(row.stock1, row.stock2, row.start, row.end, row.maxlag)] = row
+
+    def _test(self, values, i, j):
+        chunks = [slice(s, s + self.chunk_size) for s in range(0, len(i), self.chunk_size)]
+        if len(chunks) <= 1 or self.max_workers == 1:
+            results = [engle_granger(values, i[c], j[c], maxlag=self.maxlag) for c in chunks]
+        else:
+            shm, meta = sf.share_frame(pd.DataFrame(values))
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_attach_values, initargs=(meta,)
+                ) as pool:
+                    futures = [pool.submit(_test_chunk, i[c], j[c], self.maxlag) for c in chunks]
+                    results = [f.result() for f in futures]
+            finally:
+                shm.close()
+                shm.unlink()
+        if not results:
+            return np.empty(0), np.empty(0), np.empty(0)
+        return tuple(np.concatenate(r) for r in zip(*results))
+
+    def scan(self, prices):
+        """
+        Test every candidate pair of a (date x ticker) price frame over its whole date range.
+        Tickers with missing prices in the window are left out. Returns one row per candidate
+        pair with the test statistic, p-value, hedge ratio and return correlation.
+        """
+        prices = prices.dropna(axis=1, how="any")
+        start, end = str(prices.index[0].date()), str(prices.index[-1].date())
+        maxlag = self.maxlag_label
+        tickers = list(prices.columns)
+        values = prices.to_numpy(dtype=float)
+        sectors = None
+        if self.sectors is not None:
+            sectors = [self.sectors.get(t) for t in tickers]
+        i, j, corr = candidate_pairs(values, min_corr=self.min_corr, sectors=sectors)
+
+        todo = np.array(
+            [(tickers[a], tickers[b], start, end, maxlag) not in self.cache for a, b in zip(i, j)], dtype=bool
+        )
+        score, pvalue, hedge_ratio = self._test(values, i[todo], j[todo])
+        rows = [
+            (tickers[a], tickers[b], start, end, maxlag, s, p, h, c)
+            for a, b, s, p, h, c in zip(i[todo], j[todo], score, pvalue, hedge_ratio, corr[todo])
+        ]
+        for row in rows:
+            self.cache[row[:5]] = row
+        if self.cache_path is not None and rows:
+            write_header = not os.path.exists(self.cache_path) or os.path.getsize(self.cache_path) == 0
+            with open(self.cache_path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(RESULT_COLUMNS)
+                writer.writerows(rows)
+
+        result = [tuple(self.cache[(tickers[a], tickers[b], start, end, maxlag)]) for a, b in zip(i, j)]
+        return pd.DataFrame(result, columns=RESULT_COLUMNS)
+
+    def rolling_scan(self, prices, window, step):
+        """
+        Re-evaluate all pairs on rolling windows of `window` rows every `step` rows, ending at
+        the last date. Windows scanned before are served from the cache, so a nightly run only
+        tests the newest window.
+        """
+        ends = range(len(prices), window - 1, -step)
+        results = [self.scan(prices.iloc[e - window:e]) for e in reversed(ends)]
+        return pd.concat(results, ignore_index=True)
+
+
+def find_cointegrated_pairs(data, pvalue_threshold=0.01, **kwargs):
+    """
+    Cointegrated Pairs.
+    Score and p-value matrices of all column pairs of `data` (upper triangle, like the original
+    double loop over statsmodels' coint) and the pairs with a p-value below
+    `pvalue_threshold`. Pairs dropped by the correlation/sector screen keep a score of 0 and
+    a p-value of 1.
+    """
+    result = PairScanner(**kwargs).scan(data)
+    n = data.shape[1]
+    keys = list(data.keys())
+    pos = {k: c for c, k in enumerate(keys)}
+    score_matrix = np.zeros((n, n))
+    pvalue_matrix = np.ones((n, n))
+    i = result.stock1.map(pos).to_numpy()
+    j = result.stock2.map(pos).to_numpy()
+    score_matrix[i, j] = result.score
+    pvalue_matrix[i, j] = result.pvalue
+    pairs = [(keys[a], keys[b]) for a, b, p in zip(i, j, result.pvalue) if p < pvalue_threshold]
+    return score_matrix, pvalue_matrix, pairs
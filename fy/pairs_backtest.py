@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+SUMMARY_COLUMNS = ["stock1", "stock2", "total_return", "sharpe", "max_drawdown", "turnover", "num_trades"]
+
+
+def _rolling_sum(a, n):
+    # rolling sum over n rows from one cumulative sum; NaN until the first full window and for
+    # windows holding a NaN (which would otherwise spread through the rest of the cumsum)
+    missing = np.isnan(a)
+    c = np.cumsum(np.where(missing, 0.0, a), axis=0)
+    m = np.cumsum(missing, axis=0)
+    out = np.full(a.shape, np.nan)
+    out[n - 1] = np.where(m[n - 1] > 0, np.nan, c[n - 1])
+    out[n:] = np.where(m[n:] > m[:-n], np.nan, c[n:] - c[:-n])
+    return out
+
+
+def rolling_ols_hedge(y, x, window):
+    """
+    Rolling OLS Hedge Ratio.
+    Slope and intercept of y on x over the last `window` rows for every column of (date x pair)
+    arrays, from rolling sums of x, y, x*x and x*y (cumulative moments, no refit per window).
+    Prices are measured from their first value to keep the cumulative sums small.
+    """
+    x0, y0 = x[:1], y[:1]
+    x, y = x - x0, y - y0
+    sx, sy = _rolling_sum(x, window), _rolling_sum(y, window)
+    sxx, sxy = _rolling_sum(x * x, window), _rolling_sum(x * y, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (sxy - sx * sy / window) / (sxx - sx * sx / window)
+    alpha = (sy - beta * sx) / window + y0 - beta * x0
+    return beta, alpha
+
+
+def kalman_hedge(y, x, delta=1e-4, obs_var=1e-3):
+    """
+    Kalman Filter Hedge Ratio.
+    Time-varying slope and intercept of y = beta * x + alpha + e with both following a random
+    walk (state noise delta / (1 - delta), observation noise `obs_var`), filtered for all pairs
+    at once with the 2x2 covariance of every pair updated in closed form. Returns the filtered
+    beta and alpha after each row.
+    """
+    T, P = y.shape
+    state_var = delta / (1 - delta)
+    beta, alpha = np.zeros(P), np.zeros(P)
+    p00, p01, p11 = np.zeros(P), np.zeros(P), np.zeros(P)
+    betas, alphas = np.empty((T, P)), np.empty((T, P))
+    for t in range(T):
+        xt = x[t]
+        r00, r01, r11 = p00 + state_var, p01, p11 + state_var
+        error = y[t] - (beta * xt + alpha)
+        q = r00 * xt * xt + 2 * r01 * xt + r11 + obs_var
+        k0, k1 = (r00 * xt + r01) / q, (r01 * xt + r11) / q
+        beta = beta + k0 * error
+        alpha = alpha + k1 * error
+        p00, p01, p11 = r00 - q * k0 * k0, r01 - q * k0 * k1, r11 - q * k1 * k1
+        betas[t], alphas[t] = beta, alpha
+    return betas, alphas
+
+
+def zscore(spread, window):
+    """
+    Rolling z-score of every column from rolling sums of the spread and its square.
+    """
+    s1, s2 = _rolling_sum(spread, window), _rolling_sum(spread * spread, window)
+    mean = s1 / window
+    std = np.sqrt(np.maximum(s2 - s1 * mean, 0) / (window - 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (spread - mean) / std
+
+
+def pair_positions(z, entry=2.0, exit=0.5):
+    """
+    Z-score Positions.
+    Long the spread (+1) when z falls below -entry, short (-1) when it rises above entry and
+    flat once |z| is back under `exit`; otherwise the previous position is held.
+    """
+    signal = np.full(z.shape, np.nan)
+    signal[z < -entry] = 1
+    signal[z > entry] = -1
+    signal[np.abs(z) < exit] = 0
+    signal[np.isnan(z)] = 0
+    # carry the last signal forward
+    rows = np.where(np.isnan(signal), 0, np.arange(len(z)).reshape(-1, 1))
+    rows = np.maximum.accumulate(rows, axis=0)
+    return np.nan_to_num(np.take_along_axis(signal, rows, axis=0))
+
+
+def backtest_pairs(prices, pairs, method="ols", window=60, z_window=20, entry=2.0, exit=0.5,
+                   cost=0.0, start=None, delta=1e-4, obs_var=1e-3):
+    """
+    Pairs Backtest.
+    Evaluates z-score entry/exit rules for many (stock1, stock2) pairs of a (date x ticker)
+    price frame at once. The spread is stock1 minus the hedge ratio times stock2 using the
+    hedge estimated up to the previous row (rolling OLS over `window` rows or a Kalman
+    filter); positions are taken at the close and one unit of spread is long 1 share of
+    stock1 and short hedge ratio shares of stock2, rebalanced to the latest hedge. Returns are
+    measured on the gross value of one unit of spread, net of `cost` per unit of turnover.
+    Trading starts at `start` (earlier rows only warm up the estimates), so the results are
+    out-of-sample when `start` follows the window the pairs were selected on. Returns a dict
+    of (date x pair) frames (returns, equity, drawdown, turnover, positions, hedge_ratio) and
+    a per-pair `summary`.
+    """
+    pairs = list(pairs)
+    y = prices[[p[0] for p in pairs]].to_numpy(dtype=float)
+    x = prices[[p[1] for p in pairs]].to_numpy(dtype=float)
+    if method == "ols":
+        hedge, intercept = rolling_ols_hedge(y, x, window)
+    elif method == "kalman":
+        hedge, intercept = kalman_hedge(y, x, delta=delta, obs_var=obs_var)
+    else:
+        raise ValueError("method must be 'ols' or 'kalman'")
+
+    prior_hedge = np.vstack([np.full((1, len(pairs)), np.nan), hedge[:-1]])
+    prior_intercept = np.vstack([np.full((1, len(pairs)), np.nan), intercept[:-1]])
+    z = zscore(y - prior_hedge * x - prior_intercept, z_window)
+    pos = pair_positions(z, entry=entry, exit=exit)
+    if start is not None:
+        pos[prices.index < pd.Timestamp(start)] = 0
+
+    hedge = np.nan_to_num(hedge)
+    shares_y, shares_x = pos, -pos * hedge
+    capital = y + np.abs(hedge) * x
+    returns = np.zeros(y.shape)
+    returns[1:] = (shares_y[:-1] * np.diff(y, axis=0) + shares_x[:-1] * np.diff(x, axis=0)) / capital[:-1]
+    traded = np.abs(np.diff(shares_y, axis=0, prepend=0)) * y + np.abs(np.diff(shares_x, axis=0, prepend=0)) * x
+    turnover = traded / capital
+    returns -= cost * turnover
+
+    equity = np.cumprod(1 + returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+    entries = (pos != 0) & (np.diff(pos, axis=0, prepend=0) != 0)
+
+    trading = np.ones(len(prices), dtype=bool) if start is None else prices.index >= pd.Timestamp(start)
+    trading_returns = returns[trading]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = trading_returns.mean(axis=0) / trading_returns.std(axis=0) * np.sqrt(252)
+    summary = pd.DataFrame({
+        "stock1": [p[0] for p in pairs],
+        "stock2": [p[1] for p in pairs],
+        # nothing is traded before `start`, so equity starts there at 1
+        "total_return": (equity[-1] - 1) * 100,
+        "sharpe": sharpe,
+        "max_drawdown": drawdown[trading].min(axis=0) * 100,
+        "turnover": turnover[trading].sum(axis=0),
+        "num_trades": entries[trading].sum(axis=0),
+    }, columns=SUMMARY_COLUMNS)
+
+    columns = pd.MultiIndex.from_tuples([tuple(p[:2]) for p in pairs], names=["stock1", "stock2"])
+    frame = lambda values: pd.DataFrame(values, index=prices.index, columns=columns)
+    return {
+        "returns": frame(returns),
+        "equity": frame(equity),
+        "drawdown": frame(drawdown),
+        "turnover": frame(turnover),
+        "positions": frame(pos),
+        "hedge_ratio": frame(hedge),
+        "summary": summary,
+    }
+
+
+def rank_pairs(scan, prices, by="sharpe", **kwargs):
+    """
+    Out-of-sample Pair Ranking.
+    Backtests the pairs of a PairScanner result on the prices after the window they were
+    tested on (the scan's `end`) and returns the scan joined with the backtest summary, best
+    `by` first.
+    """
+    if scan.empty:
+        return scan.reindex(columns=list(scan.columns) + SUMMARY_COLUMNS[2:])
+    start = pd.Timestamp(scan["end"].max()) + pd.Timedelta(days=1)
+    result = backtest_pairs(prices, zip(scan.stock1, scan.stock2), start=start, **kwargs)
+    ranked = scan.merge(result["summary"], on=["stock1", "stock2"])
+    return ranked.sort_values(by, ascending=False, ignore_index=True)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+
+def gbm_step(drift, volatility, time_period):
+    """
+    Per-step mean and standard deviation of the Euler discretised Geometric Brownian Motion
+    dS = S * drift * dt + S * volatility * dW with dt = time_period.
+    """
+    return drift * time_period, volatility * np.sqrt(time_period)
+
+
+def simulate(start_price, step_mean, step_std, steps, paths, seed=None, chunk_size=50_000,
+             percentiles=(5, 50, 95), bands=(0.05, 0.25, 0.5, 0.75, 0.95), keep_paths=False,
+             sample_paths=0):
+    """
+    Monte Carlo Price Paths.
+    Simulates `paths` price paths of `steps` steps where each step multiplies the price by
+    (1 + shock), shock ~ N(step_mean, step_std). Shocks are drawn from a seeded
+    np.random.Generator as one (steps x paths) block per chunk of at most `chunk_size` paths
+    into a single reusable buffer, so memory stays bounded for millions of paths. Returns a
+    dict with the terminal prices, their `percentiles`, the mean path and the quantile `bands`
+    of the price at every step (a DataFrame, step x quantile), plus all paths (steps + 1 x
+    paths, first row the start price) only with keep_paths=True. `sample_paths` keeps just the
+    first that many paths (as "sample_paths"), enough to plot without materializing all of
+    them. Bands are exact when the paths are kept or fit in one chunk; otherwise they are the
+    path-weighted average of the chunks' quantiles, an approximation, and "bands_exact" is
+    False. The same seed and chunk_size reproduce the same paths.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    terminal = np.empty(paths)
+    path_sum = np.zeros(steps + 1)
+    band_sum = np.zeros((steps + 1, len(bands)))
+    kept = np.empty((steps + 1, paths)) if keep_paths else None
+    sample = np.empty((steps + 1, min(sample_paths, paths))) if sample_paths else None
+    # with every path at hand the bands are computed once at the end
+    chunk_bands = len(bands) and not keep_paths
+
+    # a single buffer reused by every chunk: the shocks become growth factors and then prices
+    # in place
+    buffer = np.empty((steps + 1) * min(chunk_size, paths))
+    done = 0
+    while done < paths:
+        n = min(chunk_size, paths - done)
+        prices = buffer[:(steps + 1) * n].reshape(steps + 1, n)
+        prices[0] = start_price
+        rng.standard_normal(out=prices[1:])
+        prices[1:] *= step_std
+        prices[1:] += 1 + step_mean
+        np.cumprod(prices, axis=0, out=prices)
+
+        terminal[done:done + n] = prices[-1]
+        path_sum += prices.sum(axis=1)
+        if chunk_bands:
+            band_sum += np.quantile(prices, bands, axis=1).T * n
+        if keep_paths:
+            kept[:, done:done + n] = prices
+        if sample is not None and done < sample.shape[1]:
+            take = min(n, sample.shape[1] - done)
+            sample[:, done:done + take] = prices[:, :take]
+        done += n
+
+    if len(bands) and keep_paths:
+        band_sum = np.quantile(kept, bands, axis=1).T * paths
+
+    return {
+        "terminal": terminal,
+        "percentiles": dict(zip(percentiles, np.percentile(terminal, percentiles))),
+        "mean_path": path_sum / paths,
+        "bands": pd.DataFrame(band_sum / paths, columns=list(bands)),
+        "bands_exact": keep_paths or paths <= chunk_size,
+        "paths": kept,
+        "sample_paths": sample,
+    }
+
+
+def plot_simulation(result, title=None, max_paths=100, ax=None):
+    """
+    Plot the quantile bands of a simulation and, when its paths or a sample of them were kept,
+    up to `max_paths` of them. Approximate bands (see `simulate`) are labelled as such.
+    """
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        _, ax = plt.subplots(figsize=(10, 6))
+    paths = result["paths"] if result["paths"] is not None else result.get("sample_paths")
+    if paths is not None:
+        ax.plot(paths[:, :max_paths], linewidth=0.5, alpha=0.5)
+    bands = result["bands"]
+    for q in bands.columns:
+        ax.plot(bands.index, bands[q], color="black", linestyle="--" if q != 0.5 else "-", linewidth=1)
+    if not result["bands_exact"]:
+        print("Quantile bands are approximate: averaged over chunks of paths")
+        title = "{} (approximate bands)".format(title) if title else "Approximate bands"
+    ax.set_title(title)
+    ax.set_xlabel("Days")
+    ax.set_ylabel("Price")
+    return ax
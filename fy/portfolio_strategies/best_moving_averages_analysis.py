@@ -2,8 +2,12 @@ import yfinance
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.stats import ttest_ind
 import datetime as dt
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import sma_scan as ss
 
 # Define the stock symbol and the number of days forward
 symbol = "TSLA"
@@ -48,58 +52,23 @@ plt.show()
 ticker = yfinance.Ticker(symbol)
 data = ticker.history(interval="1d", start=start_date, end=end_date)
 
-# Add a column for the forward close price and calculate the forward return
-data['Forward Close'] = data['Close'].shift(-days_forward)
-data['Forward Return'] = (data['Forward Close'] - data['Close']) / data['Close']
-
-result = []
 train_size = 0.6
 
-# Loop through different SMA lengths to find the best one for predicting the forward return
-for sma_length in range(20, 500):
-    # Calculate the SMA of the stock price and add a binary input based on whether the price is above or below the SMA
-    data['SMA'] = data['Close'].rolling(sma_length).mean()
-    data['input'] = [int(x) for x in data['Close'] > data['SMA']]
-
-    # Drop rows with missing values
-    df = data.dropna()
-
-    # Split the data into training and test sets
-    training = df.head(int(train_size * df.shape[0]))
-    test = df.tail(int((1 - train_size) * df.shape[0]))
-
-    # Calculate the mean forward return for the training and test sets
-    tr_returns = training[training['input'] == 1]['Forward Return']
-    test_returns = test[test['input'] == 1]['Forward Return']
-    meadays_forward_return_training = tr_returns.mean()
-    meadays_forward_return_test = test_returns.mean()
-
-    # Calculate the p-value of the difference in means between the training and test sets
-    pvalue = ttest_ind(tr_returns,test_returns,equal_var=False)[1]
-
-    result.append({
-        f'Best SMA for {days_forward} days forward':sma_length,
-        'Training Forward Return': meadays_forward_return_training,
-        'Test Forward Return': meadays_forward_return_test,
-        'p-value':pvalue
-    })
-
-# Sort result by training forward return
-result.sort(key = lambda x : -x['Training Forward Return'])
+# Scan the SMA lengths to find the best one for predicting the forward return: the mean forward
+# return of the days the price is above the SMA in the training and test sets and the p-value of
+# the difference in means between them, for every length at once, best training return first
+result = ss.sma_scan(data['Close'].rename(symbol), lengths=range(20, 500), days_forward=days_forward,
+                     train_size=train_size)
+best = result.iloc[0]
 
 # Print each return %
-for key, value in result[0].items():
-    if key == "Training Forward Return":
-        value = str(round(value, 4) * 100) + '%'
-        print (key + ':', value)
-    elif key == "Test Forward Return":
-        value = str(round(value, 4) * 100) + '%'
-        print (key + ':', value)
-    else:
-        print (key + ':', value)
-        
+print(f'Best SMA for {days_forward} days forward:', best['SMA Length'])
+print('Training Forward Return:', str(round(best['Training Forward Return'], 4) * 100) + '%')
+print('Test Forward Return:', str(round(best['Test Forward Return'], 4) * 100) + '%')
+print('p-value:', best['p-value'])
+
 # Display best SMA
-best_sma = result[0][f'Best SMA for {days_forward} days forward']
+best_sma = int(best['SMA Length'])
 data['SMA'] = data['Close'].rolling(best_sma).mean()
 
 # Show Best SMA on stock
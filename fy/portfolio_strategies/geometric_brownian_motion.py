@@ -1,12 +1,16 @@
 # Import dependencies
 import matplotlib.pyplot as plt
 import numpy as np
-import math
 import yahoo_fin.stock_info as si
 from pandas_datareader import DataReader
 import pandas as pd
 import datetime
 from pylab import rcParams
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import path_simulation as sim
 
 # Define the number of years to go back in time to fetch data
 num_of_years = 5
@@ -40,7 +44,7 @@ dfsm = dfsm.dropna()
 covmat = np.cov(dfsm['s_returns'], dfsm['b_returns'])
 
 class GBM:
-    def __init__(self, initial_price, drift, volatility, time_period, total_time):
+    def __init__(self, initial_price, drift, volatility, time_period, total_time, num_paths=1, seed=None):
         # Initialize fields
         self.initial_price = initial_price
         self.current_price = initial_price
@@ -48,19 +52,27 @@ class GBM:
         self.volatility = volatility
         self.time_period = time_period
         self.total_time = total_time
+        self.num_paths = num_paths
+        self.seed = seed
         self.prices = []
         # Simulate the diffusion process
         self.simulate()
 
     def simulate(self):
-        while self.total_time > 0:
-            # Calculate the change in the stock price using the Geometric Brownian Motion formula
-            dS = self.current_price * self.drift * self.time_period + \
-                self.current_price * self.volatility * np.random.normal(0, math.sqrt(self.time_period))
-            # Update the stock price
-            self.prices.append(self.current_price + dS)
-            self.current_price += dS
-            self.total_time -= self.time_period
+        # Each step changes the price by dS = S * drift * dt + S * volatility * N(0, sqrt(dt));
+        # all steps of all paths are drawn at once
+        steps = int(round(self.total_time / self.time_period))
+        step_mean, step_std = sim.gbm_step(self.drift, self.volatility, self.time_period)
+        result = sim.simulate(self.current_price, step_mean, step_std, steps, self.num_paths,
+                              seed=self.seed, bands=(), keep_paths=True)
+        # prices after the initial one, (steps x paths) when simulating several paths
+        if self.num_paths > 1:
+            self.prices = result["paths"][1:]
+            self.current_price = result["terminal"]
+        else:
+            self.prices = result["paths"][1:, 0]
+            self.current_price = result["terminal"][0]
+        self.total_time = 0
 
 # Set the parameters for the Geometric Brownian Motion simulation
 n = 20 # Number of simulations
@@ -70,13 +82,12 @@ volatility = np.sqrt(covmat[0,0]) # Use the volatility of the stock
 time_period = 1 / 365 # Daily
 total_time = 1 # 1 day
 
-# Run the Geometric Brownian Motion simulation n times
-simulations = [GBM(initial_price, drift, volatility, time_period, total_time) for i in range(n)]
+# Run the n Geometric Brownian Motion simulations in one pass
+simulation = GBM(initial_price, drift, volatility, time_period, total_time, num_paths=n)
 
 # Plot the results
 rcParams['figure.figsize'] = 15, 10 
-for sim in simulations:
-    plt.plot(np.arange(0, len(sim.prices)), sim.prices)
+plt.plot(np.arange(0, len(simulation.prices)), simulation.prices)
 
 # Add the title, legend, and axis labels
 plt.title(f'Geometric Brownian Motion for {stock.upper()}')
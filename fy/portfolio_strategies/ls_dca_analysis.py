@@ -1,11 +1,15 @@
 # Import dependencies
-import pandas as pd
 from pandas_datareader import DataReader
 import datetime as dt
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.ticker as ticker
 import numpy as np
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import dca as dc
 
 # Set default figure size
 plt.rcParams['figure.figsize'] = (15, 10)
@@ -22,32 +26,6 @@ stock = input('Enter a ticker: ')
 # Retrieve stock data from Yahoo Finance API
 data = DataReader(stock, "yahoo", start_date, end_date)
 
-def lumpsum(invest_date, principal=10000):
-    """Calculate investment return for lump sum investing."""
-    invest_price = data.loc[invest_date]['Adj Close']
-    current_price = data['Adj Close'][-1]
-    
-    investment_return = (current_price / invest_price) -1
-    
-    return principal*(1+investment_return)
-
-def dollar_cost_average(invest_date, periods=12, freq='30D', principal=10000): 
-    """Calculate investment return for dollar-cost averaging."""
-    dca_dates = pd.date_range(invest_date, periods=periods, freq=freq)
-    # Drop dates that are beyond the data's last date
-    dca_dates = dca_dates[dca_dates < data.index[-1]]
-    
-    # Calculate the amount of money that can't be invested due to the cut-off of the last date
-    cut_off_count = 12 - len(dca_dates)
-    cut_off_value = cut_off_count*(principal/periods)
-    
-    # Calculate the value of the invested money
-    dca_value = cut_off_value
-    for date in dca_dates:
-        trading_date = data.index[data.index.searchsorted(date)]
-        dca_value += lumpsum(trading_date, principal= principal/periods)
-    return dca_value
-
 # Plot ticker 
 data_price = data['Adj Close']
 fig, ax = plt.subplots()
@@ -63,9 +41,10 @@ ax.set_ylabel('Price ($)', size=14)
 ax.set_xlabel('Date', size=14)
 plt.show()
 
-# Calculate investment returns for lump sum and dollar-cost averaging
-lump_sum = [lumpsum(x) for x in data.index]
-dca = [dollar_cost_average(i) for i in data.index]
+# Calculate investment returns for lump sum and dollar-cost averaging (12 installments every
+# 30 days) for every start date at once
+lump_sum = dc.lump_sum(data['Adj Close'], principal=10000)
+dca = dc.dollar_cost_average(data['Adj Close'], periods=12, freq='30D', principal=10000)
 
 # Plot investment returns for both strategies
 fig, ax = plt.subplots()
@@ -84,7 +63,7 @@ plt.legend(['Lump Sum Value', 'DCA Value'])
 plt.show()
 
 # Calculate the difference in investment returns between the two strategies
-difference = np.array(lump_sum) - np.array
+difference = np.array(lump_sum) - np.array(dca)
 
 # Style
 fig, ax = plt.subplots()
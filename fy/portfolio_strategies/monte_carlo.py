@@ -4,11 +4,20 @@ import math
 import matplotlib.pyplot as plt
 import pandas as pd
 from datetime import datetime
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import price_store as ps
+import path_simulation as sim
 
 # Function to download stock data
 def download_data(symbol, source, start, end):
     start = datetime.strptime(start, '%d-%m-%Y')
     end = datetime.strptime(end, '%d-%m-%Y')
+    if source == 'yahoo':
+        # served from the local price store; only dates not on disk yet are downloaded
+        return ps.get_history(symbol, start, end)
     df = web.DataReader(symbol, data_source=source, start=start, end=end)
     return df
 
@@ -25,33 +34,26 @@ def cagr(df):
     return ((((quote[-1]) / quote[1])) ** (365.0/days)) - 1
 
 # Monte Carlo Simulation Function
-def monte_carlo_simulation(symbol, source, start, end, simulations, days_predicted):
+def monte_carlo_simulation(symbol, source, start, end, simulations, days_predicted, seed=None, plot=True):
     df = download_data(symbol, source, start, end)
     mu = cagr(df)
     vol = annual_volatility(df)
     start_price = df['Close'][-1]
 
-    results = []
-    plt.figure(figsize=(10, 6))
-    
-    # Run simulations
-    for _ in range(simulations):
-        prices = [start_price]
-        for _ in range(days_predicted):
-            shock = np.random.normal(mu / days_predicted, vol / math.sqrt(days_predicted))
-            prices.append(prices[-1] * (1 + shock))
-        plt.plot(prices)
-        results.append(prices[-1])
+    # Run simulations: all paths in (days x paths) blocks, only the statistics and the paths
+    # drawn on the plot are kept
+    result = sim.simulate(start_price, mu / days_predicted, vol / math.sqrt(days_predicted),
+                          days_predicted, simulations, seed=seed, percentiles=(5, 95),
+                          sample_paths=100 if plot else 0)
 
-    plt.title(f"{symbol} Monte Carlo Simulation")
-    plt.xlabel("Days")
-    plt.ylabel("Price")
-    plt.show()
+    if plot:
+        sim.plot_simulation(result, title=f"{symbol} Monte Carlo Simulation")
+        plt.show()
 
     return pd.DataFrame({
-        "Results": results,
-        "Percentile 5%": np.percentile(results, 5),
-        "Percentile 95%": np.percentile(results, 95)
+        "Results": result["terminal"],
+        "Percentile 5%": result["percentiles"][5],
+        "Percentile 95%": result["percentiles"][95]
     })
 
 # Main function
@@ -6,9 +6,14 @@ import yfinance as yf
 import seaborn
 import statsmodels
 import statsmodels.api as sm
-from statsmodels.tsa.stattools import coint
 import datetime
 from pandas_datareader import data as pdr
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import pair_scanner as psn
+import pairs_backtest as pb
 
 # Override pandas_datareader's DataReader method to use Yahoo finance
 yf.pdr_override()
@@ -25,28 +30,9 @@ stocks = ['CFG', 'KEY', 'JPM', 'SPY']
 data = pdr.get_data_yahoo(stocks, start, end)['Adj Close']
 data = data.dropna()
 
-# Find cointegrated pairs of stocks from the given data.
-def find_cointegrated_pairs(data):
-    n = data.shape[1]
-    score_matrix = np.zeros((n, n))
-    pvalue_matrix = np.ones((n, n))
-    keys = data.keys()
-    pairs = []
-    for i in range(n):
-        for j in range(i + 1, n):
-            S1 = data[keys[i]]
-            S2 = data[keys[j]]
-            result = coint(S1, S2)
-            score = result[0]
-            pvalue = result[1]
-            score_matrix[i, j] = score
-            pvalue_matrix[i, j] = pvalue
-            if pvalue < 0.01:
-                pairs.append((keys[i], keys[j]))
-    return score_matrix, pvalue_matrix, pairs
-
-# Find the cointegrated pairs of stocks from the given data
-scores, pvalues, pairs = find_cointegrated_pairs(data)
+# Find the cointegrated pairs of stocks from the given data: one batched Engle-Granger pass over
+# all pairs (pass min_corr/sectors to screen candidates on large universes)
+scores, pvalues, pairs = psn.find_cointegrated_pairs(data)
 
 # Plot a heatmap of the p-values
 seaborn.heatmap(pvalues, xticklabels=data.columns, yticklabels=data.columns, cmap='plasma', mask=(pvalues >= 0.01))
@@ -68,11 +54,9 @@ else:
     values = []
 
     # Find the pair with the lowest p-value and calculate the spread between the stocks
-    n = 0
+    keys = list(data.keys())
     for i in coint_pairs:
-        S1 = data[i[0]]
-        S2 = data[i[1]]
-        score, pvalue, _ = coint(S1, S2)
+        pvalue = pvalues[keys.index(i[0]), keys.index(i[1])]
         print(f'p-value between {i[0]} and {i[1]}: ' + str(pvalue))
         values.append(pvalue)
     
@@ -92,4 +76,12 @@ else:
     plt.title(f'Rolling 20-Day Spread Between {pairs[min_val][0]} and {pairs[min_val][1]}')
     plt.xlabel('Dates')
     plt.ylabel('Spread')
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+# Rank the pairs out-of-sample: test cointegration on the first half of the data, then backtest
+# the z-score rules (enter at |z| > 2, exit at |z| < 0.5) with a rolling 40-day hedge ratio on
+# the second half
+split = len(data) // 2
+scan = psn.PairScanner().scan(data.iloc[:split])
+ranked = pb.rank_pairs(scan[scan.pvalue < 0.05], data, window=40, z_window=20, entry=2.0, exit=0.5)
+print(ranked[['stock1', 'stock2', 'pvalue', 'total_return', 'sharpe', 'max_drawdown', 'num_trades']])
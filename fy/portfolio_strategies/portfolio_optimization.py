@@ -3,13 +3,17 @@ import datetime
 import numpy as np
 import pandas as pd
 import scipy.optimize as sco
-import pandas_datareader as pdr
 import matplotlib.pyplot as plt
+import sys
+import os
 from pypfopt import risk_models
 from pypfopt import expected_returns
 from pandas.plotting import register_matplotlib_converters
 from pypfopt.efficient_frontier import EfficientFrontier
 from pypfopt.discrete_allocation import DiscreteAllocation, get_latest_prices
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import price_store as ps
 
 # Registering converters for using matplotlib's plot_date() function.
 register_matplotlib_converters()
@@ -21,10 +25,10 @@ pd.set_option("display.max_rows", None)
 # Defining stocks to include in the portfolio
 stocks = ["SCHB", "AAPL", "AMZN", "TSLA", "AMD", "MSFT", "NFLX"]
 
-# Getting historical data from Yahoo Finance
+# Getting historical data from the local price store (only missing dates are downloaded)
 start = datetime.date(2020, 8, 13)
 end = datetime.datetime.now()
-df = pdr.get_data_yahoo(stocks, start=start, end=end)["Close"]
+df = ps.get_prices(stocks, start, end)["Close"]
 
 # Printing the last few rows of the data
 print(df.tail())
@@ -6,6 +6,11 @@ import matplotlib.dates as mpl_dates
 import matplotlib.pyplot as plt
 from pandas_datareader import data as pdr
 import datetime
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import levels as lv
 
 # Setup
 yf.pdr_override()
@@ -29,33 +34,9 @@ df["Date"] = df["Date"].apply(mpl_dates.date2num)
 # Select the relevant columns
 df = df.loc[:, ["Date", "Open", "High", "Low", "Close"]]
 
-# Calculate support and resistance levels
-def isSupport(df, i):
-    support = (
-        df["Low"][i] < df["Low"][i - 1]
-        and df["Low"][i] < df["Low"][i + 1]
-        and df["Low"][i + 1] < df["Low"][i + 2]
-        and df["Low"][i - 1] < df["Low"][i - 2]
-    )
-    return support
-
-
-def isResistance(df, i):
-    resistance = (
-        df["High"][i] > df["High"][i - 1]
-        and df["High"][i] > df["High"][i + 1]
-        and df["High"][i + 1] > df["High"][i + 2]
-        and df["High"][i - 1] > df["High"][i - 2]
-    )
-    return resistance
-
-
-levels = []
-for i in range(2, df.shape[0] - 2):
-    if isSupport(df, i):
-        levels.append((i, df["Low"][i]))
-    elif isResistance(df, i):
-        levels.append((i, df["High"][i]))
+# Find the fractal support and resistance pivots and cluster the ones closer than the mean
+# range of the stock price into levels, with the number of bars that touched each level
+levels = lv.find_levels(df["High"].rename(ticker.upper()), df["Low"].rename(ticker.upper()))
 
 # Plot support and resistance levels
 def plot_all(df, levels):
@@ -73,56 +54,20 @@ def plot_all(df, levels):
 
     fig.tight_layout()
 
-    for level in levels:
+    for _, level in levels.iterrows():
         plt.hlines(
-            level[1], xmin=df["Date"][level[0]], xmax=max(df["Date"]), colors="blue"
+            level["Level"], xmin=df["Date"][level["First Date"]], xmax=max(df["Date"]), colors="blue"
         )
     fig.show()
 
-# Calculate the mean of the range of the stock price
-s = np.mean(df["High"] - df["Low"])
-
-# Take out close support and resistance levels
-def isFarFromLevel(l, levels, s):
-    return np.sum([abs(l - x) < s for x in levels]) == 0
-
-# Add to list of levels
-levels = []
-for i in range(2, df.shape[0] - 2):
-    if isSupport(df, i):
-        l = df["Low"][i]
-        w = "Support"
-        if isFarFromLevel(l, levels, s):
-            levels.append((i, l))
-    elif isResistance(df, i):
-        l = df["High"][i]
-        w = "Resistance"
-
-        if isFarFromLevel(l):
-            levels.append((i, l))
-
-# Identify dates and prices for each level
-dates = [x[0] for x in levels]
-prices = [x[1] for x in levels]
-
-# Identify support or resistance on each date
-which = []
-for date, price in zip(dates, prices):
-    for i in range(2, df.shape[0] - 2):
-        if price == df["Low"][i]:
-            w = "Support"
-
-        elif price == df["High"][i]:
-            w = "Resistance"
-
-        else:
-            continue
-    which.append(w)
-
-# Create and display dataframe with data
-new_dates = [start_date + datetime.timedelta(days=date) for date in dates]
-frame = pd.DataFrame(zip(new_dates, which, prices), columns=["Date", "Support or Resistance", "Price"]).set_index("Date")
+# Identify support or resistance for each level, dated by its first pivot
+frame = pd.DataFrame({
+    "Date": [mpl_dates.num2date(df["Date"][i]).date() for i in levels["First Date"]],
+    "Support or Resistance": np.where(levels["Supports"] >= levels["Resistances"], "Support", "Resistance"),
+    "Price": levels["Level"],
+    "Touches": levels["Touches"],
+}).set_index("Date")
 print(frame)
 
 # Plot data
-plot_all()
\ No newline at end of file
+plot_all(df, levels)
@@ -0,0 +1,343 @@
+import datetime as dt
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+from pandas.tseries.offsets import CustomBusinessDay
+
+import fetch_scheduler as fs
+
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_data")
+ONE_DAY = pd.Timedelta(days=1)
+
+
+def to_date(value):
+    return pd.Timestamp(value).tz_localize(None).normalize()
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    NYSE full-day holidays (regular rules only, no one-off closures).
+    """
+
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-06-19", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+TRADING_DAY = CustomBusinessDay(calendar=NYSEHolidayCalendar())
+
+
+def trading_days(start, end):
+    """
+    NYSE trading days between `start` and `end` (inclusive).
+    """
+    return pd.date_range(to_date(start), to_date(end), freq=TRADING_DAY)
+
+
+class YahooSource:
+    """
+    Yahoo Finance source.
+    Fetches daily OHLCV in multi-ticker `yf.download` calls of up to `batch_size` tickers,
+    run through a `FetchScheduler` so the batches respect its rate limit and retries. yfinance
+    keeps the results of a download in module-global state that every call resets, so the
+    batches run one at a time (`max_per_host=1`) and each is threaded inside yfinance instead.
+    Date ranges are inclusive on both ends.
+    """
+
+    name = "yahoo"
+    host = "query1.finance.yahoo.com"
+
+    def __init__(self, scheduler=None, batch_size=100):
+        self.scheduler = scheduler if scheduler is not None else fs.FetchScheduler(rate=2, max_per_host=1)
+        self.batch_size = batch_size
+
+    def _download(self, tickers, start, end):
+        import yfinance as yf
+
+        data = yf.download(
+            list(tickers),
+            start=start,
+            end=end + ONE_DAY,
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+        )
+        # yf.download does not raise on failed tickers, they come back missing or all-NaN
+        result, empty = {}, set()
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                df = data[ticker] if ticker in data.columns.get_level_values(0) else data.iloc[:0]
+            else:
+                df = data
+            df = df.dropna(how="all")
+            if len(df):
+                result[ticker] = df
+            else:
+                empty.add(ticker)
+
+        # no rows is the right answer for a range without a completed trading day (a weekend,
+        # a holiday, or today), so only empty results over trading days count as failures
+        if not empty or len(trading_days(start, min(end, to_date(dt.date.today()) - ONE_DAY))) == 0:
+            return result, set()
+        if len(empty) == len(tickers):
+            raise fs.RetryableError("yfinance returned no data for {} tickers ({}...) between {} and {}".format(
+                len(tickers), tickers[0], start.date(), end.date()))
+        return result, empty
+
+    def fetch(self, tickers, start, end):
+        """
+        ({ticker: DataFrame}, failed tickers) for `tickers` between `start` and `end`.
+        """
+        batches = [tuple(b) for b in fs.batched(tickers, self.batch_size)]
+        results, errors = self.scheduler.map(lambda b: self._download(b, start, end), batches, self.host)
+        frames, failed = {}, set()
+        for batch, e in errors.items():
+            print("Failed to fetch {} tickers ({}...): {}".format(len(batch), batch[0], e))
+            failed.update(batch)
+        for result, batch_failed in results.values():
+            frames.update(result)
+            failed.update(batch_failed)
+        return frames, failed
+
+
+class HTTPCSVSource:
+    """
+    HTTP CSV source.
+    Fetches one CSV per ticker from `url`, a template with {ticker}, {start} and {end}
+    placeholders (e.g. "http://localhost:8000/{ticker}.csv?start={start}&end={end}"), in the
+    yfinance layout. Requests run concurrently through a `FetchScheduler`.
+    """
+
+    name = "http"
+
+    def __init__(self, url, scheduler=None):
+        self.url = url
+        self.scheduler = scheduler if scheduler is not None else fs.FetchScheduler()
+
+    def fetch(self, tickers, start, end):
+        urls = {
+            self.url.format(ticker=t, start=start.date(), end=end.date()): t for t in tickers
+        }
+        responses, errors = self.scheduler.get_many(urls)
+        for url, e in errors.items():
+            print("Failed to fetch {}: {}".format(urls[url], e))
+        result = {}
+        for url, response in responses.items():
+            df = pd.read_csv(io.StringIO(response.text), index_col=0, parse_dates=True)
+            result[urls[url]] = df[(df.index >= start) & (df.index <= end)]
+        return result, {urls[url] for url in errors}
+
+
+class CSVSource:
+    """
+    Local file source.
+    Serves `{directory}/{ticker}.csv` files in the yfinance layout (Date index, OHLCV columns);
+    used as a fake source in tests and to import previously downloaded CSVs. Every call is
+    recorded in `requests`. A missing file means no data, not a failure.
+    """
+
+    name = "csv"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.requests = []
+
+    def fetch(self, tickers, start, end):
+        self.requests.append((tuple(tickers), start, end))
+        result = {}
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+            result[ticker] = df[(df.index >= start) & (df.index <= end)]
+        return result, set()
+
+
+class PriceStore:
+    """
+    Local OHLCV store.
+    One partition per ticker under `root/<ticker>/`: a `dates.npy` int64 array, a `values.npy`
+    (date x field) float64 matrix that is memory-mapped on read, and a `meta.json` with the
+    covered date range and the last update time. Requests are served from disk and only the
+    date ranges not yet covered are fetched from `source`, batched across tickers. A source's
+    `fetch(tickers, start, end)` returns ({ticker: DataFrame}, failed tickers); a range is
+    marked as covered only for the tickers it was fetched for without error.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, source=None):
+        self.root = root
+        self.source = source if source is not None else YahooSource()
+
+    def _path(self, ticker, name):
+        return os.path.join(self.root, ticker.replace(os.sep, "_"), name)
+
+    def metadata(self, ticker):
+        path = self._path(ticker, "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def read(self, ticker):
+        """
+        Everything stored for `ticker` as an OHLCV DataFrame (empty if nothing is stored).
+        """
+        meta = self.metadata(ticker)
+        if meta is None or meta["rows"] == 0:
+            return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+        dates = np.load(self._path(ticker, "dates.npy"))
+        values = np.load(self._path(ticker, "values.npy"), mmap_mode="r")
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name="Date"), columns=meta["columns"])
+
+    def _write(self, ticker, df, start, end):
+        directory = os.path.dirname(self._path(ticker, "meta.json"))
+        os.makedirs(directory, exist_ok=True)
+        columns = [c for c in FIELDS if c in df.columns]
+        arrays = {
+            "dates.npy": df.index.to_numpy(dtype="datetime64[ns]").astype(np.int64),
+            "values.npy": np.ascontiguousarray(df[columns].to_numpy(dtype=float)),
+        }
+        for name, array in arrays.items():
+            tmp = self._path(ticker, name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, self._path(ticker, name))
+
+        meta = {
+            "ticker": ticker,
+            "columns": columns,
+            "rows": len(df),
+            "start": str(start.date()),
+            "end": str(end.date()),
+            "first_date": str(df.index[0].date()) if len(df) else None,
+            "last_date": str(df.index[-1].date()) if len(df) else None,
+            "source": getattr(self.source, "name", type(self.source).__name__),
+            "last_updated": dt.datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp = self._path(ticker, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(tmp, self._path(ticker, "meta.json"))
+
+    def missing_ranges(self, ticker, start, end):
+        """
+        Inclusive date ranges within [start, end] not yet covered for `ticker`. Coverage is
+        kept contiguous, so a request past the stored range also fills the gap in between.
+        """
+        start, end = to_date(start), to_date(end)
+        meta = self.metadata(ticker)
+        if meta is None:
+            return [(start, end)]
+        covered_start, covered_end = to_date(meta["start"]), to_date(meta["end"])
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start - ONE_DAY))
+        if end > covered_end:
+            ranges.append((covered_end + ONE_DAY, end))
+        return ranges
+
+    def update(self, tickers, start, end):
+        """
+        Fetch the missing date ranges of all `tickers`; tickers missing the same range are
+        fetched together in one source request.
+        """
+        start, end = to_date(start), to_date(end)
+        # today's bar is still forming, so it is stored but not marked as covered
+        covered_end = min(end, to_date(dt.date.today()) - ONE_DAY)
+
+        groups = {}
+        for ticker in tickers:
+            for rng in self.missing_ranges(ticker, start, end):
+                groups.setdefault(rng, []).append(ticker)
+
+        fetched = {}
+        for (s, e), group in groups.items():
+            frames, failed = self.source.fetch(group, s, e)
+            for ticker in group:
+                if ticker not in failed:
+                    fetched.setdefault(ticker, []).append(((s, e), frames.get(ticker)))
+
+        for ticker, ranges in fetched.items():
+            frames = [self.read(ticker)] + [df for _, df in ranges if df is not None]
+            frames = [f for f in frames if len(f)]
+            df = pd.concat(frames) if frames else self.read(ticker)
+            df.index = pd.DatetimeIndex(df.index).tz_localize(None).normalize()
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+
+            # the missing ranges border the covered one, so coverage grows only towards the
+            # ranges that were fetched and stays contiguous
+            meta = self.metadata(ticker)
+            new_start = None if meta is None else to_date(meta["start"])
+            new_end = None if meta is None else to_date(meta["end"])
+            for s, e in (rng for rng, _ in ranges):
+                if new_start is None or s < new_start:
+                    new_start = s
+                if new_end is None or min(e, covered_end) > new_end:
+                    new_end = min(e, covered_end)
+            self._write(ticker, df, new_start, new_end)
+
+    def get_history(self, ticker, start, end, update=True):
+        """
+        OHLCV DataFrame of one ticker between `start` and `end` (inclusive).
+        """
+        if update:
+            self.update([ticker], start, end)
+        df = self.read(ticker)
+        return df[(df.index >= to_date(start)) & (df.index <= to_date(end))].copy()
+
+    def get_prices(self, tickers, start, end, fields=FIELDS, update=True):
+        """
+        Price panel for many tickers: {field: DataFrame(date x ticker)} between `start` and
+        `end` (inclusive), fetching only what is not on disk yet.
+        """
+        tickers = list(tickers)
+        if update:
+            self.update(tickers, start, end)
+        histories = {t: self.get_history(t, start, end, update=False) for t in tickers}
+        panel = {}
+        for field in fields:
+            panel[field] = pd.DataFrame(
+                {t: h[field] for t, h in histories.items() if field in h.columns}
+            ).reindex(columns=tickers)
+        return panel
+
+
+def get_prices(tickers, start, end, fields=FIELDS):
+    """
+    Price panel from the default store (see `PriceStore.get_prices`).
+    """
+    return PriceStore().get_prices(tickers, start, end, fields=fields)
+
+
+def get_history(ticker, start, end):
+    """
+    One ticker's OHLCV from the default store (see `PriceStore.get_history`).
+    """
+    return PriceStore().get_history(ticker, start, end)
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# O(n) rolling kernels behind the rolling window functions of ta_functions.py. They accept a
+# Series or a (date x ticker) DataFrame, work along the index and, like `rolling(n)` with the
+# default min_periods, return NaN for every window that is incomplete or contains a NaN.
+
+
+def as_2d(data):
+    """
+    Values of a Series, DataFrame or 1-D/2-D array as a 2-D float array (rows x columns).
+    """
+    values = np.asarray(data, dtype=float)
+    return values.reshape(len(values), -1)
+
+
+def wrap(values, data):
+    """
+    A 2-D result of `as_2d(data)` back in the type and labels of `data`.
+    """
+    if isinstance(data, pd.DataFrame):
+        return pd.DataFrame(values, index=data.index, columns=data.columns)
+    if isinstance(data, pd.Series):
+        return pd.Series(values[:, 0], index=data.index, name=data.name)
+    return values[:, 0] if np.ndim(data) == 1 else values
+
+
+def complete_windows(values, n):
+    """
+    True where the window of n rows ending at that row is full and holds no NaN.
+    """
+    nan_count = np.cumsum(np.isnan(values), axis=0)
+    complete = np.zeros(values.shape, dtype=bool)
+    complete[n - 1:] = nan_count[n - 1:] == np.concatenate(
+        [np.zeros((1, values.shape[1])), nan_count[:-n]]
+    )
+    return complete
+
+
+def rolling_linreg(data, n):
+    """
+    Rolling Linear Regression.
+    End point of the least squares line fitted to each window of n values, from rolling sums of
+    y and x * y in closed form: y_mean + slope * (n - 1) / 2 with
+    slope = (sum(x * y) - x_mean * sum(y)) / (n * (n ** 2 - 1) / 12) and x = 0 .. n - 1.
+    """
+    y = pd.DataFrame(as_2d(data))
+    if n == 1:
+        return wrap(y.to_numpy(), data)
+    pos = np.arange(len(y), dtype=float)
+    sum_y = y.rolling(n).sum()
+    # rolling sums of the global position times y; shifting x to start at 0 in each window
+    # then only needs the window's first position
+    sum_xy = y.mul(pos, axis=0).rolling(n).sum().sub(sum_y.mul(pos - (n - 1), axis=0))
+    slope = (sum_xy - sum_y * (n - 1) / 2) / (n * (n * n - 1) / 12)
+    return wrap((sum_y / n + slope * (n - 1) / 2).to_numpy(), data)
+
+
+def _rolling_argmax(values, n):
+    # van Herk / Gil-Werman: split the rows in blocks of n, so every window is a suffix of one
+    # block followed by a prefix of the next; running maxima (and where they were reached) over
+    # block prefixes and suffixes then answer each window in O(1). Ties go to the earliest row.
+    rows, cols = values.shape
+    blocks = -(-rows // n)
+    padded = np.full((blocks * n, cols), -np.inf)
+    padded[:rows] = np.where(np.isnan(values), -np.inf, values)
+    padded = padded.reshape(blocks, n, cols)
+    pos = np.arange(blocks * n).reshape(blocks, n, 1)
+
+    prefix = np.maximum.accumulate(padded, axis=1)
+    new_max = np.ones(padded.shape, dtype=bool)
+    new_max[:, 1:] = padded[:, 1:] > prefix[:, :-1]
+    prefix_pos = np.maximum.accumulate(np.where(new_max, pos, -1), axis=1)
+
+    reverse = padded[:, ::-1]
+    suffix = np.maximum.accumulate(reverse, axis=1)
+    new_max = np.ones(padded.shape, dtype=bool)
+    new_max[:, 1:] = reverse[:, 1:] >= suffix[:, :-1]
+    suffix_pos = np.minimum.accumulate(np.where(new_max, pos[:, ::-1], blocks * n), axis=1)
+
+    prefix, prefix_pos = prefix.reshape(-1, cols)[:rows], prefix_pos.reshape(-1, cols)[:rows]
+    suffix, suffix_pos = suffix[:, ::-1].reshape(-1, cols), suffix_pos[:, ::-1].reshape(-1, cols)
+
+    result = np.full(values.shape, np.nan)
+    if rows >= n:
+        start = slice(0, rows - n + 1)
+        end = slice(n - 1, rows)
+        argmax = np.where(suffix[start] >= prefix[end], suffix_pos[start], prefix_pos[end])
+        result[end] = argmax - np.arange(rows - n + 1).reshape(-1, 1)
+    result[~complete_windows(values, n)] = np.nan
+    return result
+
+
+def rolling_argmax(data, n):
+    """
+    Rolling Argmax.
+    Position (0 .. n - 1) of the highest value in each window of n values, the first one on ties.
+    """
+    return wrap(_rolling_argmax(as_2d(data), n), data)
+
+
+def rolling_argmin(data, n):
+    """
+    Rolling Argmin.
+    Position (0 .. n - 1) of the lowest value in each window of n values, the first one on ties.
+    """
+    return wrap(_rolling_argmax(-as_2d(data), n), data)
+
+
+def money_flow_index(high, low, close, volume, n):
+    """
+    Money Flow Index.
+    Raw money flow (typical price * volume) counts as positive when the typical price rose from
+    the previous bar and as negative when it fell; the index compares their rolling sums over n
+    bars, 100 - 100 / (1 + positive / negative).
+    """
+    typical_price = (high + low + close) / 3
+    raw_money_flow = typical_price * volume
+    prev = typical_price.shift(1)
+    # the first bar has no previous typical price to compare with
+    known = prev.notna() & typical_price.notna()
+    positive = raw_money_flow.where(typical_price > prev, 0.0).where(known)
+    negative = raw_money_flow.where(typical_price < prev, 0.0).where(known)
+    money_flow_ratio = positive.rolling(n).sum() / negative.rolling(n).sum()
+    return 100 - (100 / (1 + money_flow_ratio))
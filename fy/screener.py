@@ -0,0 +1,93 @@
+import pandas as pd
+
+# Minervini trend template columns, in the order of the screener's export list
+TEMPLATE_COLUMNS = ["RS_Rating", "50 Day MA", "150 Day Ma", "200 Day MA", "52 Week Low", "52 week High"]
+
+
+def relative_return(close, index_close, lookback=252, recent=None, recent_weight=2, decimals=2):
+    """
+    Relative Return.
+    Return of every ticker over the last `lookback` bars divided by the index return over the
+    same bars, for every date of a (date x ticker) `close` panel. With `recent` set, the stock
+    return is the IBD weighting (recent_weight * R(t) + R(t - recent)) / (recent_weight + 1),
+    where R(t - recent) is the return up to `recent` bars ago, which double-weights the most
+    recent quarter. The original IBD script took R(t - recent) as `.iloc[-63]` of the daily
+    series, 62 bars before the last one, so recent=62 reproduces it.
+    """
+    base = close.shift(lookback)
+    stock_return = close / base
+    if recent is not None:
+        stock_return = (recent_weight * stock_return + close.shift(recent) / base) / (recent_weight + 1)
+    index_return = index_close / index_close.shift(lookback)
+    result = stock_return.div(index_return, axis=0)
+    return result.round(decimals) if decimals is not None else result
+
+
+def rs_rating(close, index_close, lookback=252, recent=62, recent_weight=2):
+    """
+    IBD Relative Strength Rating.
+    Percentile rank (0-100] of the weighted relative return across all tickers on each date.
+    """
+    rel = relative_return(close, index_close, lookback=lookback, recent=recent, recent_weight=recent_weight)
+    return rel.rank(axis=1, pct=True) * 100
+
+
+def trend_template(close, high, low, rs=None, rs_quantile=0.70, sma=(50, 150, 200),
+                   sma_200_lag=19, window_52w=260):
+    """
+    Minervini Trend Template.
+    Evaluates the screen on (date x ticker) panels for every date at once. Returns
+    {name: DataFrame} with the moving averages, the 52-week range, one boolean frame per
+    condition and `passed`, the conjunction of all of them. When an RS rating panel `rs` is
+    given, only tickers in its top (1 - rs_quantile) on a date can pass.
+    """
+    sma_50, sma_150, sma_200 = (close.rolling(n).mean() for n in sma)
+    low_52_week = low.rolling(window_52w).min()
+    high_52_week = high.rolling(window_52w).max()
+
+    conditions = {
+        "above_150_above_200": (close > sma_150) & (sma_150 > sma_200),
+        "150_above_200_trending": sma_150 > sma_200.shift(sma_200_lag),
+        "above_50": close > sma_50,
+        "above_52w_low": close >= 1.3 * low_52_week,
+        "near_52w_high": close >= 0.75 * high_52_week,
+    }
+    if rs is not None:
+        conditions["rs_top"] = rs.ge(rs.quantile(rs_quantile, axis=1), axis=0)
+
+    passed = pd.DataFrame(True, index=close.index, columns=close.columns)
+    for condition in conditions.values():
+        passed &= condition
+
+    result = {
+        "SMA_50": sma_50,
+        "SMA_150": sma_150,
+        "SMA_200": sma_200,
+        "52 Week Low": low_52_week,
+        "52 week High": high_52_week,
+    }
+    result.update(conditions)
+    result["passed"] = passed
+    return result
+
+
+def screen(template, rs, date=None):
+    """
+    Screen Output.
+    Tickers passing the trend template on `date` (default: the last date) with their RS
+    rating, moving averages and 52-week range, best RS rating first.
+    """
+    date = template["passed"].index[-1] if date is None else date
+    passed = template["passed"].loc[date]
+    stocks = passed.index[passed.to_numpy(dtype=bool)]
+    values = {
+        "RS_Rating": rs.loc[date],
+        "50 Day MA": template["SMA_50"].loc[date],
+        "150 Day Ma": template["SMA_150"].loc[date],
+        "200 Day MA": template["SMA_200"].loc[date],
+        "52 Week Low": template["52 Week Low"].loc[date],
+        "52 week High": template["52 week High"].loc[date],
+    }
+    result = pd.DataFrame({name: v.reindex(stocks) for name, v in values.items()}, columns=TEMPLATE_COLUMNS)
+    result.insert(0, "Stock", stocks)
+    return result.sort_values("RS_Rating", ascending=False).reset_index(drop=True)
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+
+import column_chunks as cc
+
+# (label, trading days held, calendar days between the buy and sell dates)
+HOLDING_PERIODS = [("1 Mo", 20, 30), ("2 Mos", 40, 60), ("3 Mos", 60, 90)]
+STATS_COLUMNS = [
+    "my_ticker",
+    "hold_per",
+    "pct_uprows",
+    "max_up_return",
+    "min_up_return",
+    "avg_up_return",
+    "avg_down_return",
+    "exp_return",
+    "stdev_returns",
+    "pct_downside",
+    "worst_return",
+    "least_pain_pt",
+    "total_years",
+    "max_consec_beat",
+    "best_buy_date",
+    "best_sell_date",
+    "analyzed_years",
+]
+ROW_STATS = ["YearCount", "UpCount", "DownCount", "PctUp", "PctDown", "AvgReturn", "StDevReturns",
+             "67PctDownside", "MaxReturn", "MinReturn"]
+
+# month-day labels of the 366 days of a leap year, the rows of the seasonal tables
+CALENDAR = pd.date_range("2000-01-01", "2000-12-31")
+MONTH_DAY = np.array(["{}-{}".format(d.month, d.day) for d in CALENDAR])
+
+
+def day_of_year(dates):
+    """
+    Row of every date in the 366-day seasonal calendar (Feb 29 always has its own row).
+    """
+    dates = pd.DatetimeIndex(dates)
+    slot = dates.dayofyear.to_numpy() - 1
+    return slot + ((~dates.is_leap_year) & (dates.month > 2))
+
+
+def _ffill(values, axis=0):
+    # forward fill NaN along `axis`
+    values = np.moveaxis(values, axis, 0)
+    idx = np.where(np.isnan(values), 0, np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1)))
+    idx = np.maximum.accumulate(idx, axis=0)
+    return np.moveaxis(np.take_along_axis(values, idx, axis=0), 0, axis)
+
+
+def seasonal_cube(close, dperiods, decimals=4):
+    """
+    Seasonal Return Cube.
+    `dperiods`-trading-day returns of every ticker of a (date x ticker) close panel laid out as
+    a (day-of-year x year x ticker) array, each ticker's returns taken over its own quotes.
+    Days without a quote in a year are forward filled from the previous calendar day of that
+    year. Returns the cube, the years, a (day-of-year x ticker) mask of the calendar days the
+    ticker was ever quoted on and a (year x ticker) mask of the years it was quoted in.
+    """
+    values = close.to_numpy(dtype=float)
+    rows, cols = np.nonzero(~np.isnan(values.T))
+    # quotes of every ticker in date order, one ticker after the other
+    quotes = values.T[rows, cols]
+    returns = np.full(len(quotes), np.nan)
+    same = rows[dperiods:] == rows[:-dperiods] if dperiods < len(quotes) else np.zeros(0, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns[dperiods:][same] = quotes[dperiods:][same] / quotes[:-dperiods][same] - 1
+    if decimals is not None:
+        returns = np.round(returns, decimals)
+
+    dates = close.index
+    years = np.arange(dates.year.min(), dates.year.max() + 1)
+    slot = day_of_year(dates)[cols]
+    year = dates.year.to_numpy()[cols] - years[0]
+    cube = np.full((366, len(years), close.shape[1]), np.nan)
+    cube[slot, year, rows] = returns
+    present = np.zeros((366, close.shape[1]), dtype=bool)
+    present[slot, rows] = True
+    quoted = np.zeros((len(years), close.shape[1]), dtype=bool)
+    quoted[year, rows] = True
+    return _ffill(cube), years, present, quoted
+
+
+def row_stats(cube, quoted, lookback=20, decimals=4):
+    """
+    Seasonal Row Statistics.
+    Statistics of every day-of-year row of a seasonal cube over each ticker's last `lookback`
+    quoted years (the columns of the per-ticker tables of Stock_analysis/seasonal_stock_analysis.py):
+    years with data, up/down counts, the share of up and down years (out of `lookback`), the
+    mean, standard deviation, mean minus one standard deviation, maximum and minimum return.
+    Returns {name: (day-of-year x ticker) array}.
+    """
+    # the last `lookback` years each ticker was quoted in
+    recent = np.cumsum(quoted[::-1], axis=0)[::-1] <= lookback
+    window = np.where((quoted & recent)[None], cube, np.nan)
+    with np.errstate(invalid="ignore"):
+        stats = {
+            "YearCount": np.sum(~np.isnan(cube), axis=1),
+            "UpCount": np.sum(window > 0, axis=1),
+            "DownCount": np.sum(window < 0, axis=1),
+        }
+    stats["PctUp"] = stats["UpCount"] / lookback
+    stats["PctDown"] = stats["DownCount"] / lookback
+    count = np.sum(~np.isnan(window), axis=1)
+    total = np.nansum(window, axis=1)
+    mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = np.nansum((window - mean[:, None]) ** 2, axis=1) / (count - 1)
+    stats["AvgReturn"] = mean
+    stats["StDevReturns"] = np.where(count > 1, np.sqrt(var), np.nan)
+    stats["67PctDownside"] = stats["AvgReturn"] - stats["StDevReturns"]
+    filled = np.where(np.isnan(window), -np.inf, window)
+    stats["MaxReturn"] = np.where(count > 0, filled.max(axis=1), np.nan)
+    filled = np.where(np.isnan(window), np.inf, window)
+    stats["MinReturn"] = np.where(count > 0, filled.min(axis=1), np.nan)
+    if decimals is not None:
+        stats = {k: np.round(v, decimals) for k, v in stats.items()}
+    return stats
+
+
+def _masked(values, mask, reduce, fill):
+    # reduce over the day-of-year axis the rows where mask is set and values are not NaN
+    mask = mask & ~np.isnan(values)
+    result = reduce(np.where(mask, values, fill), axis=0)
+    return np.where(mask.any(axis=0), result, np.nan)
+
+
+def _masked_mean(values, mask):
+    mask = mask & ~np.isnan(values)
+    count = mask.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, np.where(mask, values, 0).sum(axis=0) / count, np.nan)
+
+
+def longest_run(flags, present):
+    """
+    Longest run of consecutive True rows of every column, skipping rows where `present` is
+    False (they neither extend nor break a run).
+    """
+    hits = np.cumsum(flags & present, axis=0)
+    breaks = np.maximum.accumulate(np.where(present & ~flags, hits, 0), axis=0)
+    return (hits - breaks).max(axis=0, initial=0)
+
+
+def ticker_stats(stats, present, interval, threshold=0.80, lookback=20, decimals=4):
+    """
+    Seasonal Trading Statistics.
+    Per-ticker summary of the row statistics over the calendar days each ticker was quoted
+    on: share of days up more than `threshold` of the years, best and worst returns, average
+    returns on up and down days, expected return and deviation, the least-pain point (best
+    mean minus one standard deviation among the up days), the longest run of such days and
+    the best sell date with the buy date `interval` rows earlier (wrapping around the year).
+    Returns {column of STATS_COLUMNS: array}.
+    """
+    up = present & (stats["PctUp"] > threshold)
+    result = {
+        "pct_uprows": np.round(up.sum(axis=0) / present.sum(axis=0), decimals),
+        "max_up_return": _masked(stats["MaxReturn"], up, np.max, -np.inf),
+        "min_up_return": _masked(stats["MinReturn"], up, np.min, np.inf),
+        "avg_up_return": np.round(_masked_mean(stats["AvgReturn"], present & (stats["PctUp"] > 0.5)), decimals),
+        "avg_down_return": np.round(_masked_mean(stats["AvgReturn"], present & (stats["PctDown"] > 0.5)), decimals),
+        "exp_return": np.round(_masked_mean(stats["AvgReturn"], present), decimals),
+        "stdev_returns": np.round(_masked_mean(stats["StDevReturns"], present), decimals),
+        "worst_return": _masked(stats["MinReturn"], present, np.min, np.inf),
+        "least_pain_pt": _masked(stats["67PctDownside"], up, np.max, -np.inf),
+        "total_years": np.where(present, stats["YearCount"], 0).max(axis=0),
+        "max_consec_beat": longest_run(stats["PctUp"] > threshold, present),
+        "analyzed_years": np.full(present.shape[1], lookback),
+    }
+    result["pct_downside"] = np.round(result["exp_return"] - result["stdev_returns"], decimals)
+
+    # best sell date: first day at the least-pain point; buy `interval` quoted days before
+    best = present & (stats["67PctDownside"] == result["least_pain_pt"])
+    found = best.any(axis=0)
+    sell = np.argmax(best, axis=0)
+    # position of every day among the ticker's quoted days
+    position = np.cumsum(present, axis=0) - 1
+    num_days = present.sum(axis=0)
+    target = (position[sell, np.arange(present.shape[1])] - interval) % np.maximum(num_days, 1)
+    buy = np.argmax(present & (position == target), axis=0)
+    result["best_sell_date"] = np.where(found, MONTH_DAY[sell], "nan")
+    result["best_buy_date"] = np.where(found & (interval < num_days), MONTH_DAY[buy], "nan")
+    return result
+
+
+def seasonal_table(close, dperiods, lookback=20, decimals=4):
+    """
+    Seasonal Table.
+    The holding-period returns of one ticker (a close Series) with month-day rows and year
+    columns followed by the row statistics, for the calendar days it was quoted on.
+    """
+    cube, years, present, quoted = seasonal_cube(close.to_frame(), dperiods, decimals=decimals)
+    stats = row_stats(cube, quoted, lookback=lookback, decimals=decimals)
+    table = pd.DataFrame(cube[:, :, 0], columns=years)
+    table = table.loc[:, quoted[:, 0]]
+    table.insert(0, "M-D", MONTH_DAY)
+    for name in ROW_STATS:
+        table[name] = stats[name][:, 0]
+    table["Date"] = CALENDAR
+    return table[present[:, 0]].reset_index(drop=True)
+
+
+def _chunk_stats(close, periods, threshold, lookback, decimals):
+    frames = []
+    for hold_per, dperiods, interval in periods:
+        cube, years, present, quoted = seasonal_cube(close, dperiods, decimals=decimals)
+        stats = row_stats(cube, quoted, lookback=lookback, decimals=decimals)
+        result = ticker_stats(stats, present, interval, threshold=threshold, lookback=lookback, decimals=decimals)
+        result["my_ticker"] = np.asarray(close.columns)
+        result["hold_per"] = hold_per
+        result["period"] = len(frames)
+        frames.append(pd.DataFrame(result))
+    return pd.concat(frames, ignore_index=True)
+
+
+def seasonal_stats(close, periods=HOLDING_PERIODS, threshold=0.80, lookback=20, decimals=4,
+                   max_workers=None, chunk_size=100):
+    """
+    Seasonal Scan.
+    Seasonal trading statistics (STATS_COLUMNS) of every ticker of a (date x ticker) close
+    panel for every (label, trading days, calendar days) holding period, one row per ticker
+    and period. Tickers are processed in chunks of `chunk_size`, spread over a process pool
+    when there is more than one chunk.
+    """
+    close = close.loc[:, close.notna().any()]
+    # one ticker after the other, holding periods in the given order
+    return cc.map_column_chunks(
+        _chunk_stats, close, (periods, threshold, lookback, decimals), key="my_ticker",
+        columns=STATS_COLUMNS, by=["period"], max_workers=max_workers, chunk_size=chunk_size,
+    )
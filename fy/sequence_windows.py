@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(values, seq_len):
+    """
+    Sliding Windows.
+    All windows of `seq_len` consecutive rows of a (date x feature) array as a read-only
+    (window x seq_len x feature) view of it (a 1-D array gives window x seq_len). Nothing is
+    copied, window i is values[i:i + seq_len].
+    """
+    values = np.asarray(values)
+    windows = sliding_window_view(values, seq_len, axis=0)
+    if values.ndim == 1:
+        return windows
+    # sliding_window_view puts the window axis last
+    return np.moveaxis(windows, -1, 1)
+
+
+def split_sequences(sequences, seq_len, horizon=1):
+    """
+    Split Sequences.
+    Inputs and targets of a sequence model from a (date x feature) array: X[i] is rows i to
+    i + seq_len - 1 and y[i] is row i + seq_len + horizon - 1. Both are views of `sequences`.
+    """
+    sequences = np.asarray(sequences)
+    num_samples = len(sequences) - seq_len - horizon + 1
+    if num_samples <= 0:
+        shape = (0, seq_len) + sequences.shape[1:]
+        return np.empty(shape, dtype=sequences.dtype), np.empty((0,) + sequences.shape[1:], dtype=sequences.dtype)
+    return sliding_windows(sequences, seq_len)[:num_samples], sequences[seq_len + horizon - 1:]
+
+
+def panel_array(frames, columns=None, dtype=np.float32):
+    """
+    Panel Array.
+    Stacks a dict of per-ticker (date x feature) DataFrames into one (date x ticker x feature)
+    array aligned on the union of their dates; dates a ticker has no data for are NaN. Returns
+    the array, the dates and the tickers.
+    """
+    tickers = list(frames)
+    if columns is None:
+        columns = list(frames[tickers[0]].columns)
+    dates = pd.DatetimeIndex([])
+    for df in frames.values():
+        dates = dates.union(df.index)
+    panel = np.full((len(dates), len(tickers), len(columns)), np.nan, dtype=dtype)
+    for k, ticker in enumerate(tickers):
+        df = frames[ticker]
+        panel[dates.get_indexer(df.index), k] = df[columns].to_numpy(dtype=dtype)
+    return panel, dates, tickers
+
+
+class MinMaxScaler:
+    """
+    Min-Max Scaler.
+    Scales every feature to `feature_range` from the minimum and maximum seen in `fit`,
+    computed over the date axis in one pass. A (date x ticker x feature) panel gets separate
+    bounds per ticker and feature; NaN is ignored when fitting and kept when transforming.
+    The fitted bounds can be saved and loaded so that live predictions use the training
+    scaling.
+    """
+
+    def __init__(self, feature_range=(0, 1)):
+        self.feature_range = feature_range
+        self.data_min = None
+        self.data_max = None
+
+    def fit(self, values):
+        values = np.asarray(values)
+        self.data_min = np.nanmin(values, axis=0)
+        self.data_max = np.nanmax(values, axis=0)
+        return self
+
+    def _scale(self):
+        low, high = self.feature_range
+        data_range = self.data_max - self.data_min
+        # constant features are mapped to the lower bound instead of dividing by zero
+        data_range = np.where(data_range == 0, 1, data_range)
+        return (high - low) / data_range, low
+
+    def transform(self, values, columns=None):
+        """
+        Scale `values`; `columns` selects the features (last axis) the values belong to when
+        they hold only some of the fitted ones.
+        """
+        values = np.asarray(values)
+        scale, low = self._scale()
+        data_min = self.data_min
+        if columns is not None:
+            scale, data_min = scale[..., columns], data_min[..., columns]
+        dtype = values.dtype if np.issubdtype(values.dtype, np.floating) else float
+        return ((values - data_min) * scale + low).astype(dtype, copy=False)
+
+    def fit_transform(self, values):
+        return self.fit(values).transform(values)
+
+    def inverse_transform(self, values, columns=None):
+        values = np.asarray(values)
+        scale, low = self._scale()
+        data_min = self.data_min
+        if columns is not None:
+            scale, data_min = scale[..., columns], data_min[..., columns]
+        dtype = values.dtype if np.issubdtype(values.dtype, np.floating) else float
+        return ((values - low) / scale + data_min).astype(dtype, copy=False)
+
+    def save(self, path):
+        np.savez(path, feature_range=np.asarray(self.feature_range, dtype=float),
+                 data_min=self.data_min, data_max=self.data_max)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            scaler = cls(feature_range=tuple(float(v) for v in state["feature_range"]))
+            scaler.data_min = state["data_min"]
+            scaler.data_max = state["data_max"]
+        return scaler
+
+
+def window_index(panel, seq_len, horizon=1):
+    """
+    Window Index.
+    Start rows and ticker columns of every complete training window of a (date x ticker x
+    feature) panel: the `seq_len` input rows and the target row may not contain NaN, so
+    tickers with a shorter history only contribute windows over the dates they trade.
+    """
+    panel = np.asarray(panel)
+    if panel.ndim == 2:
+        panel = panel[:, None, :]
+    num_samples = len(panel) - seq_len - horizon + 1
+    if num_samples <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    missing = np.isnan(panel).any(axis=2)
+    count = np.concatenate([np.zeros((1, panel.shape[1]), dtype=np.intp), np.cumsum(missing, axis=0)])
+    starts = np.arange(num_samples)
+    complete = count[starts + seq_len] == count[starts]
+    complete &= ~missing[starts + seq_len + horizon - 1]
+    return np.nonzero(complete)
+
+
+def window_batches(panel, seq_len, batch_size=256, target=None, horizon=1, shuffle=False, seed=None):
+    """
+    Window Batches.
+    Generator of (X, y) batches over all complete windows of a (date x feature) array or a
+    (date x ticker x feature) panel, with X of shape (batch x seq_len x feature) and y the
+    `target` features (default all) of the row `horizon` steps after each window. Windows are
+    gathered from a zero-copy view of the panel one batch at a time, so memory stays at one
+    batch however many tickers and dates there are. `shuffle` draws the windows in random
+    order (from `seed`) instead of by date.
+    """
+    panel = np.asarray(panel)
+    if panel.ndim == 2:
+        panel = panel[:, None, :]
+    starts, tickers = window_index(panel, seq_len, horizon=horizon)
+    if shuffle:
+        order = np.random.default_rng(seed).permutation(len(starts))
+        starts, tickers = starts[order], tickers[order]
+    # (start x ticker x seq_len x feature) view of every window
+    windows = np.moveaxis(sliding_window_view(panel, seq_len, axis=0), -1, 2)
+    targets = panel if target is None else panel[:, :, np.atleast_1d(target)]
+    for b in range(0, len(starts), batch_size):
+        s, t = starts[b:b + batch_size], tickers[b:b + batch_size]
+        yield windows[s, t], targets[s + seq_len + horizon - 1, t]
+
+
+def window_dataset(panel, seq_len, batch_size=256, target=None, horizon=1, shuffle=False, seed=None):
+    """
+    Window Dataset.
+    tf.data.Dataset of the batches of window_batches, prefetched so that the next batch is
+    gathered while the model trains on the current one.
+    """
+    import tensorflow as tf
+
+    panel = np.asarray(panel)
+    num_features = panel.shape[-1]
+    num_targets = num_features if target is None else len(np.atleast_1d(target))
+    dtype = tf.as_dtype(panel.dtype)
+    dataset = tf.data.Dataset.from_generator(
+        lambda: window_batches(panel, seq_len, batch_size=batch_size, target=target, horizon=horizon,
+                               shuffle=shuffle, seed=seed),
+        output_signature=(
+            tf.TensorSpec(shape=(None, seq_len, num_features), dtype=dtype),
+            tf.TensorSpec(shape=(None, num_targets), dtype=dtype),
+        ),
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,47 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+def share_frame(df):
+    """
+    Copy a (numeric) price frame into a shared memory block.
+    Returns the block and the metadata workers need to map it back into a DataFrame. The
+    caller closes and unlinks the block once the workers are done.
+    """
+    values = np.ascontiguousarray(df.to_numpy(dtype=float))
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=float, buffer=shm.buf)[:] = values
+    meta = {
+        "name": shm.name,
+        "shape": values.shape,
+        "columns": list(df.columns),
+        "index": df.index.to_numpy(),
+        "index_name": df.index.name,
+        "attrs": dict(df.attrs),
+    }
+    return shm, meta
+
+
+def attach_values(meta):
+    """
+    Map the values of a frame shared by `share_frame` as a read-only array, without copying.
+    Returns the block and the array; the block must stay referenced while the array is used.
+    """
+    shm = shared_memory.SharedMemory(name=meta["name"])
+    values = np.ndarray(meta["shape"], dtype=float, buffer=shm.buf)
+    values.flags.writeable = False
+    return shm, values
+
+
+def attach_frame(meta):
+    """
+    Map a frame shared by `share_frame` back into a read-only DataFrame, without copying.
+    Returns the block and the frame; the block must stay referenced while the frame is used.
+    """
+    shm, values = attach_values(meta)
+    index = pd.Index(meta["index"], name=meta["index_name"])
+    frame = pd.DataFrame(values, index=index, columns=meta["columns"], copy=False)
+    frame.attrs.update(meta["attrs"])
+    return shm, frame
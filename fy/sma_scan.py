@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import column_chunks as cc
+
+SCAN_COLUMNS = ["Ticker", "Days Forward", "SMA Length", "Training Forward Return", "Test Forward Return",
+                "p-value"]
+
+
+def sma_matrix(close, lengths):
+    """
+    Simple moving averages of a 1-D close array for every length in `lengths` at once, as a
+    (lengths x dates) array: window sums are differences of a single cumulative sum (of the
+    closes minus the first close, which keeps the sums small). NaN before the first full window.
+    """
+    close = np.asarray(close, dtype=float)
+    cumsum = np.concatenate([[0.0], np.cumsum(close - close[0])])
+    sma = np.full((len(lengths), len(close)), np.nan)
+    for i, n in enumerate(lengths):
+        sma[i, n - 1:] = close[0] + (cumsum[n:] - cumsum[:-n]) / n
+    return sma
+
+
+def _range_sums(prefix, start, stop):
+    # sums over [start, stop) of every row, from prefix sums with a leading zero column
+    start = np.clip(start, 0, prefix.shape[1] - 1)[:, None]
+    stop = np.clip(stop, 0, prefix.shape[1] - 1)[:, None]
+    return (np.take_along_axis(prefix, stop, axis=1) - np.take_along_axis(prefix, start, axis=1))[:, 0]
+
+
+def _prefix(values):
+    prefix = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=prefix[:, 1:])
+    return prefix
+
+
+def _welch_pvalue(mean1, var1, n1, mean2, var2, n2):
+    # two-sided p-value of Welch's t-test, as scipy.stats.ttest_ind(equal_var=False)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se1 = var1 / n1
+        se2 = var2 / n2
+        t = (mean1 - mean2) / np.sqrt(se1 + se2)
+        df = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        return 2 * stats.t.sf(np.abs(t), df)
+
+
+def _moments(prefixes, start, stop):
+    # count, mean and sample variance of the returns over [start, stop) of every row, from the
+    # prefix sums of the (above the SMA) indicator, of the returns and of the squared returns
+    n, total, squares = (_range_sums(prefix, start, stop) for prefix in prefixes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        var = np.where(n > 1, (squares - total * mean) / (n - 1), np.nan)
+    return n, np.where(n > 0, mean, np.nan), np.maximum(var, 0)
+
+
+def scan_ticker(close, lengths=range(20, 500), days_forward=(10,), train_size=0.6):
+    """
+    SMA Length Scan.
+    For every SMA length and forward horizon, the mean forward return of the days the close is
+    above its SMA in the first `train_size` of the dates where both are known (training) and in
+    the rest (test), and the p-value of Welch's t-test between them, like the loop of
+    portfolio_strategies/best_moving_averages_analysis.py for one length at a time. All lengths
+    are evaluated as (lengths x dates) matrix computations; returns a DataFrame with one row per
+    (horizon, length).
+    """
+    close = np.asarray(close, dtype=float)
+    lengths = np.asarray(lengths)
+    days_forward = [days_forward] if np.isscalar(days_forward) else days_forward
+    num_dates = len(close)
+    above = (close > sma_matrix(close, lengths)).astype(float)
+    count_prefix = _prefix(above)
+    frames = []
+    for h in days_forward:
+        returns = np.zeros(num_dates)
+        returns[:num_dates - h] = (close[h:] - close[:num_dates - h]) / close[:num_dates - h]
+        # dates with both an SMA and a forward close, split like df.head / df.tail
+        first = lengths - 1
+        stop = num_dates - h
+        known = np.maximum(stop - first, 0)
+        num_training = (train_size * known).astype(int)
+        num_test = ((1 - train_size) * known).astype(int)
+        weighted = above * returns
+        prefixes = (count_prefix, _prefix(weighted), _prefix(weighted * returns))
+        n1, mean1, var1 = _moments(prefixes, first, first + num_training)
+        n2, mean2, var2 = _moments(prefixes, stop - num_test, np.full(len(lengths), stop))
+        frames.append(pd.DataFrame({
+            "Days Forward": h,
+            "SMA Length": lengths,
+            "Training Forward Return": mean1,
+            "Test Forward Return": mean2,
+            "p-value": _welch_pvalue(mean1, var1, n1, mean2, var2, n2),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _scan_chunk(close, lengths, days_forward, train_size):
+    frames = []
+    for ticker in close.columns:
+        result = scan_ticker(close[ticker].dropna(), lengths, days_forward, train_size)
+        result.insert(0, "Ticker", ticker)
+        frames.append(result)
+    return pd.concat(frames, ignore_index=True)
+
+
+def sma_scan(close, lengths=range(20, 500), days_forward=(10,), train_size=0.6, max_workers=None,
+             chunk_size=50):
+    """
+    Ranked SMA Scan.
+    `scan_ticker` for every ticker of a (date x ticker) close panel (or a single close Series),
+    ranked by training forward return within each ticker and horizon, best first. Tickers are
+    processed in chunks of `chunk_size`, spread over a process pool when there is more than one
+    chunk.
+    """
+    if isinstance(close, pd.Series):
+        close = close.to_frame(close.name if close.name is not None else "Close")
+    lengths = np.asarray(lengths)
+    close = close.loc[:, close.notna().sum() > lengths.min()]
+    return cc.map_column_chunks(
+        _scan_chunk, close, (lengths, days_forward, train_size), key="Ticker", columns=SCAN_COLUMNS,
+        by=["Days Forward", "Training Forward Return"], ascending=[True, False],
+        max_workers=max_workers, chunk_size=chunk_size,
+    )
@@ -0,0 +1,379 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+NAN = float("nan")
+
+
+class _RollingWindow:
+    """
+    Mean and variance of the last n values in O(1) per value.
+    Sums are kept relative to a shift (the window mean as of the last recompute) and recomputed
+    from the window every n values, so rounding errors do not build up over a long stream.
+    Like pandas rolling windows, the statistics are NaN until the window is full and while it
+    holds a NaN.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.values = deque(maxlen=n)
+        self.shift = 0.0
+        self.total = 0.0
+        self.squares = 0.0
+        self.missing = 0
+        self.since_recompute = 0
+
+    def push(self, x):
+        if len(self.values) == self.n:
+            old = self.values[0]
+            if math.isnan(old):
+                self.missing -= 1
+            else:
+                d = old - self.shift
+                self.total -= d
+                self.squares -= d * d
+        self.values.append(x)
+        if math.isnan(x):
+            self.missing += 1
+        else:
+            d = x - self.shift
+            self.total += d
+            self.squares += d * d
+        self.since_recompute += 1
+        if self.since_recompute >= self.n:
+            self._recompute()
+
+    def _recompute(self):
+        valid = [v for v in self.values if not math.isnan(v)]
+        self.shift = math.fsum(valid) / len(valid) if valid else 0.0
+        self.total = math.fsum(v - self.shift for v in valid)
+        self.squares = math.fsum((v - self.shift) ** 2 for v in valid)
+        self.since_recompute = 0
+
+    def ready(self):
+        return len(self.values) == self.n and self.missing == 0
+
+    def mean(self):
+        return self.shift + self.total / self.n if self.ready() else NAN
+
+    def var(self, ddof=1):
+        if not self.ready() or self.n <= ddof:
+            return NAN
+        return max(self.squares - self.total * self.total / self.n, 0.0) / (self.n - ddof)
+
+
+class _RollingExtreme:
+    """
+    Maximum (sign=1) or minimum (sign=-1) of the last n values in amortized O(1) per value,
+    from a monotonic deque of (position, value) candidates. NaN until the window is full and
+    while it holds a NaN, like pandas rolling windows.
+    """
+
+    def __init__(self, n, sign=1):
+        self.n = n
+        self.sign = sign
+        self.count = 0
+        self.last_missing = -n - 1
+        self.candidates = deque()
+
+    def push(self, x):
+        i = self.count
+        self.count += 1
+        if math.isnan(x):
+            self.last_missing = i
+        else:
+            x = self.sign * x
+            while self.candidates and self.candidates[-1][1] <= x:
+                self.candidates.pop()
+            self.candidates.append((i, x))
+        while self.candidates and self.candidates[0][0] <= i - self.n:
+            self.candidates.popleft()
+        if self.count < self.n or self.last_missing > i - self.n or not self.candidates:
+            return NAN
+        return self.sign * self.candidates[0][1]
+
+
+class _EWM:
+    """
+    Exponentially weighted mean with adjust=False, the same recursion (including its handling
+    of NaN and `min_periods`) as pandas' ewm(alpha=alpha, adjust=False).mean().
+    """
+
+    def __init__(self, alpha, min_periods=0):
+        self.alpha = alpha
+        self.min_periods = max(min_periods, 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.observations = 0
+
+    def push(self, x):
+        observed = not math.isnan(x)
+        self.observations += observed
+        if not math.isnan(self.weighted):
+            self.old_wt *= 1 - self.alpha
+            if observed:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif observed:
+            self.weighted = x
+        return self.weighted if self.observations >= self.min_periods else NAN
+
+
+def _span_alpha(span):
+    # alpha of ewm(span=span), computed the way pandas does
+    return 1 / (1 + (span - 1) / 2)
+
+
+def _divide(a, b):
+    # a / b with the IEEE results pandas gives for a zero denominator
+    if b == 0:
+        if math.isnan(a) or a == 0:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class StreamingIndicator:
+    """
+    Streaming Indicator.
+    Stateful counterpart of a ta_functions indicator: `update(bar)` takes the next bar (a
+    mapping or row with the `fields` columns, e.g. a dict or a DataFrame row, or just the
+    close for close-only indicators) and returns the indicator value for it in O(1), the same
+    value the batch function gives for the last row of the series so far. `seed(history)`
+    warms the state up on a historical DataFrame (or Series of closes) and returns the last
+    value; `value` is the last value returned.
+    """
+
+    fields = ("Close",)
+
+    def __init__(self):
+        self.value = NAN
+
+    def _update(self, *values):
+        raise NotImplementedError
+
+    def update(self, bar):
+        if np.isscalar(bar):
+            values = (float(bar),)
+        else:
+            values = tuple(float(bar[field]) for field in self.fields)
+        self.value = self._update(*values)
+        return self.value
+
+    def seed(self, history):
+        if isinstance(history, pd.Series):
+            columns = [history.to_numpy(dtype=float)]
+        else:
+            columns = [history[field].to_numpy(dtype=float) for field in self.fields]
+        for values in zip(*columns):
+            self.value = self._update(*(float(v) for v in values))
+        return self.value
+
+
+class SMA(StreamingIndicator):
+    """
+    Simple Moving Average (SMA), as ta_functions.SMA.
+    """
+
+    def __init__(self, timeperiod=14):
+        super().__init__()
+        self.window = _RollingWindow(timeperiod)
+
+    def _update(self, close):
+        self.window.push(close)
+        return self.window.mean()
+
+
+class EMA(StreamingIndicator):
+    """
+    Exponential Moving Average (EMA), as ta_functions.EMA.
+    """
+
+    def __init__(self, timeperiod=12):
+        super().__init__()
+        self.ewm = _EWM(_span_alpha(timeperiod))
+
+    def _update(self, close):
+        return self.ewm.push(close)
+
+
+class RSI(StreamingIndicator):
+    """
+    Relative Strength Index (RSI), as ta_functions.RSI with the same `wilder` flag.
+    Average gains and losses are simple averages over `timeperiod` bars, or Wilder-smoothed
+    (an EMA with alpha 1/timeperiod) with wilder=True. The first bar has no change and
+    returns NaN.
+    """
+
+    def __init__(self, timeperiod=14, wilder=False):
+        super().__init__()
+        self.wilder = wilder
+        if wilder:
+            self.gains = _EWM(1 / timeperiod, min_periods=timeperiod)
+            self.losses = _EWM(1 / timeperiod, min_periods=timeperiod)
+        else:
+            self.gains = _RollingWindow(timeperiod)
+            self.losses = _RollingWindow(timeperiod)
+        self.previous = None
+
+    def _update(self, close):
+        previous, self.previous = self.previous, close
+        if previous is None:
+            return NAN
+        delta = close - previous
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if self.wilder:
+            avg_gain = self.gains.push(gain)
+            avg_loss = self.losses.push(loss)
+        else:
+            self.gains.push(gain)
+            self.losses.push(loss)
+            avg_gain = self.gains.mean()
+            avg_loss = self.losses.mean()
+        rs = _divide(avg_gain, avg_loss)
+        return 100 - (100 / (1 + rs))
+
+
+class MACD(StreamingIndicator):
+    """
+    Moving Average Convergence Divergence (MACD), as ta_functions.MACD: returns
+    (macd, signal, histogram).
+    """
+
+    def __init__(self, fastperiod=12, slowperiod=26, signalperiod=9):
+        super().__init__()
+        self.fast = _EWM(_span_alpha(fastperiod))
+        self.slow = _EWM(_span_alpha(slowperiod))
+        self.signal = _EWM(_span_alpha(signalperiod))
+
+    def _update(self, close):
+        macd = self.fast.push(close) - self.slow.push(close)
+        signal = self.signal.push(macd)
+        return macd, signal, macd - signal
+
+
+class BBANDS(StreamingIndicator):
+    """
+    Bollinger Bands (BBANDS), as ta_functions.BBANDS: returns (upper, middle, lower).
+    """
+
+    def __init__(self, timeperiod=20, nbdevup=2, nbdevdn=2):
+        super().__init__()
+        self.window = _RollingWindow(timeperiod)
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+
+    def _update(self, close):
+        self.window.push(close)
+        sma = self.window.mean()
+        std = math.sqrt(self.window.var(ddof=1))
+        return sma + std * self.nbdevup, sma, sma - std * self.nbdevdn
+
+
+class ATR(StreamingIndicator):
+    """
+    Average True Range (ATR), as ta_functions.ATR: the simple average of the true range over
+    `timeperiod` bars, or its Wilder smoothing (an EMA with alpha 1/timeperiod) with
+    wilder=True. The first bar has no previous close, so no true range.
+    """
+
+    fields = ("High", "Low", "Close")
+
+    def __init__(self, timeperiod=14, wilder=False):
+        super().__init__()
+        self.wilder = wilder
+        self.average = _EWM(1 / timeperiod) if wilder else _RollingWindow(timeperiod)
+        self.previous = NAN
+
+    def _update(self, high, low, close):
+        true_range = max(high - low, abs(high - self.previous), abs(low - self.previous))
+        if math.isnan(self.previous) or math.isnan(high) or math.isnan(low):
+            true_range = NAN
+        self.previous = close
+        if self.wilder:
+            return self.average.push(true_range)
+        self.average.push(true_range)
+        return self.average.mean()
+
+
+class STOCH(StreamingIndicator):
+    """
+    Stochastic Oscillator (STOCH), as ta_functions.STOCH with simple moving averages:
+    returns (slowk, slowd).
+    """
+
+    fields = ("High", "Low", "Close")
+
+    def __init__(self, fastk_period=14, slowk_period=3, slowd_period=3):
+        super().__init__()
+        self.highest = _RollingExtreme(fastk_period, sign=1)
+        self.lowest = _RollingExtreme(fastk_period, sign=-1)
+        self.fastd = _RollingWindow(slowk_period)
+        self.slowk = _RollingWindow(slowk_period)
+        self.slowd = _RollingWindow(slowd_period)
+
+    def _update(self, high, low, close):
+        highest = self.highest.push(high)
+        lowest = self.lowest.push(low)
+        fastk = _divide(close - lowest, highest - lowest) * 100
+        self.fastd.push(fastk)
+        self.slowk.push(self.fastd.mean())
+        slowk = self.slowk.mean()
+        self.slowd.push(slowk)
+        return slowk, self.slowd.mean()
+
+
+class OBV(StreamingIndicator):
+    """
+    On Balance Volume (OBV), as ta_functions.OBV.
+    """
+
+    fields = ("Close", "Volume")
+
+    def __init__(self):
+        super().__init__()
+        self.total = 0.0
+        self.previous = NAN
+
+    def _update(self, close, volume):
+        change = close - self.previous
+        direction = 0.0 if math.isnan(change) else float(np.sign(change))
+        self.previous = close
+        flow = direction * volume
+        if math.isnan(flow):
+            return NAN
+        self.total += flow
+        return self.total
+
+
+class VWAP(StreamingIndicator):
+    """
+    Volume Weighted Average Price (VWAP), as ta_functions.VWAP: the average typical price
+    weighted by volume since the stream started or since the last `reset` (e.g. at the
+    start of every session for intraday bars).
+    """
+
+    fields = ("High", "Low", "Close", "Volume")
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    def _update(self, high, low, close, volume):
+        typical_price = (high + low + close) / 3
+        if not math.isnan(volume):
+            self.volume += volume
+        # like the batch cumsums, a missing price or volume is skipped in the running sums
+        # but gives no VWAP for its own bar
+        if math.isnan(typical_price * volume):
+            return NAN
+        self.price_volume += typical_price * volume
+        return _divide(self.price_volume, self.volume)
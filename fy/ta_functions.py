@@ -6,7 +6,31 @@ import yfinance as yf
 yf.pdr_override()
 import pandas as pd
 import numpy as np
-
+import functools
+import rolling_kernels as rk
+import band_kernels as bk
+
+def batched(func):
+    """
+    Batched Indicator.
+    Every indicator takes Series or (date x ticker) DataFrames and computes all columns along the
+    index in one call; this also lets it take 1-D or 2-D NumPy arrays, which are returned as arrays.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not any(isinstance(a, np.ndarray) for a in args):
+            return func(*args, **kwargs)
+        args = [
+            (pd.Series(a) if a.ndim == 1 else pd.DataFrame(a)) if isinstance(a, np.ndarray) else a
+            for a in args
+        ]
+        result = func(*args, **kwargs)
+        if isinstance(result, tuple):
+            return tuple(np.asarray(r) for r in result)
+        return np.asarray(result)
+    return wrapper
+
+@batched
 def SMA(data, timeperiod=14):
     """
     Simple Moving Average (SMA).
@@ -15,6 +39,7 @@ def SMA(data, timeperiod=14):
     """
     return data.rolling(window=timeperiod).mean()
 
+@batched
 def EMA(data, timeperiod=12):
     """
     Exponential Moving Average (EMA).
@@ -24,6 +49,7 @@ def EMA(data, timeperiod=12):
     ema = data.ewm(span=timeperiod, adjust=False).mean()
     return ema
 
+@batched
 def WMA(values, n):
     """
     Weighted Moving Average (WMA).
@@ -32,6 +58,7 @@ def WMA(values, n):
     """
     return values.ewm(alpha=1/n, adjust=False).mean()
 
+@batched
 def ATR(high, low, close, timeperiod=14):
     """
     Average True Range (ATR).
@@ -46,6 +73,7 @@ def ATR(high, low, close, timeperiod=14):
     atr = WMA(tr, timeperiod)
     return atr
 
+@batched
 def BBANDS(data, timeperiod=20, nbdevup=2, nbdevdn=2, matype=None):
     """
     Bollinger Bands (BBANDS).
@@ -58,6 +86,7 @@ def BBANDS(data, timeperiod=20, nbdevup=2, nbdevdn=2, matype=None):
     bollinger_down = sma - std * nbdevdn
     return bollinger_up, sma, bollinger_down
 
+@batched
 def STOCH(high, low, close, fastk_period=14, slowk_period=3, slowk_matype=0, slowd_period=3, slowd_matype=0):
     """
     Stochastic Oscillator (STOCH).
@@ -78,25 +107,34 @@ def STOCH(high, low, close, fastk_period=14, slowk_period=3, slowk_matype=0, slo
 
     return slowk, slowd
 
-def RSI(data, timeperiod=14):
+@batched
+def RSI(data, timeperiod=14, wilder=False):
     """
     Relative Strength Index (RSI).
-    A momentum oscillator that measures the speed and change of price movements.
+    A momentum oscillator that measures the speed and change of price movements. Gains and losses
+    are averaged over `timeperiod` rows, or Wilder-smoothed with wilder=True.
     """
     delta = data.diff()
-    delta = delta[1:]
 
     gain = delta.where(delta > 0, 0)
     loss = -delta.where(delta < 0, 0)
+    # the first row has no change; it stays NaN so the output lines up with the input
+    gain.iloc[:1] = np.nan
+    loss.iloc[:1] = np.nan
 
-    avg_gain = gain.rolling(window=timeperiod).mean()
-    avg_loss = loss.rolling(window=timeperiod).mean()
+    if wilder:
+        avg_gain = gain.ewm(alpha=1 / timeperiod, min_periods=timeperiod, adjust=False).mean()
+        avg_loss = loss.ewm(alpha=1 / timeperiod, min_periods=timeperiod, adjust=False).mean()
+    else:
+        avg_gain = gain.rolling(window=timeperiod).mean()
+        avg_loss = loss.rolling(window=timeperiod).mean()
 
     rs = avg_gain / avg_loss
     rsi = 100 - (100 / (1 + rs))
 
     return rsi
 
+@batched
 def CCI(high, low, close, timeperiod=14):
     """
     Commodity Channel Index (CCI).
@@ -109,6 +147,7 @@ def CCI(high, low, close, timeperiod=14):
     cci = (typical_price - sma) / (0.015 * mean_deviation)
     return cci
 
+@batched
 def MACD(data, fastperiod=12, slowperiod=26, signalperiod=9):
     """
     Moving Average Convergence Divergence (MACD).
@@ -123,6 +162,7 @@ def MACD(data, fastperiod=12, slowperiod=26, signalperiod=9):
     return macd, signal, histogram
 
 
+@batched
 def WILLR(high, low, close, timeperiod=14):
     """
     Williams %R.
@@ -133,16 +173,26 @@ def WILLR(high, low, close, timeperiod=14):
     willr = -100 * ((highest_high - close) / (highest_high - lowest_low))
     return willr
 
+@batched
 def OBV(close, volume):
     """
     On Balance Volume (OBV).
     Uses volume flow to predict changes in stock price.
     """
-    df = pd.DataFrame({'close': close, 'volume': volume})
-    df['obv'] = np.where(df['close'] > df['close'].shift(1), df['volume'], 
-                         np.where(df['close'] < df['close'].shift(1), -df['volume'], 0)).cumsum()
-    return df['obv']
+    direction = np.sign(close.diff()).fillna(0)
+    obv = (direction * volume).cumsum()
+    return obv.rename('obv') if isinstance(obv, pd.Series) else obv
+
+@batched
+def VWAP(high, low, close, volume):
+    """
+    Volume Weighted Average Price (VWAP).
+    The average typical price weighted by volume since the start of the series.
+    """
+    typical_price = (high + low + close) / 3
+    return (typical_price * volume).cumsum() / volume.cumsum()
 
+@batched
 def AD(high, low, close, volume):
     """
     Chaikin A/D Line.
@@ -154,6 +204,7 @@ def AD(high, low, close, volume):
     ad = ad.cumsum()
     return ad
 
+@batched
 def ADOSC(high, low, close, volume, fastperiod=3, slowperiod=10):
     """
     Chaikin A/D Oscillator.
@@ -163,21 +214,16 @@ def ADOSC(high, low, close, volume, fastperiod=3, slowperiod=10):
     adosc = ad.ewm(span=fastperiod).mean() - ad.ewm(span=slowperiod).mean()
     return adosc
 
+@batched
 def MFI(high, low, close, volume, timeperiod=14):
     """
     Money Flow Index (MFI).
     A momentum indicator that incorporates both price and volume data, often used to identify overbought 
     or oversold conditions in an asset.
     """
-    typical_price = (high + low + close) / 3
-    raw_money_flow = typical_price * volume
-    money_flow_ratio = (
-        raw_money_flow.rolling(window=timeperiod).apply(lambda x: np.sum(x[x > x.shift(1)])) / 
-        raw_money_flow.rolling(window=timeperiod).apply(lambda x: np.sum(x[x < x.shift(1)]))
-    )
-    mfi = 100 - (100 / (1 + money_flow_ratio))
-    return mfi
+    return rk.money_flow_index(high, low, close, volume, timeperiod)
 
+@batched
 def ADX(high, low, close, timeperiod=14):
     """
     Average Directional Index (ADX).
@@ -201,6 +247,7 @@ def ADX(high, low, close, timeperiod=14):
 
     return adx
 
+@batched
 def ATR(high, low, close, timeperiod=14):
     """
     Average True Range (ATR).
@@ -210,6 +257,7 @@ def ATR(high, low, close, timeperiod=14):
     atr = tr.rolling(window=timeperiod).mean()
     return atr
 
+@batched
 def NATR(high, low, close, timeperiod=14):
     """
     Normalized Average True Range (NATR).
@@ -219,6 +267,7 @@ def NATR(high, low, close, timeperiod=14):
     natr = 100 * (atr / close)
     return natr
 
+@batched
 def BETA(datax, datay, timeperiod=5):
     """
     Beta.
@@ -226,9 +275,10 @@ def BETA(datax, datay, timeperiod=5):
     """
     covariance = datax.rolling(window=timeperiod).cov(datay)
     variance = datay.rolling(window=timeperiod).var()
-    beta = covariance / variance
+    beta = covariance.div(variance, axis=0)
     return beta
 
+@batched
 def STDDEV(data, timeperiod=5, nbdev=1):
     """
     Standard Deviation (STDDEV).
@@ -236,6 +286,7 @@ def STDDEV(data, timeperiod=5, nbdev=1):
     """
     return data.rolling(window=timeperiod).std(ddof=0) * nbdev
 
+@batched
 def TRANGE(high, low, close):
     """
     True Range.
@@ -245,9 +296,35 @@ def TRANGE(high, low, close):
     high_low = high - low
     high_close = np.abs(high - close.shift())
     low_close = np.abs(low - close.shift())
-    true_range = np.maximum(high_low, high_close, low_close)
+    true_range = np.maximum(np.maximum(high_low, high_close), low_close)
     return true_range
 
+@batched
+def SUPERTREND(high, low, close, timeperiod=7, multiplier=3):
+    """
+    SuperTrend.
+    A trend following line at `multiplier` Wilder-smoothed ATRs above (downtrend) or below (uptrend)
+    the median price; the bands only trail in the direction of the trend and the line switches
+    sides when the close crosses it. Returns (supertrend, direction), direction being 1 in an
+    uptrend and -1 in a downtrend.
+    """
+    atr = bk.wilder_average(TRANGE(high, low, close), timeperiod)
+    median_price = (high + low) / 2
+    supertrend, direction, _, _ = bk.trailing_bands(
+        median_price + multiplier * atr, median_price - multiplier * atr, close
+    )
+    return supertrend, direction
+
+@batched
+def SAR(high, low, acceleration=0.02, maximum=0.2):
+    """
+    Parabolic SAR.
+    A stop and reverse level that trails the price, accelerating towards the extreme of the trend
+    and flipping to the other side of the price when it is hit.
+    """
+    return bk.parabolic_sar(high, low, acceleration, maximum)
+
+@batched
 def MOM(close, timeperiod=10):
     """
     Momentum (MOM).
@@ -255,6 +332,7 @@ def MOM(close, timeperiod=10):
     """
     return close.diff(periods=timeperiod)
 
+@batched
 def ROC(close, timeperiod=10):
     """
     Rate of Change (ROC).
@@ -263,6 +341,7 @@ def ROC(close, timeperiod=10):
     roc = ((close - close.shift(periods=timeperiod)) / close.shift(periods=timeperiod)) * 100
     return roc
 
+@batched
 def AVGPRICE(open, high, low, close):
     """
     Average Price.
@@ -270,17 +349,16 @@ def AVGPRICE(open, high, low, close):
     """
     return (open + high + low + close) / 4
 
+@batched
 def LINEARREG(close, timeperiod=14):
     """
     Linear Regression.
     A statistical way to predict future prices based on past prices.
     """
-    idx = np.arange(timeperiod)
-    def linreg(x):
-        return np.polyval(np.polyfit(idx, x, 1), idx)[-1]
-    return close.rolling(window=timeperiod).apply(linreg, raw=True)
+    return rk.rolling_linreg(close, timeperiod)
 
 # Mathematical Operators
+@batched
 def ADD(data1, data2):
     """
     Vector Arithmetic Add.
@@ -288,6 +366,7 @@ def ADD(data1, data2):
     """
     return data1 + data2
 
+@batched
 def DIV(data1, data2):
     """
     Vector Arithmetic Div.
@@ -295,30 +374,35 @@ def DIV(data1, data2):
     """
     return data1 / data2
 
+@batched
 def MAX(data, timeperiod=14):
     """
     Highest value over a specified period.
     """
     return data.rolling(window=timeperiod).max()
 
+@batched
 def MAXINDEX(data, timeperiod=14):
     """
     Index of highest value over a specified period.
     """
-    return data.rolling(window=timeperiod).apply(np.argmax) + 1
+    return rk.rolling_argmax(data, timeperiod) + 1
 
+@batched
 def MIN(data, timeperiod=14):
     """
     Lowest value over a specified period.
     """
     return data.rolling(window=timeperiod).min()
 
+@batched
 def MININDEX(data, timeperiod=14):
     """
     Index of lowest value over a specified period.
     """
-    return data.rolling(window=timeperiod).apply(np.argmin) + 1
+    return rk.rolling_argmin(data, timeperiod) + 1
 
+@batched
 def MINMAX(data, timeperiod=14):
     """
     Lowest and highest values over a specified period.
@@ -327,14 +411,16 @@ def MINMAX(data, timeperiod=14):
     max_val = data.rolling(window=timeperiod).max()
     return min_val, max_val
 
+@batched
 def MINMAXINDEX(data, timeperiod=14):
     """
     Indexes of lowest and highest values over a specified period.
     """
-    min_idx = data.rolling(window=timeperiod).apply(np.argmin) + 1
-    max_idx = data.rolling(window=timeperiod).apply(np.argmax) + 1
+    min_idx = rk.rolling_argmin(data, timeperiod) + 1
+    max_idx = rk.rolling_argmax(data, timeperiod) + 1
     return min_idx, max_idx
 
+@batched
 def MULT(data1, data2):
     """
     Vector Arithmetic Mult.
@@ -342,6 +428,7 @@ def MULT(data1, data2):
     """
     return data1 * data2
 
+@batched
 def SUB(data1, data2):
     """
     Vector Arithmetic Subtraction.
@@ -349,6 +436,7 @@ def SUB(data1, data2):
     """
     return data1 - data2
 
+@batched
 def SUM(data, timeperiod=14):
     """
     Summation.
@@ -5,6 +5,13 @@ import matplotlib.pyplot as plt
 import yfinance as yf
 import datetime as dt
 yf.pdr_override()
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import price_store as ps
+import tickers as ti
+import breadth as br
 
 # input
 symbol = "SPY"
@@ -20,19 +27,15 @@ import talib as ta
 # ## On Balance Volume
 OBV = ta.OBV(df["Adj Close"], df["Volume"])
 
-import quandl as q
-
-Advances = q.get("URC/NYSE_ADV", start_date="2017-07-27")["Numbers of Stocks"]
-Declines = q.get("URC/NYSE_DEC", start_date="2017-07-27")["Numbers of Stocks"]
-
-adv_vol = q.get("URC/NYSE_ADV_VOL", start_date="2017-07-27")["Numbers of Stocks"]
-dec_vol = q.get("URC/NYSE_DEC_VOL", start_date="2017-07-27")["Numbers of Stocks"]
+# NYSE advances, declines and their volume computed from the bundled universe
+nyse_tickers = ti.tickers_from_csv("nyse_tickers.csv")
+nyse_breadth = br.breadth(ps.get_prices(nyse_tickers, start, end))
 
 data = pd.DataFrame()
-data["Advances"] = Advances
-data["Declines"] = Declines
-data["adv_vol"] = adv_vol
-data["dec_vol"] = dec_vol
+data["Advances"] = nyse_breadth["Advances"]
+data["Declines"] = nyse_breadth["Declines"]
+data["adv_vol"] = nyse_breadth["Up_Volume"]
+data["dec_vol"] = nyse_breadth["Down_Volume"]
 
 data["Net_Advances"] = data["Advances"] - data["Declines"]
 data["Ratio_Adjusted"] = (
@@ -47,7 +50,7 @@ data["RANA"] = (
 # Finding the TRIN Value
 data["ad_ratio"] = data["Advances"].divide(data["Declines"])  # AD Ratio
 data["ad_vol"] = data["adv_vol"].divide(data["dec_vol"])  # AD Volume Ratio
-data["TRIN"] = data["ad_ratio"].divide(data["adv_vol"])  # TRIN Value
+data["TRIN"] = data["ad_ratio"].divide(data["ad_vol"])  # TRIN Value
 
 # ## Force Index
 
@@ -91,14 +94,11 @@ def Chaikin(data):
 
 Chaikin(df)
 
-Up = q.get("URC/NYSE_ADV", start_date="2017-07-27")["Numbers of Stocks"]
-Down = q.get("URC/NYSE_DEC", start_date="2017-07-27")["Numbers of Stocks"]
+Up = data["adv_vol"]
+Down = data["dec_vol"]
 Volume_Spread = Up - Down
-
-Up = q.get("URC/NYSE_ADV", start_date="2017-07-27")["Numbers of Stocks"]
-Down = q.get("URC/NYSE_DEC", start_date="2017-07-27")["Numbers of Stocks"]
 Volume_Ratio = Up / Down
 
 # ## Cumulative Volume Index
 # CVI = Yesterday's CVI + (Advancing Volume - Declining Volume)
-data["CVI"] = data["Net_Advances"][1:] + (data["Advances"] - data["Declines"])
\ No newline at end of file
+data["CVI"] = (data["adv_vol"] - data["dec_vol"]).cumsum()
\ No newline at end of file
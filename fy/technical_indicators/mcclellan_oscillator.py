@@ -1,10 +1,16 @@
 # Import dependencies
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import yfinance as yf
 import datetime as dt
 yf.pdr_override()
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import price_store as ps
+import tickers as ti
+import breadth as br
 
 # input
 symbol = "AAPL"
@@ -25,14 +31,10 @@ Declines = change[change <= 0]
 # ADL for stocks
 dfs["ADL_Stock"] = Advances.combine_first(Declines)
 
-import quandl as q
-
-Advances = q.get("URC/NYSE_ADV", start_date="2018-01-01")["Numbers of Stocks"]
-Declines = q.get("URC/NYSE_DEC", start_date="2018-01-01")["Numbers of Stocks"]
-
-df = pd.DataFrame()
-df["Advances"] = Advances
-df["Declines"] = Declines
+# NYSE advances and declines computed from the bundled universe (today's listing, so past breadth
+# leaves out the stocks delisted since: survivorship bias)
+nyse_tickers = ti.tickers_from_csv("nyse_tickers.csv")
+df = br.breadth(ps.get_prices(nyse_tickers, start, end))
 df.head()
 
 # Ratio Adjusted Net Advances (RANA): (Advances - Declines)/(Advances + Declines)
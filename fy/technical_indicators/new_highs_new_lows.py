@@ -5,6 +5,13 @@ import matplotlib.pyplot as plt
 import yfinance as yf
 import datetime as dt
 yf.pdr_override()
+import sys
+import os
+parent_dir = os.path.dirname(os.getcwd())
+sys.path.append(parent_dir)
+import price_store as ps
+import tickers as ti
+import breadth as br
 
 # input
 symbol = "SPY"
@@ -14,8 +21,11 @@ end = dt.date.today()
 # Read data
 df = yf.download(symbol, start, end)
 
-new_high = df["Adj Close"].rolling(52).max()  # 52-week lows
-new_low = df["Adj Close"].rolling(52).min()  # 52-week highs
+# NYSE stocks at a 52-week high / low, computed from the bundled universe
+nyse_tickers = ti.tickers_from_csv("nyse_tickers.csv")
+nyse_breadth = br.breadth(ps.get_prices(nyse_tickers, start, end), window=252)
+new_high = nyse_breadth["New_Highs"].reindex(df.index).iloc[252:]  # 52-week highs
+new_low = nyse_breadth["New_Lows"].reindex(df.index).iloc[252:]  # 52-week lows
 
 print("Yesterday's Value:", df["Adj Close"][-2])  # Yesterday's Value
 print("Current Value:", df["Adj Close"][-1])  # Current's Value
@@ -27,7 +37,7 @@ new_low = new_low.dropna()
 
 # 1. Cumulative New High/Low Line
 # Today's Value = Yesterday's Value + (Today's New Highs - Today's New Lows)
-df["CNHL"] = df["Adj Close"][1] + (new_high - new_low)
+df["CNHL"] = (new_high - new_low).cumsum()
 
 # 2. New-High Minus New-Low Oscillator
 # Oscillator = Today\'s New Highs – Today\'s New Lows
@@ -41,13 +51,13 @@ df["Ratio"] = new_high / new_low
 # % New Highs = Today\'s New Highs / (Today\'s New Highs + Today\'s New Lows)
 # % New Lows = Today\'s New Lows / (Today\'s New Highs + Today\'s New Lows)
 df["NH"] = new_high / (new_high + new_low)
-df["NL"] = new_high / (new_high + new_low)
+df["NL"] = new_low / (new_high + new_low)
 
 # 5. Percentage of New Highs to Total Market
 # % New Highs = Today\'s New Highs / Total # of Listed Stocks in Given Market
 # % New Lows = Today\'s New Lows / Total # of Listed Stocks in Given Market
-df["NHTM"] = new_high / 5  # Number of stocks
-df["NLTM"] = new_low / 5  # Number of stocks
+df["NHTM"] = new_high / len(nyse_tickers)  # Number of stocks
+df["NLTM"] = new_low / len(nyse_tickers)  # Number of stocks
 
 df = df.dropna()
 
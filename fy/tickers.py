@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 import requests
 
@@ -45,3 +46,9 @@ def tickers_amex():
     # Filter out only AMEX symbols
     amex_df = df[df['Exchange'] == 'A']
     return amex_df['ACT Symbol'].tolist()
+
+def tickers_from_csv(filename):
+    # Universes bundled with the repo, e.g. 's&p500_tickers.csv' or 'russell3000_tickers.csv'
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    df = pd.read_csv(path)
+    return df['Ticker'].dropna().str.replace('.', '-', regex=False).tolist()
@@ -0,0 +1,256 @@
+import csv
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.svm import SVR
+
+import grid_search as gs
+
+RESULT_COLUMNS = [
+    "config", "ticker", "model", "fold", "train_start", "train_end", "test_start", "test_end", "n_train",
+    "n_test", "r2", "rmse", "mae", "fit_time", "predict_time", "latency_us",
+]
+
+# the models of machine_learning/ml_models_accuracy.py
+DEFAULT_MODELS = {
+    "LinearRegression": LinearRegression(),
+    "SVR": SVR(kernel="rbf", C=1e3, gamma=0.1),
+    "RandomForest": RandomForestRegressor(n_estimators=100),
+    "GradientBoosting": GradientBoostingRegressor(n_estimators=200),
+}
+
+# feature matrices already loaded by a worker process, keyed on their cache file
+_loaded = {}
+
+
+def price_features(df, forecast_out=30):
+    """
+    Price Features.
+    The OHLCV columns of `df` with returns over 1, 5 and 20 days, 20-day volatility, the close
+    relative to its 20 and 50-day averages and the volume z-score over 20 days; the target is
+    the close `forecast_out` rows later. Rows with an incomplete feature or target are dropped.
+    """
+    close = df["Close"]
+    returns = close.pct_change()
+    features = df[[c for c in ["Open", "High", "Low", "Close", "Adj Close", "Volume"] if c in df.columns]].copy()
+    features["return_1"] = returns
+    features["return_5"] = close.pct_change(5)
+    features["return_20"] = close.pct_change(20)
+    features["volatility_20"] = returns.rolling(20).std()
+    features["close_sma_20"] = close / close.rolling(20).mean()
+    features["close_sma_50"] = close / close.rolling(50).mean()
+    volume = df["Volume"]
+    features["volume_z_20"] = (volume - volume.rolling(20).mean()) / volume.rolling(20).std()
+    features["target"] = close.shift(-forecast_out)
+    features = features.replace([np.inf, -np.inf], np.nan).dropna()
+    return features.drop(columns="target"), features["target"]
+
+
+class FeatureCache:
+    """
+    On-disk Feature Cache.
+    Feature matrices are stored as one .npz per ticker under `directory`, named after the
+    ticker and a hash of the feature function, its arguments and the date range of the prices,
+    so a rerun over unchanged data (or the workers of the same run) loads them instead of
+    recomputing them.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, ticker, df, features, kwargs):
+        key = repr((features.__module__, features.__name__, sorted(kwargs.items()),
+                    str(df.index[0]), str(df.index[-1]), len(df)))
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, "{}_{}.npz".format(ticker.replace(os.sep, "_"), digest))
+
+    def get(self, ticker, df, features, **kwargs):
+        """
+        Path of the cached feature matrix of `ticker`, computing and saving it on a miss.
+        """
+        path = self.path(ticker, df, features, kwargs)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        X, y = features(df, **kwargs)
+        tmp = path[:-len(".npz")] + ".tmp.npz"
+        np.savez(tmp, X=X.to_numpy(dtype=float), y=y.to_numpy(dtype=float),
+                 dates=X.index.to_numpy(dtype="datetime64[ns]"), columns=np.array(X.columns, dtype=str))
+        os.replace(tmp, path)
+        return path
+
+
+def walk_forward_splits(n, n_splits=5, test_size=None, window=None, gap=0, min_train=None):
+    """
+    Walk-forward Splits.
+    (train_start, train_end, test_start, test_end) row ranges of `n_splits` consecutive test
+    blocks of `test_size` rows (by default sized so that the first fold trains on as many
+    rows as it tests) at the end of n rows. Training uses every row before the test
+    block (expanding) or the last `window` rows (rolling), ending `gap` rows before it so
+    that targets looking ahead do not overlap the test block. Folds with fewer than
+    `min_train` training rows are skipped.
+    """
+    if test_size is None:
+        test_size = (n - gap) // (n_splits + 1)
+    if min_train is None:
+        min_train = test_size
+    folds = []
+    for k in range(n_splits):
+        test_start = n - (n_splits - k) * test_size
+        train_end = test_start - gap
+        train_start = 0 if window is None else max(0, train_end - window)
+        if test_size > 0 and train_end - train_start >= max(min_train, 1):
+            folds.append((train_start, train_end, test_start, test_start + test_size))
+    return folds
+
+
+def _load(path):
+    if path not in _loaded:
+        _loaded.clear()
+        with np.load(path) as data:
+            _loaded[path] = (data["X"], data["y"], data["dates"])
+    return _loaded[path]
+
+
+def run_config(path, name, model, n_splits, test_size, window, gap):
+    """
+    Hash of everything a (ticker, model) result depends on: the feature matrix (its cache file
+    is named after the features, their arguments and the date range of the prices), the model
+    and its parameters and the fold settings.
+    """
+    key = repr((os.path.basename(path), name, type(model).__name__, sorted(model.get_params().items()),
+                n_splits, test_size, window, gap))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _run_fold(path, config, ticker, name, model, fold, bounds):
+    X, y, dates = _load(path)
+    train_start, train_end, test_start, test_end = bounds
+    x_train, y_train = X[train_start:train_end], y[train_start:train_end]
+    x_test, y_test = X[test_start:test_end], y[test_start:test_end]
+
+    model = clone(model)
+    t0 = time.perf_counter()
+    model.fit(x_train, y_train)
+    fit_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    y_pred = model.predict(x_test)
+    predict_time = time.perf_counter() - t0
+    # latency of one live prediction, best of 5
+    latency = []
+    for _ in range(5):
+        t0 = time.perf_counter()
+        model.predict(x_test[-1:])
+        latency.append(time.perf_counter() - t0)
+
+    error = y_pred - y_test
+    total = np.sum((y_test - y_test.mean()) ** 2)
+    r2 = 1 - np.sum(error ** 2) / total if total > 0 else np.nan
+    return [
+        config, ticker, name, fold,
+        str(pd.Timestamp(dates[train_start]).date()), str(pd.Timestamp(dates[train_end - 1]).date()),
+        str(pd.Timestamp(dates[test_start]).date()), str(pd.Timestamp(dates[test_end - 1]).date()),
+        train_end - train_start, test_end - test_start,
+        r2, np.sqrt(np.mean(error ** 2)), np.mean(np.abs(error)),
+        fit_time, predict_time, min(latency) * 1e6,
+    ]
+
+
+def load_results(path):
+    """
+    Walk-forward results recorded in a checkpoint CSV (empty if there is none).
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    results = pd.read_csv(path, float_precision="round_trip", dtype={"config": str})
+    if list(results.columns) != RESULT_COLUMNS:
+        raise ValueError("{} has columns {}, expected {}".format(path, list(results.columns), RESULT_COLUMNS))
+    # a row cut short by a crash mid-write is not complete
+    results = results.dropna(subset=["latency_us"])
+    return results.drop_duplicates(["config", "ticker", "model", "fold"], keep="last").reset_index(drop=True)
+
+
+def run_walk_forward(data, models=None, features=price_features, feature_kwargs=None, n_splits=5,
+                     test_size=None, window=None, gap=0, cache_dir="walk_forward_cache",
+                     checkpoint="walk_forward.csv", max_workers=None, verbose=True):
+    """
+    Walk-forward Model Evaluation.
+    Fits and scores every model of `models` ({name: unfitted estimator}, default the four of
+    ml_models_accuracy.py) on the walk-forward folds of every ticker of `data` ({ticker:
+    OHLCV DataFrame}). Feature matrices come from the on-disk FeatureCache and each (ticker,
+    model, fold) runs as its own task in a process pool. Rows with the accuracy (r2, rmse,
+    mae) and the fit, predict and one-row latency timings are appended to the `checkpoint`
+    CSV as they complete, keyed by a `run_config` hash, and tasks already in it with the same
+    hash are skipped, so an interrupted overnight run resumes where it stopped while a run with
+    other settings or data does not reuse its rows. Returns the results of this run.
+    """
+    models = DEFAULT_MODELS if models is None else models
+    feature_kwargs = feature_kwargs or {}
+    cache = FeatureCache(cache_dir)
+    gs.truncate_partial_row(checkpoint)
+    done = load_results(checkpoint)
+    done = set(zip(done.config, done.ticker.astype(str), done.model, done.fold))
+
+    configs = set()
+    tasks = []
+    for ticker, df in data.items():
+        if len(df) == 0:
+            continue
+        path = cache.get(ticker, df, features, **feature_kwargs)
+        with np.load(path) as cached:
+            n = len(cached["y"])
+        folds = walk_forward_splits(n, n_splits=n_splits, test_size=test_size, window=window, gap=gap)
+        for name, model in models.items():
+            config = run_config(path, name, model, n_splits, test_size, window, gap)
+            configs.add(config)
+            for fold, bounds in enumerate(folds):
+                if (config, str(ticker), name, fold) not in done:
+                    tasks.append((path, config, ticker, name, model, fold, bounds))
+    if verbose:
+        print("Walk-forward: {} folds to run, features for {} tickers ({} from the cache)".format(
+            len(tasks), cache.hits + cache.misses, cache.hits))
+
+    t0 = time.perf_counter()
+    write_header = not os.path.exists(checkpoint) or os.path.getsize(checkpoint) == 0
+    with open(checkpoint, "a", newline="") as f, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(RESULT_COLUMNS)
+            f.flush()
+        futures = [pool.submit(_run_fold, *task) for task in tasks]
+        for c, future in enumerate(as_completed(futures), 1):
+            writer.writerow(future.result())
+            f.flush()
+            if verbose and (c % 100 == 0 or c == len(futures)):
+                print("Completed {}/{} folds in {:.1f}s".format(c, len(futures), time.perf_counter() - t0))
+    results = load_results(checkpoint)
+    return results[results.config.isin(configs)].reset_index(drop=True)
+
+
+def summarize(results):
+    """
+    Model Comparison.
+    Mean accuracy and timings of every model over all tickers and folds, best r2 first.
+    """
+    summary = results.groupby("model").agg(
+        r2=("r2", "mean"),
+        r2_median=("r2", "median"),
+        rmse=("rmse", "mean"),
+        mae=("mae", "mean"),
+        fit_time=("fit_time", "mean"),
+        predict_time=("predict_time", "mean"),
+        latency_us=("latency_us", "median"),
+        folds=("fold", "size"),
+    )
+    return summary.sort_values("r2", ascending=False)